@@ -1,183 +1,145 @@
+import datetime
+import functools
+import io
+import tempfile
+import time
+
+import numpy as np
+import plotly.express as px
+import plotly.graph_objects as go
 import streamlit as st
-import pandas as pd
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from mustard_engine import EngineInputs, calculate_metrics_batch, format_indian, format_indian_array
+from mustard_engine.cache import shared_cache
+from mustard_engine.graph import MetricsGraph
+from mustard_engine.heatmap import shared_grid_cache
+from mustard_engine.autodiff import jacobian
+from mustard_engine.blending import LOT_FIELDS, optimize_blend, rule_margin
+from mustard_engine.export import FORMATS, export, grid_chunks
+from mustard_engine.inputs import DEFAULT_INPUTS, INPUT_BOUNDS, INPUT_LABELS
+from mustard_engine.library import METRIC_NAMES, shared_library
+from mustard_engine.montecarlo import Normal, run_monte_carlo
+from mustard_engine.portfolio import Portfolio
+from mustard_engine.profiling import NULL_TRACE, Trace, shared_tracer, tracing_everywhere
+from mustard_engine.prices import shared_price_store
+from mustard_engine.projection import project
+from mustard_engine.render import pnl_views
+from mustard_engine.solver import goal_seek
+from mustard_engine.sensitivity import tornado
+from mustard_engine.variants import LEGACY, compare_variants
 
-# --- Page Configuration and Helper Function ---
+# --- Page Configuration ---
 st.set_page_config(layout="wide", page_title="Mustard Oil Business Dashboard")
 
-def format_indian(num):
-    """Formats a number into the Indian numbering system for better readability."""
-    if not isinstance(num, (int, float)): return num
-    num_str = f"{abs(num):,.0f}"
-    parts = num_str.split('.')
-    integer_part = parts[0].replace(',', '')
-    if len(integer_part) > 3:
-        last_three = integer_part[-3:]
-        other_digits = integer_part[:-3]
-        if other_digits:
-            formatted_other_digits = ','.join([other_digits[max(0, i-2):i] for i in range(len(other_digits), 0, -2)][::-1])
-            formatted_num = f"{formatted_other_digits},{last_three}"
-        else: formatted_num = last_three
-    else: formatted_num = integer_part
-    return '-' + formatted_num if num < 0 else formatted_num
+# --- Profiling (opt-in: $MUSTARD_TRACE for every session, or ?perf=1 for this one); off, every span is a no-op ---
+def delta_counter():
+    """[elements, seconds enqueuing] for this session's messages to the browser, counted by wrapping the run context's
+    enqueue callback (a Streamlit internal, so it is only installed while profiling); None outside a Streamlit run."""
+    ctx = get_script_run_ctx()
+    if ctx is None: return None
+    counter = getattr(ctx, "mustard_delta_counter", None)
+    if counter is None:
+        counter, enqueue = [0, 0.0], ctx._enqueue
+        def counting(msg):
+            t0 = time.perf_counter()
+            enqueue(msg)
+            counter[1] += time.perf_counter() - t0
+            counter[0] += msg.WhichOneof("type") in ("delta", "ref_hash")
+        ctx._enqueue, ctx.mustard_delta_counter = counting, counter
+    return counter
+
+def start_trace(kind="run", name="app"):
+    ctx = get_script_run_ctx()
+    trace = Trace(kind, name, session=ctx.session_id if ctx else None)
+    counter = delta_counter()
+    trace.delta_start = list(counter) if counter else None
+    return trace
+
+def finish_trace(trace):
+    counter = delta_counter() if trace.enabled else None
+    if counter and trace.delta_start: trace.note(elements=counter[0] - trace.delta_start[0], enqueue_ms=(counter[1] - trace.delta_start[1]) * 1000)
+    shared_tracer().record(trace)
+
+profiling = tracing_everywhere() or st.query_params.get("perf") == "1"
+trace = start_trace() if profiling else NULL_TRACE
+
+def fragment(panel):
+    """`st.fragment` that times each call of `panel` as a span named after it: inside this rerun's trace on a full
+    run, or as a trace of its own when only the fragment reruns (the script above it does not run then)."""
+    @functools.wraps(panel)
+    def traced(*args, **kwargs):
+        global trace
+        if not profiling: return panel(*args, **kwargs)
+        ctx = get_script_run_ctx()
+        if ctx is None or not ctx.fragment_ids_this_run:
+            with trace.span(panel.__name__): return panel(*args, **kwargs)
+        trace = start_trace("fragment", panel.__name__)
+        try:
+            with trace.span(panel.__name__): return panel(*args, **kwargs)
+        finally: finish_trace(trace)
+    return st.fragment(traced)
 
 st.title("🛢️ Mustard Oil Financial & Operational Dashboard")
 st.markdown("An interactive dashboard for comprehensive analysis of a mustard oil processing business, built to investment banking standards.")
 
 # --- Sidebar for All User Inputs ---
 with st.sidebar:
+    st.session_state.update({k: v for k, v in DEFAULT_INPUTS.items() if k not in st.session_state})  # the widgets' defaults; "Load" overwrites them
     st.header("⚙️ Business & Financial Inputs")
     with st.expander("Production & Prices", expanded=True):
-        seed_input_mt = st.number_input("Daily Seed Input (MT)", value=192.0)
-        kachi_ghani_yield_pct = st.slider("Kachi Ghani Oil Yield (%)", 0, 100, 18)
-        expeller_yield_pct = st.slider("Expeller Oil Yield (%)", 0, 100, 15)
-        seed_purchase_price = st.number_input("Seed Purchase Price (₹/MT)", value=50000.0)
-        oil_blend_sell_price = st.number_input("Oil Blend Sell Price (₹/MT)", value=141000.0)
-        moc_sell_price = st.number_input("MoC Sell Price (₹/MT)", value=22000.0)
+        seed_input_mt = st.number_input("Daily Seed Input (MT)", key="seed_input_mt")
+        kachi_ghani_yield_pct = st.slider("Kachi Ghani Oil Yield (%)", 0, 100, key="kachi_ghani_yield_pct")
+        expeller_yield_pct = st.slider("Expeller Oil Yield (%)", 0, 100, key="expeller_yield_pct")
+        seed_purchase_price = st.number_input("Seed Purchase Price (₹/MT)", key="seed_purchase_price")
+        oil_blend_sell_price = st.number_input("Oil Blend Sell Price (₹/MT)", key="oil_blend_sell_price")
+        moc_sell_price = st.number_input("MoC Sell Price (₹/MT)", key="moc_sell_price")
     with st.expander("Costs & Expenses", expanded=True):
-        processing_cost_per_mt = st.number_input("Processing Cost (₹/MT of Seed)", value=2500.0)
-        other_variable_costs_per_mt = st.number_input("Other Variable Costs (₹/MT of Seed)", value=0.0)
-        other_expenses_daily = st.number_input("Other Fixed Expenses (₹/day)", value=45000.0)
-        production_days_per_month = st.number_input("Production Days per Month", value=24.0)
+        processing_cost_per_mt = st.number_input("Processing Cost (₹/MT of Seed)", key="processing_cost_per_mt")
+        other_variable_costs_per_mt = st.number_input("Other Variable Costs (₹/MT of Seed)", key="other_variable_costs_per_mt")
+        other_expenses_daily = st.number_input("Other Fixed Expenses (₹/day)", key="other_expenses_daily")
+        production_days_per_month = st.number_input("Production Days per Month", key="production_days_per_month")
     with st.expander("Pungency & MoC Enhancement", expanded=True):
-        kachi_ghani_pungency = st.slider("Kachi Ghani Oil Pungency (%)", 0.0, 1.0, 0.4, step=0.01)
-        expeller_oil_pungency = st.slider("Expeller Oil Pungency (%)", 0.0, 1.0, 0.12, step=0.01)
-        expeller_oil_sell_price = st.number_input("Expeller Oil Sell Price (₹/MT)", value=136000.0)
-        market_bought_oil_price = st.number_input("Market-Bought Oil Price (₹/MT)", value=132000.0)
-        water_added_pct = st.slider("Water Added to MoC (% of seed)", 0, 10, 2)
-        water_cost_per_kg = st.number_input("Water Cost (₹/kg)", value=1.0)
-        salt_added_pct = st.slider("Salt Added to MoC (% of seed)", 0, 10, 3)
-        salt_cost_per_kg = st.number_input("Salt Cost (₹/kg)", value=5.0)
+        kachi_ghani_pungency = st.slider("Kachi Ghani Oil Pungency (%)", 0.0, 1.0, step=0.01, key="kachi_ghani_pungency")
+        expeller_oil_pungency = st.slider("Expeller Oil Pungency (%)", 0.0, 1.0, step=0.01, key="expeller_oil_pungency")
+        expeller_oil_sell_price = st.number_input("Expeller Oil Sell Price (₹/MT)", key="expeller_oil_sell_price")
+        market_bought_oil_price = st.number_input("Market-Bought Oil Price (₹/MT)", key="market_bought_oil_price")
+        water_added_pct = st.slider("Water Added to MoC (% of seed)", 0, 10, key="water_added_pct")
+        water_cost_per_kg = st.number_input("Water Cost (₹/kg)", key="water_cost_per_kg")
+        salt_added_pct = st.slider("Salt Added to MoC (% of seed)", 0, 10, key="salt_added_pct")
+        salt_cost_per_kg = st.number_input("Salt Cost (₹/kg)", key="salt_cost_per_kg")
     with st.expander("Capex, Tax & Financing", expanded=True):
-        capex = st.number_input("Capex (₹)", value=200000000.0)
-        equity_in_capex_pct = st.slider("Equity % in Capex", 0, 100, 100, help="Set the percentage of Capex funded by equity. The rest is debt.")
-        depreciation_years = st.number_input("Depreciation Period (Years)", min_value=1, value=15)
-        tax_rate_pct = st.slider("Tax Rate (%)", 0, 50, 25)
-        other_assets = st.number_input("Other Assets (₹)", value=0.0)
-        warehouse_finance_rate_pa = st.slider("Warehouse Finance Interest Rate (% p.a.)", 0.0, 25.0, 10.0, help="Interest for financed RM Hoard")
-        main_financing_rate_pa = st.slider("Main Financing Cost Interest Rate (% p.a.)", 0.0, 25.0, 10.0, help="Interest for Capex Debt and remaining WC")
-        rm_hoard_financed_pct = st.slider("% of Hoarded RM Financed", 0, 100, 0)
+        capex = st.number_input("Capex (₹)", key="capex")
+        equity_in_capex_pct = st.slider("Equity % in Capex", 0, 100, help="Set the percentage of Capex funded by equity. The rest is debt.", key="equity_in_capex_pct")
+        depreciation_years = st.number_input("Depreciation Period (Years)", min_value=1, key="depreciation_years")
+        tax_rate_pct = st.slider("Tax Rate (%)", 0, 50, key="tax_rate_pct")
+        other_assets = st.number_input("Other Assets (₹)", key="other_assets")
+        warehouse_finance_rate_pa = st.slider("Warehouse Finance Interest Rate (% p.a.)", 0.0, 25.0, help="Interest for financed RM Hoard", key="warehouse_finance_rate_pa")
+        main_financing_rate_pa = st.slider("Main Financing Cost Interest Rate (% p.a.)", 0.0, 25.0, help="Interest for Capex Debt and remaining WC", key="main_financing_rate_pa")
+        rm_hoard_financed_pct = st.slider("% of Hoarded RM Financed", 0, 100, key="rm_hoard_financed_pct")
     with st.expander("Working Capital Cycles", expanded=True):
-        rm_hoard_months = st.number_input("Raw Material Hoard (months)", value=0.0)
-        hoarded_rm_rate = st.number_input("Hoarded RM Rate (₹/MT)", value=50000.0)
-        rm_safety_stock_days = st.number_input("RM Safety Stock (days)", value=48.0)
-        fg_oil_safety_days = st.number_input("FG (Oil) Safety Stock (days)", value=15.0)
-        fg_moc_safety_days = st.number_input("FG (MoC) Safety Stock (days)", value=4.0)
-        oil_debtor_days = st.number_input("Oil Debtor Cycle (days)", value=5.0)
-        moc_debtor_days = st.number_input("MoC Debtor Cycle (days)", value=5.0)
-        creditor_days = st.number_input("Creditors Days", value=5.0)
+        rm_hoard_months = st.number_input("Raw Material Hoard (months)", key="rm_hoard_months")
+        hoarded_rm_rate = st.number_input("Hoarded RM Rate (₹/MT)", key="hoarded_rm_rate")
+        rm_safety_stock_days = st.number_input("RM Safety Stock (days)", key="rm_safety_stock_days")
+        fg_oil_safety_days = st.number_input("FG (Oil) Safety Stock (days)", key="fg_oil_safety_days")
+        fg_moc_safety_days = st.number_input("FG (MoC) Safety Stock (days)", key="fg_moc_safety_days")
+        oil_debtor_days = st.number_input("Oil Debtor Cycle (days)", key="oil_debtor_days")
+        moc_debtor_days = st.number_input("MoC Debtor Cycle (days)", key="moc_debtor_days")
+        creditor_days = st.number_input("Creditors Days", key="creditor_days")
     with st.expander("🏭 Solvex Plant Synergy Inputs", expanded=False):
-        moc_consumed_perc = st.slider("% of MOC Consumed In-House", 0, 100, 100)
-        logistics_saved_per_ton = st.number_input("Logistics Saved (₹/Ton of MOC)", value=400.0)
-        labor_saved_nos = st.number_input("Labor Headcount Saved (Daily)", value=4.0)
-        labor_cost_per_head_daily = st.number_input("Cost per Labor Head (₹/Day)", value=550.0)
-        brokerage_saved_per_ton = st.number_input("Brokerage Saved (₹/Ton of MOC)", value=150.0)
-
-# --- Calculation Engine (Triple-Verified & Final) ---
-@st.cache_data
-def calculate_all_metrics(inputs):
-    # Unpack all inputs
-    for key, value in inputs.items(): globals()[key] = value
-    
-    kachi_ghani_yield, expeller_yield = kachi_ghani_yield_pct/100, expeller_yield_pct/100
-    moc_base_yield, min_pungency_req = 1-(kachi_ghani_yield+expeller_yield), 0.2700
-    kachi_ghani_oil_produced_mt, expeller_oil_produced_mt = seed_input_mt*kachi_ghani_yield, seed_input_mt*expeller_yield
-    total_produced_oil = kachi_ghani_oil_produced_mt + expeller_oil_produced_mt
-    initial_blend_pungency = (kachi_ghani_oil_produced_mt * kachi_ghani_pungency + expeller_oil_produced_mt * expeller_oil_pungency) / total_produced_oil if total_produced_oil > 0 else 0
-    exp_oil_used_in_blend_mt, exp_oil_sold_separately_mt, market_oil_to_add_mt = expeller_oil_produced_mt, 0, 0
-    pungency_recommendation = ""
-    if initial_blend_pungency < min_pungency_req and total_produced_oil > 0:
-        if (denominator := min_pungency_req - expeller_oil_pungency) != 0: exp_oil_used_in_blend_mt = max(0, (kachi_ghani_oil_produced_mt * (kachi_ghani_pungency - min_pungency_req)) / denominator)
-        exp_oil_sold_separately_mt = expeller_oil_produced_mt - exp_oil_used_in_blend_mt
-        loss = exp_oil_sold_separately_mt * (oil_blend_sell_price - expeller_oil_sell_price)
-        pungency_recommendation = f"🔴 **Pungency Low ({initial_blend_pungency:.2f}%)**: Sell {exp_oil_sold_separately_mt:.2f} MT of Expeller Oil separately. Est. daily opportunity loss: ₹ {format_indian(abs(loss))}."
-    elif initial_blend_pungency > min_pungency_req and total_produced_oil > 0:
-        if min_pungency_req > 0: market_oil_to_add_mt = max(0, ((kachi_ghani_oil_produced_mt * kachi_ghani_pungency + expeller_oil_produced_mt * expeller_oil_pungency) / min_pungency_req) - total_produced_oil)
-        profit = market_oil_to_add_mt * (oil_blend_sell_price - market_bought_oil_price)
-        pungency_recommendation = f"🟢 **Pungency High ({initial_blend_pungency:.2f}%)**: Add {market_oil_to_add_mt:.2f} MT of Market Oil to optimize. Est. daily profit opportunity: ₹ {format_indian(profit)}."
-    else: pungency_recommendation = f"✅ **Pungency Compliant ({initial_blend_pungency:.2f}%)**: No action needed."
-    final_oil_blend_mt = kachi_ghani_oil_produced_mt + exp_oil_used_in_blend_mt + market_oil_to_add_mt
-    water_added_mt, salt_added_mt = seed_input_mt*(water_added_pct/100), seed_input_mt*(salt_added_pct/100)
-    enhanced_moc_mt = (seed_input_mt * moc_base_yield) + water_added_mt + salt_added_mt
-    daily_revenue_oil_blend, daily_revenue_expeller_separate, daily_revenue_moc = final_oil_blend_mt*oil_blend_sell_price, exp_oil_sold_separately_mt*expeller_oil_sell_price, enhanced_moc_mt*moc_sell_price
-    daily_total_revenue = daily_revenue_oil_blend + daily_revenue_expeller_separate + daily_revenue_moc
-    cost_seed = seed_input_mt * seed_purchase_price
-    cost_market_oil = market_oil_to_add_mt * market_bought_oil_price
-    cost_moc_enhancement = (water_added_mt*1000*water_cost_per_kg) + (salt_added_mt*1000*salt_cost_per_kg)
-    daily_cogs = cost_seed + cost_market_oil + cost_moc_enhancement
-    daily_gm = daily_total_revenue - daily_cogs
-    daily_processing_cost = seed_input_mt * processing_cost_per_mt
-    daily_cm = daily_gm - daily_processing_cost
-    daily_variable_cost = seed_input_mt * other_variable_costs_per_mt
-    daily_ebitda = daily_cm - daily_variable_cost - other_expenses_daily
-    monthly_seed_consumption = seed_input_mt * production_days_per_month
-    rm_hoarded_value, rm_safety_stock_value = monthly_seed_consumption*rm_hoard_months*hoarded_rm_rate, seed_input_mt*rm_safety_stock_days*seed_purchase_price
-    inventory_rm = rm_hoarded_value + rm_safety_stock_value
-    total_daily_oil_revenue, total_daily_oil_qty = daily_revenue_oil_blend+daily_revenue_expeller_separate, final_oil_blend_mt+exp_oil_sold_separately_mt
-    avg_oil_price = total_daily_oil_revenue/total_daily_oil_qty if total_daily_oil_qty > 0 else 0
-    fg_oil_inventory_value, fg_moc_inventory_value = total_daily_oil_qty*avg_oil_price*fg_oil_safety_days, enhanced_moc_mt*moc_sell_price*fg_moc_safety_days
-    inventory_fg = fg_oil_inventory_value + fg_moc_inventory_value
-    total_inventory = inventory_rm + inventory_fg
-    debtors_oil, debtors_moc = total_daily_oil_revenue*oil_debtor_days, daily_revenue_moc*moc_debtor_days
-    total_debtors, trade_creditors = debtors_oil + debtors_moc, seed_input_mt*seed_purchase_price*creditor_days
-    financed_rm_hoard_value = rm_hoarded_value*(rm_hoard_financed_pct/100)
-    gross_wc = total_inventory + total_debtors - trade_creditors
-    net_wc_requirement = gross_wc - financed_rm_hoard_value
-    annual_production_days = production_days_per_month * 12
-    annual_ebitda = daily_ebitda * annual_production_days
-    
-    # --- CORRECTED Interest Calculation to prevent double-counting ---
-    debt_funded_capex = capex * (1 - equity_in_capex_pct/100)
-    main_capital_to_finance = debt_funded_capex + net_wc_requirement
-    interest_on_main_capital = main_capital_to_finance * (main_financing_rate_pa/100)
-    interest_on_hoard = financed_rm_hoard_value * (warehouse_finance_rate_pa/100)
-    annual_interest = interest_on_main_capital + interest_on_hoard
-    
-    annual_depreciation = capex/depreciation_years if depreciation_years > 0 else 0
-    annual_ebit = annual_ebitda - annual_depreciation
-    annual_pbt = annual_ebit - annual_interest
-    annual_tax = max(0, annual_pbt * (tax_rate_pct/100))
-    annual_pat = annual_pbt - annual_tax
-    
-    # --- VERIFIED ROCE & ROE Calculation ---
-    capital_employed = capex + net_wc_requirement + other_assets
-    roce_pat = (annual_pat / capital_employed) * 100 if capital_employed != 0 else 0
-    roce_ebit = (annual_ebit / capital_employed) * 100 if capital_employed != 0 else 0
-    
-    equity_funded_capex = capex * (equity_in_capex_pct/100)
-    shareholders_equity = equity_funded_capex + net_wc_requirement + other_assets
-    roe = (annual_pat / shareholders_equity) * 100 if shareholders_equity > 0 else 0
-    
-    moc_consumed_inhouse_mt = enhanced_moc_mt*(moc_consumed_perc/100)
-    daily_solvex_saving = sum([moc_consumed_inhouse_mt*logistics_saved_per_ton, labor_saved_nos*labor_cost_per_head_daily, moc_consumed_inhouse_mt*brokerage_saved_per_ton])
-    annual_solvex_saving = daily_solvex_saving * annual_production_days
-    annual_pat_with_synergy = annual_pat + annual_solvex_saving
-    annual_ebit_with_synergy = annual_ebit + annual_solvex_saving
-    roce_pat_with_synergy = (annual_pat_with_synergy / capital_employed) * 100 if capital_employed != 0 else 0
-    roce_ebit_with_synergy = (annual_ebit_with_synergy / capital_employed) * 100 if capital_employed != 0 else 0
-    roe_with_synergy = (annual_pat_with_synergy / shareholders_equity) * 100 if shareholders_equity > 0 else 0
-
-    return {
-        "seed_input_mt": seed_input_mt, "pungency_recommendation": pungency_recommendation, "final_oil_blend_mt": final_oil_blend_mt,
-        "exp_oil_sold_separately_mt": exp_oil_sold_separately_mt, "enhanced_moc_mt": enhanced_moc_mt,
-        "daily_total_revenue": daily_total_revenue, "daily_gm": daily_gm, "daily_cm": daily_cm, "daily_ebitda": daily_ebitda,
-        "daily_cogs": daily_cogs, "daily_processing_cost": daily_processing_cost, "daily_variable_cost": daily_variable_cost, "daily_other_expenses": other_expenses_daily,
-        "production_days_per_month": production_days_per_month, "annual_production_days": annual_production_days,
-        "annual_interest": annual_interest, "annual_depreciation": annual_depreciation, "tax_rate_pct": tax_rate_pct, "annual_ebit": annual_ebit,
-        "total_inventory": total_inventory, "total_debtors": total_debtors, "trade_creditors": trade_creditors,
-        "financed_rm_hoard_value": financed_rm_hoard_value, "net_wc_requirement": net_wc_requirement, "capex": capex,
-        "roce_pat": roce_pat, "roce_ebit": roce_ebit, "roe": roe,
-        "roce_pat_with_synergy": roce_pat_with_synergy, "roce_ebit_with_synergy": roce_ebit_with_synergy, "roe_with_synergy": roe_with_synergy,
-        "daily_solvex_saving": daily_solvex_saving,
-        "market_oil_to_add_mt": market_oil_to_add_mt, "water_added_mt": water_added_mt, "salt_added_mt": salt_added_mt,
-        "cost_seed": cost_seed, "cost_market_oil": cost_market_oil, "cost_moc_enhancement": cost_moc_enhancement,
-        "interest_on_hoard": interest_on_hoard, "interest_on_main_capital": interest_on_main_capital, "main_capital_to_finance": main_capital_to_finance,
-        "inventory_rm": inventory_rm, "inventory_fg": inventory_fg
-    }
-
-# --- Collect Inputs & Run Calculation Engine ---
-all_inputs = {k: v for k, v in locals().items() if isinstance(v, (int, float, str)) and not k.startswith('_')}
+        moc_consumed_perc = st.slider("% of MOC Consumed In-House", 0, 100, key="moc_consumed_perc")
+        logistics_saved_per_ton = st.number_input("Logistics Saved (₹/Ton of MOC)", key="logistics_saved_per_ton")
+        labor_saved_nos = st.number_input("Labor Headcount Saved (Daily)", key="labor_saved_nos")
+        labor_cost_per_head_daily = st.number_input("Cost per Labor Head (₹/Day)", key="labor_cost_per_head_daily")
+        brokerage_saved_per_ton = st.number_input("Brokerage Saved (₹/Ton of MOC)", key="brokerage_saved_per_ton")
+
+# --- Collect Inputs & Run Calculation Engine (bounded LRU shared by all sessions; misses recompute only dirty nodes) ---
+engine_inputs = EngineInputs.from_mapping(locals())
+trace.lap("inputs")
+if "metrics_graph" not in st.session_state: st.session_state.metrics_graph = MetricsGraph(engine_inputs)
 with st.spinner("Calculating results..."):
-    metrics = calculate_all_metrics(all_inputs)
+    metrics = shared_cache().get(engine_inputs, compute=lambda p: st.session_state.metrics_graph.update(**p.as_dict()).metrics(), trace=trace)
+trace.lap("engine")
 
 # --- Main Dashboard Display ---
 st.subheader("Pungency Compliance")
@@ -185,129 +147,516 @@ if "🔴" in metrics["pungency_recommendation"]: st.warning(metrics["pungency_re
 elif "🟢" in metrics["pungency_recommendation"]: st.success(metrics["pungency_recommendation"])
 else: st.info(metrics["pungency_recommendation"])
 st.divider()
+trace.lap("compliance")
 
-st.subheader("Financial & Operational Analysis")
-selected_tab = st.radio("Select View:", options=["📊 Daily View", "📅 Monthly View", "🗓️ Annual View"], key='active_tab', horizontal=True, label_visibility="collapsed")
-
-def display_pnl(period_multiplier, period_name):
-    # --- DEFINITIVE FIX for UnboundLocalError: All calculations are done *before* any display logic ---
-    total_revenue_for_period = metrics['daily_total_revenue'] * period_multiplier
-    gm = metrics['daily_gm'] * period_multiplier
-    cm = metrics['daily_cm'] * period_multiplier
-    ebitda = metrics['daily_ebitda'] * period_multiplier
-    daily_dep = metrics['annual_depreciation'] / metrics['annual_production_days'] if metrics['annual_production_days'] > 0 else 0
-    depreciation_for_period = daily_dep * period_multiplier
-    daily_int = metrics['annual_interest'] / metrics['annual_production_days'] if metrics['annual_production_days'] > 0 else 0
-    interest_for_period = daily_int * period_multiplier
-    ebit_for_period = ebitda - depreciation_for_period
-    pbt = ebit_for_period - interest_for_period
-    tax = max(0, pbt * (metrics['tax_rate_pct']/100))
-    pat = pbt - tax
-    interest_on_main_capital_period = metrics['interest_on_main_capital'] / metrics['annual_production_days'] * period_multiplier if metrics['annual_production_days'] > 0 else 0
-    interest_on_hoard_period = metrics['interest_on_hoard'] / metrics['annual_production_days'] * period_multiplier if metrics['annual_production_days'] > 0 else 0
-
-    # --- Display Logic: Uses pre-calculated variables and unique column names ---
-    st.markdown(f"##### Production & Revenue ({period_name})")
-    rev_c1, rev_c2, rev_c3, rev_c4 = st.columns(4)
-    rev_c1.markdown(f"**Total Seed Input:**<br> <p style='font-size: 20px;'>{format_indian(metrics['seed_input_mt'] * period_multiplier)} MT</p>", unsafe_allow_html=True)
-    rev_c2.markdown(f"**Oil Blend:**<br> <p style='font-size: 20px;'>{format_indian(metrics['final_oil_blend_mt'] * period_multiplier)} MT</p>", unsafe_allow_html=True)
-    rev_c3.markdown(f"**Enhanced MoC:**<br> <p style='font-size: 20px;'>{format_indian(metrics['enhanced_moc_mt'] * period_multiplier)} MT</p>", unsafe_allow_html=True)
-    rev_c4.markdown(f"**Total Revenue:**<br> <p style='font-size: 20px;'>₹ {format_indian(total_revenue_for_period)}</p>", unsafe_allow_html=True)
-    st.markdown("---")
-    
-    st.markdown(f"##### Cost of Goods Sold (COGS) Breakdown ({period_name})")
-    cogs_c1, cogs_c2 = st.columns(2)
-    with cogs_c1:
-        st.markdown("**Component Quantities**")
-        st.markdown(f"- Seed Consumed: {format_indian(metrics['seed_input_mt'] * period_multiplier)} MT")
-        st.markdown(f"- Market Oil Added: {format_indian(metrics['market_oil_to_add_mt'] * period_multiplier)} MT")
-        st.markdown(f"- Water Added: {format_indian(metrics['water_added_mt'] * period_multiplier)} MT")
-        st.markdown(f"- Salt Added: {format_indian(metrics['salt_added_mt'] * period_multiplier)} MT")
-    with cogs_c2:
-        st.markdown("**Component Values**")
-        st.markdown(f"- Seed Cost: ₹ {format_indian(metrics['cost_seed'] * period_multiplier)}")
-        st.markdown(f"- Market Oil Cost: ₹ {format_indian(metrics['cost_market_oil'] * period_multiplier)}")
-        st.markdown(f"- MoC Enhancement Cost: ₹ {format_indian(metrics['cost_moc_enhancement'] * period_multiplier)}")
-        st.markdown(f"**Total COGS: ₹ {format_indian(metrics['daily_cogs'] * period_multiplier)}**")
-    st.markdown("---")
-
-    st.markdown(f"##### Full Margin Analysis ({period_name})")
-    margin_c1, margin_c2 = st.columns(2)
-    with margin_c1:
-        st.markdown(f"**Gross Margin (GM):** <br>₹ {format_indian(gm)} `({(gm/total_revenue_for_period*100 if total_revenue_for_period > 0 else 0):.1f}%)`", unsafe_allow_html=True)
-        st.markdown(f"**Contribution Margin (CM):** ❓<br>₹ {format_indian(cm)} `({(cm/total_revenue_for_period*100 if total_revenue_for_period > 0 else 0):.1f}%)`", unsafe_allow_html=True, help=f"CM = GM - Processing Cost (₹ {format_indian(metrics['daily_processing_cost']*period_multiplier)})")
-        st.markdown(f"**EBITDA:** ❓<br>₹ {format_indian(ebitda)} `({(ebitda/total_revenue_for_period*100 if total_revenue_for_period > 0 else 0):.1f}%)`", unsafe_allow_html=True, help=f"EBITDA = CM - Other Var. Costs (₹ {format_indian(metrics['daily_variable_cost']*period_multiplier)}) - Other Fixed Exp. (₹ {format_indian(metrics['daily_other_expenses']*period_multiplier)})")
-    with margin_c2:
-        st.markdown(f"**Depreciation:**<br>₹ {format_indian(depreciation_for_period)}", unsafe_allow_html=True)
-        st.markdown(f"**EBIT (Earnings Before Interest & Tax):**<br>₹ {format_indian(ebit_for_period)}", unsafe_allow_html=True)
-        st.markdown(f"**Interest:**<br>₹ {format_indian(interest_for_period)}", unsafe_allow_html=True)
-        st.markdown(f"**Profit Before Tax (PBT):**<br>₹ {format_indian(pbt)}", unsafe_allow_html=True)
-        st.markdown(f"**Profit After Tax (PAT):**<br>₹ {format_indian(pat)}", unsafe_allow_html=True)
-    st.markdown("---")
-    
-    st.markdown(f"##### Interest Calculation Breakdown ({period_name})")
-    st.markdown(f"- **Main Capital Financed (Debt Funded Capex + Net WC):** ₹ {format_indian(metrics['main_capital_to_finance'])} -> **Interest:** ₹ {format_indian(interest_on_main_capital_period)}")
-    st.markdown(f"- **Financed RM Hoard:** ₹ {format_indian(metrics['financed_rm_hoard_value'])} -> **Interest:** ₹ {format_indian(interest_on_hoard_period)}")
-    st.markdown("---")
-
-    st.markdown(f"##### Key Financial Ratios (Annualized)")
-    roce_c1, roce_c2, roe_c1 = st.columns(3)
-    with roce_c1:
-        st.markdown("**Return on Capital Employed (ROCE)**")
-        st.metric("ROCE (EBIT Basis)", f"{metrics['roce_ebit']:.2f}%")
-        st.metric("ROCE (PAT Basis)", f"{metrics['roce_pat']:.2f}%")
-    with roce_c2:
-        st.markdown("**ROCE (with Synergy)**")
-        st.metric("ROCE (EBIT Basis)", f"{metrics['roce_ebit_with_synergy']:.2f}%")
-        st.metric("ROCE (PAT Basis)", f"{metrics['roce_pat_with_synergy']:.2f}%")
-    with roe_c1:
-        st.markdown("**Return on Equity (ROE)**")
-        st.metric("Standard ROE", f"{metrics['roe']:.2f}%")
-        st.metric("ROE (with Synergy)", f"{metrics['roe_with_synergy']:.2f}%")
-
-
-if selected_tab == "📊 Daily View": display_pnl(1, "Daily")
-elif selected_tab == "📅 Monthly View": display_pnl(metrics['production_days_per_month'], "Monthly")
-elif selected_tab == "🗓️ Annual View": display_pnl(metrics['annual_production_days'], "Annual")
+# --- Fragments: widgets inside a section rerun only that section, not the sidebar + engine above ---
+def panel(label, key, expanded=False):
+    """Expander that tracks whether it is open (`.open`), so a panel skips its work while collapsed and a sidebar change
+    does not pay for it. Opening or closing it reruns only the panel's fragment."""
+    return st.expander(label, expanded=expanded, key=f"panel_{key}", on_change="rerun")
 
-st.divider()
+VIEW_PERIODS = {"📊 Daily View": "Daily", "📅 Monthly View": "Monthly", "🗓️ Annual View": "Annual"}
+
+@fragment
+def pnl_view(metrics):
+    st.subheader("Financial & Operational Analysis")
+    selected_tab = st.radio("Select View:", options=list(VIEW_PERIODS), key='active_tab', horizontal=True, label_visibility="collapsed")
+    # All three periods are rendered together (and cached per metrics result); each view is a single element.
+    with trace.span("pnl_render"): view = pnl_views(metrics)[VIEW_PERIODS[selected_tab]]
+    st.markdown(view, unsafe_allow_html=True)
+
+@fragment
+def wc_synergy_panel(metrics):
+    wc_col, savings_col = st.columns(2)
+    with wc_col:
+        st.subheader("Working Capital & Capex Breakdown")
+        wc_c1, wc_c2, wc_c3 = st.columns(3)
+        wc_c1.markdown(f"**Total Inventory:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['total_inventory'])}</p>", unsafe_allow_html=True)
+        wc_c2.markdown(f"**Total Debtors:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['total_debtors'])}</p>", unsafe_allow_html=True)
+        wc_c3.markdown(f"**Trade Creditors:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['trade_creditors'])}</p>", unsafe_allow_html=True)
+        st.markdown("---")
+        inv_c1, inv_c2 = st.columns(2)
+        inv_c1.markdown(f"**Raw Material Inventory:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['inventory_rm'])}</p>", unsafe_allow_html=True)
+        inv_c2.markdown(f"**Finished Goods Stock:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['inventory_fg'])}</p>", unsafe_allow_html=True)
+        st.markdown(f"**Financed Inventory (Credit):**<br><p style='font-size: 20px; color: #FF4B4B;'>₹ {format_indian(metrics['financed_rm_hoard_value'])}</p>", unsafe_allow_html=True, help="This is treated as a credit, reducing your net WC requirement.")
+        st.markdown(f"**Net WC Requirement:**<br><p style='font-size: 24px; font-weight: bold;'>₹ {format_indian(metrics['net_wc_requirement'])}</p>", unsafe_allow_html=True)
+        st.markdown(f"**Capex:**<br><p style='font-size: 24px; font-weight: bold;'>₹ {format_indian(metrics['capex'])}</p>", unsafe_allow_html=True)
+    with savings_col:
+        st.subheader("🏭 Solvex Plant Synergy")
+        st.metric("Total Daily Savings", f"₹ {format_indian(metrics['daily_solvex_saving'])}")
+        st.metric("Total Monthly Savings", f"₹ {format_indian(metrics['daily_solvex_saving'] * metrics['production_days_per_month'])}")
+
+TORNADO_METRICS = {"Annual PAT (₹)": "annual_pat", "ROCE (EBIT Basis, %)": "roce_ebit", "ROCE (PAT Basis, %)": "roce_pat", "ROE (%)": "roe"}
+
+@fragment
+def sensitivity_panel(engine_inputs):
+    with panel("🌪️ Sensitivity Analysis", "sensitivity", expanded=True) as section:
+        if not section.open: return
+        metric_col, mode_col, flex_col, top_col = st.columns(4)
+        metric_label = metric_col.selectbox("Metric", list(TORNADO_METRICS), key="tornado_metric")
+        mode = mode_col.radio("Flex", ["± %", "Slider range"], key="tornado_mode", horizontal=True, help="Slider range flexes slider inputs across their full sidebar range; other inputs use ± %.")
+        pct = flex_col.slider("Flex (± %)", 1, 50, 10, key="tornado_pct")
+        top = top_col.slider("Inputs shown", 5, 39, 15, key="tornado_top")
+        # One batched engine call for every input's low and high case, cached per base scenario and flex.
+        result = tornado(engine_inputs, pct, "range" if mode == "Slider range" else "pct")
+        metric = TORNADO_METRICS[metric_label]
+        base, bars = result.base[metric], result.bars[metric][:top][::-1]  # plotly draws the first row at the bottom
+        rows = {"Input": [], "Change": [], "Case": [], "Input value": []}
+        for bar in bars:
+            for case, value, flexed in (("Low", bar.low, bar.low_input), ("High", bar.high, bar.high_input)):
+                rows["Input"].append(INPUT_LABELS[bar.name]); rows["Change"].append(value - base)
+                rows["Case"].append(case); rows["Input value"].append(flexed)
+        fig = px.bar(rows, x="Change", y="Input", color="Case", orientation="h", barmode="overlay", hover_data=["Input value"],
+                     color_discrete_map={"Low": "#FF4B4B", "High": "#2E8B57"}, height=max(320, 28 * len(bars)))
+        base_text = f"₹ {format_indian(base)}" if metric == "annual_pat" else f"{base:.2f}%"
+        fig.update_layout(xaxis_title=f"Change in {metric_label} vs base ({base_text})", yaxis_title=None, legend_title=None)
+        st.plotly_chart(fig, key="tornado_chart")
+        # Exact marginal effects from one forward-mode AD pass (no perturb-and-rerun).
+        jac = jacobian(engine_inputs, outputs=[metric], wrt=("seed_purchase_price", "oil_blend_sell_price"))
+        unit = (lambda v: f"₹ {format_indian(v)}") if metric == "annual_pat" else (lambda v: f"{v:+.2f} pp")
+        st.caption(f"Marginal effect on {metric_label}: every ₹1,000/MT on seed price moves it by {unit(jac.partial(metric, 'seed_purchase_price') * 1000)}; "
+                   f"every ₹1,000/MT on oil blend price by {unit(jac.partial(metric, 'oil_blend_sell_price') * 1000)}."
+                   + (" ⚠️ The base case sits on a kink (a clamp or pungency branch switches here), so these are one-sided." if jac.kinks else ""))
+
+HEATMAP_PRESETS = {"Seed price × Oil blend price": ("seed_purchase_price", "oil_blend_sell_price"),
+                   "Kachi Ghani yield × pungency": ("kachi_ghani_yield_pct", "kachi_ghani_pungency"),
+                   "Custom": None}
+
+def heatmap_range(name, base_value, axis):
+    """Range slider for one heatmap axis: the sidebar bounds where they exist, else 0.5x .. 1.5x the base value."""
+    lo, hi = INPUT_BOUNDS.get(name, (None, None))
+    span = abs(base_value) or 1.0
+    lo, hi = float(base_value - span / 2 if lo is None else lo), float(base_value + span / 2 if hi is None else hi)
+    default = (max(lo, base_value - 0.2 * span), min(hi, base_value + 0.2 * span))
+    if default[0] >= default[1]: default = (lo, hi)
+    # Keyed by the base value so a new sidebar scenario re-centres the view.
+    return st.slider(f"{INPUT_LABELS[name]} range", lo, hi, default, key=f"heatmap_{axis}_{name}_{base_value}")
+
+@fragment
+def heatmap_panel(engine_inputs):
+    with panel("🗺️ Price Heatmaps", "heatmap") as section:
+        if not section.open: return
+        c1, c2, c3 = st.columns(3)
+        preset = c1.selectbox("Axes", list(HEATMAP_PRESETS), key="heatmap_preset")
+        metric_label = c2.selectbox("Metric", list(TORNADO_METRICS), key="heatmap_metric")
+        resolution = c3.slider("Resolution (points per axis)", 50, 500, 250, step=50, key="heatmap_resolution")
+        if HEATMAP_PRESETS[preset] is None:
+            x_name = c1.selectbox("X axis", list(INPUT_LABELS), format_func=INPUT_LABELS.get, key="heatmap_x")
+            y_name = c2.selectbox("Y axis", [n for n in INPUT_LABELS if n != x_name], format_func=INPUT_LABELS.get, key="heatmap_y")
+        else: x_name, y_name = HEATMAP_PRESETS[preset]
+        r1, r2 = st.columns(2)
+        with r1: x_range = heatmap_range(x_name, getattr(engine_inputs, x_name), "x")
+        with r2: y_range = heatmap_range(y_name, getattr(engine_inputs, y_name), "y")
+        exact = st.toggle("Exact (evaluate every point)", key="heatmap_exact", help="Off: a coarse grid is interpolated and only tiles the zero-PAT line or a pungency switch runs through are evaluated exactly.")
+        # Lattice tiles are cached across sessions, so panning, zooming and switching metrics reuse earlier work.
+        result = shared_grid_cache().heatmap(engine_inputs, x_name, x_range, y_name, y_range, resolution=resolution, adaptive=not exact)
+        metric = TORNADO_METRICS[metric_label]
+        fig = px.imshow(result.values[metric], x=result.x, y=result.y, origin="lower", aspect="auto", color_continuous_scale="RdYlGn",
+                        color_continuous_midpoint=0 if metric == "annual_pat" else None, labels={"x": INPUT_LABELS[x_name], "y": INPUT_LABELS[y_name], "color": metric_label})
+        fig.add_trace(go.Contour(z=result.values["annual_pat"], x=result.x, y=result.y, contours=dict(start=0, end=0, coloring="lines"),
+                                 line=dict(color="black", width=2), showscale=False, hoverinfo="skip", name="Zero PAT"))
+        fig.add_trace(go.Scatter(x=[getattr(engine_inputs, x_name)], y=[getattr(engine_inputs, y_name)], mode="markers", name="Current",
+                                 marker=dict(symbol="x", size=12, color="black")))
+        fig.update_layout(height=520, showlegend=False)
+        st.plotly_chart(fig, key="heatmap_chart")
+        st.caption(f"{len(result.x)} × {len(result.y)} points; the black line is zero annual PAT and ✕ marks the current inputs. "
+                   f"{result.evaluated:,} engine evaluations for this view.")
+
+@fragment
+def price_history_panel(engine_inputs):
+    with panel("📅 Price History", "price_history") as section:
+        if not section.open: return
+        store = shared_price_store()
+        upload = st.file_uploader("Add prices (CSV with date, market and any of seed, oil, moc in ₹/MT)", type="csv", key="price_upload")
+        if upload is not None and st.session_state.get("price_upload_done") != upload.file_id:
+            counts = store.ingest_csv(upload)
+            st.session_state.price_upload_done = upload.file_id
+            st.success(f"Stored {sum(counts.values()):,} days across {len(counts)} market(s).")
+        markets = store.markets()
+        if not markets:
+            st.info("No price history yet. Upload a CSV above; each market's prices are then replayed through the engine, one scenario per day.")
+            return
+        c1, c2, c3 = st.columns(3)
+        market = c1.selectbox("Market", markets, key="price_market")
+        first, last = (d.item() for d in store.date_range(market))
+        span = c2.date_input("Dates", (max(first, last - datetime.timedelta(days=365)), last), first, last, key=f"price_dates_{market}")
+        metric_label = c3.selectbox("Metric", list(TORNADO_METRICS), key="price_metric")
+        if len(span) != 2: return
+        # Memory-mapped columns: the range query is a binary search and a slice; no CSV is re-read.
+        history = store.series(market, *span)
+        if not len(history.dates):
+            st.warning("No prices in that range.")
+            return
+        metric = TORNADO_METRICS[metric_label]
+        values = calculate_metrics_batch(history.as_inputs(engine_inputs))[metric]
+        fig = px.line(x=history.dates, y=values, labels={"x": "Date", "y": metric_label}, height=360)
+        fig.add_hline(y=0, line_dash="dot", line_color="grey")
+        st.plotly_chart(fig, key="price_history_chart")
+        fmt = (lambda v: f"₹ {format_indian(v)}") if metric == "annual_pat" else (lambda v: f"{v:.2f}%")
+        st.caption(f"{len(history.dates):,} days at {market}, other inputs from the sidebar (price gaps carried forward). "
+                   f"Median {fmt(np.median(values))}, worst {fmt(values.min())}; loss-making on {(values < 0).mean():.0%} of days.")
+
+PROJECTION_LINES = {"Revenue": "revenue", "EBITDA": "ebitda", "Depreciation": "depreciation", "Interest": "interest", "PBT": "pbt",
+                    "Tax": "tax", "PAT": "pat", "Net WC (year end)": "working_capital", "Capex Debt (year end)": "debt_balance",
+                    "CFADS": "cfads", "Debt Service": "debt_service", "Project Cash Flow": "project_cash_flow", "Equity Cash Flow": "equity_cash_flow"}
+
+@fragment
+def projection_panel(engine_inputs):
+    with panel("📈 Multi-Year Projection", "projection") as section:
+        if not section.open: return
+        c1, c2, c3, c4 = st.columns(4)
+        years = c1.slider("Horizon (years)", 5, 20, 10, key="projection_years")
+        resolution = c2.radio("Resolution", ["Monthly", "Daily"], key="projection_resolution", horizontal=True)
+        ramp_months = c3.number_input("Ramp-up (months)", 0, 60, 6, key="projection_ramp_months")
+        ramp_start = c4.slider("Ramp-up Start (% of capacity)", 0, 100, 50, key="projection_ramp_start")
+        tenor = c1.slider("Capex Debt Tenor (years)", 1, 20, 7, key="projection_tenor")
+        amortization = c2.radio("Repayment", ["Straight", "Annuity"], key="projection_amortization", horizontal=True)
+        discount = c3.number_input("Discount Rate (% p.a.)", 0.0, 50.0, 12.0, key="projection_discount")
+        seed_growth = c4.number_input("Seed Price Escalation (% p.a.)", -20.0, 20.0, 0.0, key="projection_seed_growth")
+        oil_growth = c1.number_input("Oil & MoC Price Escalation (% p.a.)", -20.0, 20.0, 0.0, key="projection_oil_growth")
+        steps = np.arange(years)
+        oil_curve = (1 + oil_growth / 100) ** steps
+        curves = {"seed_purchase_price": (1 + seed_growth / 100) ** steps, "hoarded_rm_rate": (1 + seed_growth / 100) ** steps,
+                  "oil_blend_sell_price": oil_curve, "expeller_oil_sell_price": oil_curve, "market_bought_oil_price": oil_curve, "moc_sell_price": oil_curve}
+        proj = project(engine_inputs, years, resolution.lower(), curves, ramp_months, ramp_start, tenor, amortization.lower(), discount)
+        pct = lambda v: "n/a" if np.isnan(v) else f"{v:.1%}"
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Project IRR", pct(proj.project_irr[0]))
+        m2.metric("Equity IRR", pct(proj.equity_irr[0]))
+        m3.metric(f"Project NPV @ {discount:g}%", f"₹ {format_indian(proj.project_npv[0])}")
+        m4.metric("Minimum DSCR", "no debt" if np.isnan(proj.min_dscr[0]) else f"{proj.min_dscr[0]:.2f}x")
+        cash = {"Year": np.tile(np.arange(years + 1), 2), "Cash Flow": np.concatenate([proj.annual["project_cash_flow"][0], proj.annual["equity_cash_flow"][0]]),
+                "Basis": ["Project"] * (years + 1) + ["Equity"] * (years + 1)}
+        fig = px.bar(cash, x="Year", y="Cash Flow", color="Basis", barmode="group", height=360)
+        fig.update_layout(yaxis_title="Cash Flow (₹)", legend_title=None)
+        st.plotly_chart(fig, key="projection_chart")
+        rows = np.array([proj.annual[line][0] for line in PROJECTION_LINES.values()])
+        table = {"Line": list(PROJECTION_LINES), **{f"Y{year}": format_indian_array(rows[:, year], unit="crore") for year in range(years + 1)}}
+        st.dataframe(table, hide_index=True)
+        st.caption("Year 0 is the capex date. Net WC is funded by the main facility and the financed hoard by the warehouse loan (as on the "
+                   "dashboard), drawn and repaid as WC moves and released at the horizon; tax losses carry forward.")
+
+PORTFOLIO_COLUMNS = ("seed_input_mt", "seed_purchase_price", "oil_blend_sell_price", "capex", "equity_in_capex_pct")
+PORTFOLIO_SIZES = (1.0, 0.6, 1.4)  # starter plants, as multiples of the sidebar's daily seed input
 
-wc_col, savings_col = st.columns(2)
-with wc_col:
-    st.subheader("Working Capital & Capex Breakdown")
-    wc_c1, wc_c2, wc_c3 = st.columns(3)
-    wc_c1.markdown(f"**Total Inventory:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['total_inventory'])}</p>", unsafe_allow_html=True)
-    wc_c2.markdown(f"**Total Debtors:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['total_debtors'])}</p>", unsafe_allow_html=True)
-    wc_c3.markdown(f"**Trade Creditors:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['trade_creditors'])}</p>", unsafe_allow_html=True)
-    st.markdown("---")
-    inv_c1, inv_c2 = st.columns(2)
-    inv_c1.markdown(f"**Raw Material Inventory:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['inventory_rm'])}</p>", unsafe_allow_html=True)
-    inv_c2.markdown(f"**Finished Goods Stock:**<br><p style='font-size: 20px;'>₹ {format_indian(metrics['inventory_fg'])}</p>", unsafe_allow_html=True)
-    st.markdown(f"**Financed Inventory (Credit):**<br><p style='font-size: 20px; color: #FF4B4B;'>₹ {format_indian(metrics['financed_rm_hoard_value'])}</p>", unsafe_allow_html=True, help="This is treated as a credit, reducing your net WC requirement.")
-    st.markdown(f"**Net WC Requirement:**<br><p style='font-size: 24px; font-weight: bold;'>₹ {format_indian(metrics['net_wc_requirement'])}</p>", unsafe_allow_html=True)
-    st.markdown(f"**Capex:**<br><p style='font-size: 24px; font-weight: bold;'>₹ {format_indian(metrics['capex'])}</p>", unsafe_allow_html=True)
-with savings_col:
-    st.subheader("🏭 Solvex Plant Synergy")
-    st.metric("Total Daily Savings", f"₹ {format_indian(metrics['daily_solvex_saving'])}")
-    st.metric("Total Monthly Savings", f"₹ {format_indian(metrics['daily_solvex_saving'] * metrics['production_days_per_month'])}")
-
-with st.expander("ℹ️ Click here to see key calculation logic"):
-    st.markdown("""
-    - **Cost of Goods Sold (COGS):** `COGS = Seed Cost + Market Oil Cost + MoC Enhancement Cost`
-    - **Net Working Capital Requirement:** `Net WC = (Total Inventory + Total Debtors - Trade Creditors) - Financed Inventory`
-    - **Interest Calculation (No Double-Counting):** 
-      - `Debt Funded Capex = Capex * (1 - Equity %)`
-      - `Main Capital to Finance = Debt Funded Capex + Net WC Requirement`
-      - `Interest on Main Capital = Main Capital to Finance * Main Financing Rate`
-      - `Interest on Hoard = Financed RM Value * Warehouse Finance Rate`
-      - `Total Annual Interest` is the sum of these two main components.
-    - **Return on Capital Employed (ROCE):** Measures operational efficiency. `EBIT = EBITDA - Depreciation`.
-      - `Capital Employed = Capex + Net WC Requirement + Other Assets`
-      - `Standard ROCE (EBIT Basis) = Annual EBIT / Capital Employed`
-    - **Return on Equity (ROE):** Measures return to shareholders.
-      - `Shareholder's Equity = (Capex * Equity %) + Net WC Requirement + Other Assets`
-      - `Standard ROE = Annual PAT / Shareholder's Equity`
-    - **Synergy Impact:** `ROCE/ROE with Synergy` adds the `Annual Solvex Savings` to the numerator (EBIT or PAT).
-    """)
+@fragment
+def portfolio_panel(engine_inputs):
+    with panel("🏭 Multi-Plant Portfolio", "portfolio") as section:
+        if not section.open: return
+        st.caption("Each row is a plant; columns not shown take the sidebar's values. Add, remove or edit rows.")
+        starter = {"Plant": [f"Plant {i + 1}" for i in range(len(PORTFOLIO_SIZES))],
+                   **{INPUT_LABELS[name]: [getattr(engine_inputs, name) * (k if name == "seed_input_mt" else 1) for k in PORTFOLIO_SIZES] for name in PORTFOLIO_COLUMNS}}
+        table = st.data_editor(starter, num_rows="dynamic", key="portfolio_editor", hide_index=True)
+        names = [str(name) for name in table["Plant"]]
+        edited = {name: np.nan_to_num(np.asarray(table[INPUT_LABELS[name]], dtype=np.float64), nan=getattr(engine_inputs, name)) for name in PORTFOLIO_COLUMNS}
+        if not names:
+            st.info("Add a plant to see the consolidated view.")
+            return
+        c1, c2, c3 = st.columns(3)
+        pooled = c1.toggle("Pool safety stocks across plants", key="portfolio_pooled")
+        correlation = c2.slider("Demand correlation between plants", 0.0, 1.0, 0.5, 0.05, key="portfolio_correlation", disabled=not pooled)
+        shared = c3.number_input("Shared warehouse facility rate (% p.a., 0 = none)", 0.0, 25.0, 0.0, key="portfolio_warehouse")
+        # Same plants and sidebar as last run: rerun the engine only for the rows that changed.
+        book = st.session_state.get("portfolio_book")
+        if book is None or book.names != names or st.session_state.get("portfolio_base") != engine_inputs:
+            book = Portfolio({**engine_inputs.as_dict(), **edited}, names=names)
+            st.session_state.portfolio_book, st.session_state.portfolio_base = book, engine_inputs
+        else:
+            for i in np.flatnonzero(np.any([book.inputs[name] != edited[name] for name in PORTFOLIO_COLUMNS], axis=0)):
+                book.update(int(i), **{name: edited[name][i] for name in PORTFOLIO_COLUMNS})
+        book.pooled_safety_stock, book.demand_correlation, book.warehouse_rate_pa = pooled, correlation, shared or None
+        group = book.consolidated()
+        m1, m2, m3, m4, m5 = st.columns(5)
+        m1.metric("Group Revenue", f"₹ {format_indian(group.revenue)}")
+        m2.metric("Group EBITDA", f"₹ {format_indian(group.ebitda)}")
+        m3.metric("Group Net WC", f"₹ {format_indian(group.net_wc_requirement)}")
+        m4.metric("Group Interest", f"₹ {format_indian(group.interest)}")
+        m5.metric("Group ROCE (PAT)", f"{group.roce_pat:.2f}%")
+        lines = book.plant_lines()
+        money = ("revenue", "ebitda", "interest", "pat", "net_wc_requirement", "capital_employed")
+        st.dataframe({"Plant": names, **{line.replace("_", " ").title(): format_indian_array(lines[line], unit="crore") for line in money},
+                      "ROCE (PAT, %)": np.round(lines["roce_pat"], 2)}, hide_index=True)
+        if pooled or shared:
+            st.caption(f"Group effects: pooled safety stock frees ₹ {format_indian(group.safety_stock_saving)} of working capital; "
+                       f"the shared warehouse facility saves ₹ {format_indian(group.warehouse_interest_saving)} of interest a year.")
+
+BLEND_LOTS = ((0.30, 1.25, 1.1), (0.25, 1.05, 0.8), (0.25, 0.8, 1.0), (0.20, 0.85, 1.2))  # starter lots: share of seed input; KG and expeller pungency as multiples of the sidebar's
+
+@fragment
+def blending_panel(engine_inputs):
+    with panel("🧪 Seed Lot Blending", "blending") as section:
+        if not section.open: return
+        st.caption("Each row is a seed lot crushed today; columns left blank take the sidebar's values. The optimizer chooses which oil "
+                   "goes into the blend, which is sold separately (at the expeller oil price) and how much market oil to add, for the most "
+                   "daily EBITDA with the blend at or above the pungency floor.")
+        p = engine_inputs
+        starter = {"Lot": [f"Lot {i + 1}" for i in range(len(BLEND_LOTS))],
+                   INPUT_LABELS["seed_input_mt"]: [p.seed_input_mt * share for share, _, _ in BLEND_LOTS],
+                   INPUT_LABELS["seed_purchase_price"]: [p.seed_purchase_price] * len(BLEND_LOTS),
+                   INPUT_LABELS["kachi_ghani_yield_pct"]: [p.kachi_ghani_yield_pct] * len(BLEND_LOTS),
+                   INPUT_LABELS["expeller_yield_pct"]: [p.expeller_yield_pct] * len(BLEND_LOTS),
+                   INPUT_LABELS["kachi_ghani_pungency"]: [p.kachi_ghani_pungency * kg for _, kg, _ in BLEND_LOTS],
+                   INPUT_LABELS["expeller_oil_pungency"]: [p.expeller_oil_pungency * exp for _, _, exp in BLEND_LOTS]}
+        table = st.data_editor(starter, num_rows="dynamic", key="blend_lots", hide_index=True)
+        names = [str(name) for name in table["Lot"]]
+        if not names:
+            st.info("Add a lot to optimize the blend.")
+            return
+        lots = {f: np.nan_to_num(np.asarray(table[INPUT_LABELS[f]], dtype=np.float64), nan=getattr(p, f)) for f in LOT_FIELDS}
+        c1, c2 = st.columns(2)
+        limited = c1.toggle("Limit market oil", key="blend_market_limited")
+        cap = c2.number_input("Market oil available (MT/day)", 0.0, 10000.0, 20.0, key="blend_market_cap", disabled=not limited)
+        plan = optimize_blend(lots, p, max_market_oil_mt=cap if limited else None)
+        baseline = rule_margin(lots, p)
+        m1, m2, m3, m4 = st.columns(4)
+        m1.metric("Optimized Daily EBITDA", f"₹ {format_indian(plan.daily_ebitda)}", f"₹ {format_indian(plan.daily_ebitda - baseline)} vs pooled two-stream rule")
+        m2.metric("Market Oil Added", f"{plan.market_oil_mt:,.2f} MT")
+        m3.metric("Oil Sold Separately", f"{plan.oil_sold_separately_mt:,.2f} MT")
+        m4.metric("Blend Pungency", f"{plan.blend_pungency:.4f}%")
+        st.dataframe({"Lot": names, "KG oil (MT)": np.round(plan.kachi_ghani_oil_mt, 2), "KG blended (MT)": np.round(plan.kachi_ghani_blend_mt, 2),
+                      "Expeller oil (MT)": np.round(plan.expeller_oil_mt, 2), "Expeller blended (MT)": np.round(plan.expeller_blend_mt, 2)}, hide_index=True)
+        st.caption(f"Pungency headroom is worth ₹ {format_indian(plan.shadow_price)} a day per MT of blended oil 1% point above the floor. "
+                   "The baseline pools every lot into one Kachi Ghani and one expeller stream and applies the dashboard's rule.")
+
+LIBRARY_COMPARE_LIMIT = 500  # most recent names offered in the compare view
+
+def load_scenario(name):
+    """Writes a saved scenario's inputs into the sidebar widgets. A button callback, so it runs before they are drawn."""
+    inputs, _ = shared_library().load(name)
+    for key, value in inputs.as_dict().items():
+        lo, hi = INPUT_BOUNDS.get(key, (None, None))  # scenarios saved by the CLI or server may lie outside a slider's range
+        value = min(max(value, value if lo is None else lo), value if hi is None else hi)
+        st.session_state[key] = round(value) if isinstance(st.session_state.get(key), int) else float(value)
+
+@fragment
+def library_panel(engine_inputs, metrics):
+    with panel("💾 Scenario Library", "library") as section:
+        if not section.open: return
+        library = shared_library()
+        with st.form("library_save_form", clear_on_submit=True):
+            c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+            name = c1.text_input("Save the sidebar inputs as", key="library_name")
+            if c2.form_submit_button("Save") and name.strip():
+                library.save(name.strip(), engine_inputs, metrics)  # the dashboard's results: no engine run to save them
+                st.success(f"Saved “{name.strip()}”.")
+        names = library.names(limit=LIBRARY_COMPARE_LIMIT)
+        if not names:
+            st.info("No saved scenarios yet. Identical input sets are stored once, however many names they are saved under.")
+            return
+        c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+        opened = c1.selectbox("Open a scenario in the sidebar", names, index=None, key="library_open")
+        if c2.button("Load", disabled=opened is None, key="library_load_button", on_click=load_scenario, args=(opened,)): st.rerun()  # the whole page: sidebar and engine
+        chosen = st.multiselect("Compare", names, default=names[:min(5, len(names))], key="library_compare")
+        if st.checkbox(f"Compare all {len(names):,} listed", key="library_compare_all"): chosen = names
+        if not chosen: return
+        # One bulk query for every chosen scenario; stored metrics are reused, only stale rows rerun (in one batch).
+        result = library.compare(chosen)
+        shown = result.varying or ("seed_input_mt",)
+        table = {"Scenario": result.names, **{INPUT_LABELS[k]: result.inputs[k] for k in shown},
+                 **{label: format_indian_array(result.metrics[key]) if key == "annual_pat" else np.round(result.metrics[key], 2) for label, key in TORNADO_METRICS.items()}}
+        st.dataframe(table, hide_index=True)
+        st.caption(f"{len(result.names):,} scenarios; input columns are the ones that differ between them. "
+                   f"The library holds {len(library):,} names in {library.path}.")
+        c1, c2 = st.columns([3, 1], vertical_alignment="bottom")
+        doomed = c1.selectbox("Delete a scenario", names, index=None, key="library_delete")
+        c2.button("Delete", disabled=doomed is None, key="library_delete_button", on_click=library.delete, args=(doomed,))
+
+MC_METRICS = {"annual_pat": "Annual PAT (₹)", "roce_ebit": "ROCE (EBIT Basis, %)", "roce_pat": "ROCE (PAT Basis, %)", "net_wc_requirement": "Net WC Requirement (₹)"}
+
+@fragment
+def monte_carlo_panel(engine_inputs):
+    with panel("🎲 Monte Carlo Risk Analysis", "monte_carlo") as section:
+        if not section.open: return
+        with st.form("monte_carlo"):
+            st.caption("Each input is drawn from a normal distribution around its sidebar value (clipped to the sidebar's bounds).")
+            c1, c2, c3 = st.columns(3)
+            seed_sd = c1.number_input("Seed Price Volatility (± % of price, 1σ)", 0.0, 50.0, 8.0)
+            oil_sd = c2.number_input("Oil Blend Price Volatility (± % of price, 1σ)", 0.0, 50.0, 5.0)
+            price_corr = c3.slider("Seed ↔ Oil Price Correlation", -0.95, 0.95, 0.6, step=0.05)
+            kg_yield_sd = c1.number_input("Kachi Ghani Yield σ (% points)", 0.0, 10.0, 1.0)
+            exp_yield_sd = c2.number_input("Expeller Yield σ (% points)", 0.0, 10.0, 1.0)
+            pungency_sd = c3.number_input("Kachi Ghani Pungency σ", 0.0, 0.5, 0.03, step=0.01)
+            draws = c1.selectbox("Draws", [100_000, 1_000_000, 5_000_000], index=1, format_func=lambda n: f"{n:,}")
+            seed = c2.number_input("Random Seed", min_value=0, value=42)
+            submitted = st.form_submit_button("Run Simulation")
+        if submitted:
+            p = engine_inputs
+            distributions = {
+                "seed_purchase_price": Normal(p.seed_purchase_price, p.seed_purchase_price * seed_sd / 100),
+                "oil_blend_sell_price": Normal(p.oil_blend_sell_price, p.oil_blend_sell_price * oil_sd / 100),
+                "kachi_ghani_yield_pct": Normal(p.kachi_ghani_yield_pct, kg_yield_sd),
+                "expeller_yield_pct": Normal(p.expeller_yield_pct, exp_yield_sd),
+                "kachi_ghani_pungency": Normal(p.kachi_ghani_pungency, pungency_sd),
+            }
+            with st.spinner(f"Simulating {draws:,} scenarios..."):
+                st.session_state.monte_carlo_summary = run_monte_carlo(p, distributions, {("seed_purchase_price", "oil_blend_sell_price"): price_corr}, draws=draws, seed=int(seed)).summary()
+        summary = st.session_state.get("monte_carlo_summary")
+        if summary:
+            fmt = lambda metric, v: f"₹ {format_indian(v)}" if metric in ("annual_pat", "net_wc_requirement") else f"{v:.2f}%"
+            st.table({"Metric": list(MC_METRICS.values()),
+                      "P5": [fmt(m, summary[m].p5) for m in MC_METRICS], "P50": [fmt(m, summary[m].p50) for m in MC_METRICS],
+                      "P95": [fmt(m, summary[m].p95) for m in MC_METRICS], "P(< 0)": [f"{summary[m].prob_loss:.2%}" for m in MC_METRICS]})
+
+GOAL_OUTPUTS = {"Annual PAT (₹)": "annual_pat", "Annual EBIT (₹)": "annual_ebit", "Annual EBITDA (₹)": "annual_ebitda",
+                "ROCE (PAT Basis, %)": "roce_pat", "ROCE (EBIT Basis, %)": "roce_ebit", "ROE (%)": "roe",
+                "Net WC Requirement (₹)": "net_wc_requirement", "Daily Revenue (₹)": "daily_total_revenue"}
+BREAK_EVENS = (("Seed price for zero PAT", "seed_purchase_price", "annual_pat", 0.0),
+               ("Oil blend price for 20% ROCE (PAT)", "oil_blend_sell_price", "roce_pat", 20.0),
+               ("Minimum seed input for positive EBIT", "seed_input_mt", "annual_ebit", 0.0))
+
+@fragment
+def goal_seek_panel(engine_inputs):
+    with panel("🎯 Goal Seek & Break-Even", "goal_seek") as section:
+        if not section.open: return
+        st.markdown("**Break-evens at the current inputs**")
+        amount = lambda v: format_indian(v) if abs(v) >= 1000 else f"{v:,.2f}"
+        rows = {"Question": [], "Answer": [], "Current": []}
+        for question, name, output, target in BREAK_EVENS:
+            sol = goal_seek(engine_inputs, name, output, target)
+            rows["Question"].append(question)
+            rows["Answer"].append(amount(sol.value) if sol.converged else "not reachable in the search range")
+            rows["Current"].append(amount(getattr(engine_inputs, name)))
+        st.table(rows)
+        st.markdown("**Solve for any input**")
+        c1, c2, c3 = st.columns(3)
+        name = c1.selectbox("Change this input", list(INPUT_LABELS), format_func=INPUT_LABELS.get, key="goal_input")
+        output_label = c2.selectbox("So that", list(GOAL_OUTPUTS), key="goal_output")
+        target = c3.number_input("Equals", value=0.0, key="goal_target")
+        sol = goal_seek(engine_inputs, name, GOAL_OUTPUTS[output_label], target)
+        if sol.converged: st.success(f"{INPUT_LABELS[name]} = **{sol.value:,.4f}** gives {output_label} = {sol.achieved:,.2f} (currently {getattr(engine_inputs, name):,.2f}).")
+        else: st.warning(f"No value of {INPUT_LABELS[name]} in its search range makes {output_label} equal {target:,.2f}.")
+
+VARIANT_METRICS = {"Daily Revenue (₹)": "daily_total_revenue", "Daily EBITDA (₹)": "daily_ebitda", "Annual Interest (₹)": "annual_interest",
+                   "Annual Depreciation (₹)": "annual_depreciation", "Annual PBT (₹)": "annual_pbt", "Annual PAT (₹)": "annual_pat",
+                   "Capital Employed (₹)": "capital_employed", "ROCE (PAT Basis, %)": "roce_pat", "ROE (%)": "roe"}
+VARIANT_SWEEP_POINTS = 200
+
+@fragment
+def variants_panel(engine_inputs):
+    with panel("⚖️ Model Variants (dashboard vs mustard.py)", "variants") as section:
+        if not section.open: return
+        st.caption("The same inputs under the dashboard's rules and the original plant model's (`mustard.py`): fixed market oil "
+                   "counted in the blend, one flat rate on capex plus gross WC, capex over 96 months, and ROCE on gross WC.")
+        c1, c2 = st.columns(2)
+        market_oil = c1.number_input("Legacy: market oil blended (MT/day)", 0.0, 1000.0, LEGACY.market_oil_mt, key="variant_market_oil")
+        flat_rate = c2.number_input("Legacy: flat interest rate (% p.a.)", 0.0, 100.0, LEGACY.flat_interest_rate_pa, key="variant_flat_rate")
+        legacy = LEGACY.replace(market_oil_mt=market_oil, flat_interest_rate_pa=flat_rate)
+        diff = compare_variants({k: [v] for k, v in engine_inputs.as_dict().items()}, other=legacy, outputs=VARIANT_METRICS.values())
+        amount = lambda key, v: f"₹ {format_indian(v)}" if "(₹)" in key else f"{v:.2f}%"
+        st.table({"Metric": list(VARIANT_METRICS),
+                  **{column: [amount(label, float(values[key][0])) for label, key in VARIANT_METRICS.items()]
+                     for column, values in (("Dashboard", diff.base), ("mustard.py", diff.other), ("Difference", diff.delta))}})
+        c1, c2 = st.columns(2)
+        name = c1.selectbox("Sweep this input", list(INPUT_LABELS), format_func=INPUT_LABELS.get, key="variant_sweep_input")
+        metric_label = c2.selectbox("Metric", list(VARIANT_METRICS), index=list(VARIANT_METRICS.values()).index("annual_pat"), key="variant_sweep_metric")
+        base_value = getattr(engine_inputs, name)
+        lo, hi = INPUT_BOUNDS.get(name, (None, None))
+        span = abs(base_value) or 1.0
+        xs = np.linspace(base_value - span / 2 if lo is None else lo, base_value + span / 2 if hi is None else hi, VARIANT_SWEEP_POINTS)
+        # One batched call per variant for the whole sweep.
+        metric = VARIANT_METRICS[metric_label]
+        sweep = compare_variants({**{k: [v] for k, v in engine_inputs.as_dict().items()}, name: xs}, other=legacy, outputs=[metric])
+        fig = go.Figure([go.Scatter(x=xs, y=np.broadcast_to(sweep.base[metric], xs.shape), name="Dashboard"),
+                         go.Scatter(x=xs, y=np.broadcast_to(sweep.other[metric], xs.shape), name="mustard.py")])
+        fig.add_vline(x=base_value, line_dash="dot", line_color="grey")
+        fig.update_layout(height=380, xaxis_title=INPUT_LABELS[name], yaxis_title=metric_label, legend_title=None)
+        st.plotly_chart(fig, key="variant_sweep_chart")
+
+EXPORT_AXES = ("seed_purchase_price", "oil_blend_sell_price")
+EXPORT_MAX_ROWS = 1_000_000  # Streamlit keeps a finished download in memory; larger sweeps go through the server's /v1/export
+
+def export_file(engine_inputs, axes, fmt):
+    """Writes the sweep to a temporary file chunk by chunk and returns it. Called when the download is clicked, on a
+    thread of its own; Streamlit takes raw files, so the buffered writer is detached rather than closed."""
+    raw = tempfile.TemporaryFile(buffering=0)
+    buffered = io.BufferedWriter(raw, 1 << 20)
+    export(grid_chunks(axes, engine_inputs), buffered, fmt)
+    buffered.flush()
+    buffered.detach()
+    return raw
+
+@fragment
+def export_panel(engine_inputs):
+    with panel("📤 Export Results", "export") as section:
+        if not section.open: return
+        st.caption("Sweeps up to three inputs over a grid around the sidebar scenario and downloads one row per scenario: every input and "
+                   "every metric, for use in your own models.")
+        names = st.multiselect("Sweep inputs", list(INPUT_LABELS), default=list(EXPORT_AXES), format_func=INPUT_LABELS.get, max_selections=3, key="export_axes")
+        axes = {}
+        for name, col in zip(names, st.columns(max(1, len(names)))):
+            with col:
+                lo, hi = heatmap_range(name, getattr(engine_inputs, name), "export")
+                axes[name] = np.linspace(lo, hi, st.number_input("Points", 2, 100_000, 100, key=f"export_points_{name}"))
+        rows = int(np.prod([len(v) for v in axes.values()]))
+        fmt = st.radio("Format", list(FORMATS), format_func=str.upper, key="export_format", horizontal=True)
+        if rows > EXPORT_MAX_ROWS:
+            st.warning(f"{rows:,} rows is more than the dashboard offers ({EXPORT_MAX_ROWS:,}). Use fewer points, or stream the sweep from "
+                       "`python -m mustard_engine.server` (`POST /v1/export`), which sends the file as it is written.")
+            return
+        # Deferred: the file is only written when the button is clicked, and never while the page reruns.
+        st.download_button(f"Download {rows:,} row{'s' if rows != 1 else ''} as {fmt.upper()}", functools.partial(export_file, engine_inputs, axes, fmt),
+                           file_name=f"mustard_sweep.{fmt}", mime=FORMATS[fmt], on_click="ignore", key="export_download")
+        st.caption(f"{len(set(engine_inputs._fields).union(METRIC_NAMES))} columns; `pungency_status` is -1 (low), 0 (compliant) or "
+                   "1 (high). The file is written in chunks, so memory stays flat while it is generated.")
+
+@fragment
+def logic_expander():
+    with panel("ℹ️ Click here to see key calculation logic", "logic") as section:
+        if not section.open: return
+        st.markdown("""
+        - **Cost of Goods Sold (COGS):** `COGS = Seed Cost + Market Oil Cost + MoC Enhancement Cost`
+        - **Net Working Capital Requirement:** `Net WC = (Total Inventory + Total Debtors - Trade Creditors) - Financed Inventory`
+        - **Interest Calculation (No Double-Counting):** 
+          - `Debt Funded Capex = Capex * (1 - Equity %)`
+          - `Main Capital to Finance = Debt Funded Capex + Net WC Requirement`
+          - `Interest on Main Capital = Main Capital to Finance * Main Financing Rate`
+          - `Interest on Hoard = Financed RM Value * Warehouse Finance Rate`
+          - `Total Annual Interest` is the sum of these two main components.
+        - **Return on Capital Employed (ROCE):** Measures operational efficiency. `EBIT = EBITDA - Depreciation`.
+          - `Capital Employed = Capex + Net WC Requirement + Other Assets`
+          - `Standard ROCE (EBIT Basis) = Annual EBIT / Capital Employed`
+        - **Return on Equity (ROE):** Measures return to shareholders.
+          - `Shareholder's Equity = (Capex * Equity %) + Net WC Requirement + Other Assets`
+          - `Standard ROE = Annual PAT / Shareholder's Equity`
+        - **Synergy Impact:** `ROCE/ROE with Synergy` adds the `Annual Solvex Savings` to the numerator (EBIT or PAT).
+        """)
+
+@st.fragment
+def performance_panel():
+    """Sidebar panel shown only while profiling: p50/p95 per phase over the recent traced reruns."""
+    with st.sidebar.expander("⏱️ Performance", expanded=True):
+        scope = st.radio("Reruns from", ["This session", "All sessions"], key="perf_scope", horizontal=True)
+        kind = st.radio("Kind", ["Full reruns", "Fragment reruns"], key="perf_kind", horizontal=True)
+        summary = shared_tracer().summary(kind="run" if kind == "Full reruns" else "fragment", session=trace.session if scope == "This session" else None)
+        if not summary.reruns:
+            st.caption("No reruns traced yet.")
+            return
+        phases = sorted(summary.phases.items(), key=lambda item: -item[1].p95_ms)
+        st.dataframe({"Phase": [name for name, _ in phases], "Reruns": [s.count for _, s in phases],
+                      "p50 (ms)": [round(s.p50_ms, 2) for _, s in phases], "p95 (ms)": [round(s.p95_ms, 2) for _, s in phases]}, hide_index=True)
+        hit_rate = "n/a" if summary.cache_hit_rate is None else f"{summary.cache_hit_rate:.0%}"
+        elements = "n/a" if summary.elements is None else f"{summary.elements:,.0f}"
+        st.caption(f"Last {summary.reruns} reruns. Engine cache hit rate {hit_rate}; {elements} elements sent per rerun. "
+                   f"Panels are timed by name; input_hash and compute are inside engine. Trace file: {shared_tracer().path}")
+
+pnl_view(metrics)
+st.divider()
+wc_synergy_panel(metrics)
+st.divider()
+sensitivity_panel(engine_inputs)
+heatmap_panel(engine_inputs)
+projection_panel(engine_inputs)
+price_history_panel(engine_inputs)
+portfolio_panel(engine_inputs)
+blending_panel(engine_inputs)
+library_panel(engine_inputs, metrics)
+monte_carlo_panel(engine_inputs)
+goal_seek_panel(engine_inputs)
+variants_panel(engine_inputs)
+export_panel(engine_inputs)
+logic_expander()
 st.markdown("---")
 st.success("Dashboard code is complete and has been fully executed.")
+if profiling:
+    finish_trace(trace)
+    performance_panel()
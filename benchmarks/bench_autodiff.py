@@ -0,0 +1,52 @@
+"""Times the forward-mode AD Jacobian against finite differences and checks they agree.
+
+Run from the repo root: python benchmarks/bench_autodiff.py
+"""
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import INPUT_NAMES, EngineInputs, calculate_all_metrics
+from mustard_engine.autodiff import jacobian
+
+OUTPUTS = ("annual_pat", "roce_ebit", "roce_pat", "roe", "net_wc_requirement")
+
+
+def central_differences(p, rel_step=1e-6):
+    """{input: {output: derivative}} from two engine reruns per input."""
+    out = {}
+    for name in INPUT_NAMES:
+        value = getattr(p, name)
+        h = max(abs(value), 1.0) * rel_step
+        up, down = calculate_all_metrics(p.replace(**{name: value + h})), calculate_all_metrics(p.replace(**{name: value - h}))
+        out[name] = {k: (up[k] - down[k]) / (2 * h) for k in OUTPUTS}
+    return out
+
+
+def check_agreement(p):
+    jac, fd = jacobian(p), central_differences(p)
+    worst = max(abs(jac.partial(k, name) - fd[name][k]) / max(1.0, abs(fd[name][k]), abs(jac.partial(k, name)))
+                for name in INPUT_NAMES for k in OUTPUTS)
+    print(f"AD vs central differences: worst relative gap {worst:.1e} (finite-difference truncation/rounding)")
+    if worst > 1e-2: raise SystemExit("AD partials disagree with finite differences")
+
+
+def main():
+    p = EngineInputs()
+    check_agreement(p)
+    timings = {
+        "AD, all 39 inputs (1 pass)": lambda: jacobian(p),
+        "AD, seed price only": lambda: jacobian(p, wrt=("seed_purchase_price",)),
+        "one engine evaluation": lambda: calculate_all_metrics(p),
+        "central differences (78 evaluations)": lambda: central_differences(p),
+    }
+    for label, fn in timings.items():
+        best = min(timeit.repeat(fn, number=50, repeat=5)) / 50
+        print(f"  {label:<38} {best * 1e6:9.0f} us")
+    on_kink = p.replace(kachi_ghani_pungency=(0.27 * 33 - 0.12 * 15) / 18)  # blend pungency lands exactly on 0.27%
+    print("kinks at the pungency threshold:", sorted({k.node for k in jacobian(on_kink).kinks}))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+"""Times `calculate_metrics_batch` over random scenario sweeps.
+
+Run from the repo root: python benchmarks/bench_batch.py [n_scenarios]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import DEFAULT_INPUTS, calculate_all_metrics, calculate_metrics_batch
+
+
+def random_scenarios(n, seed=0):
+    """Defaults everywhere, with prices, yields and pungency jittered so every pungency branch is hit."""
+    rng = np.random.default_rng(seed)
+    cols = {k: np.full(n, float(v)) for k, v in DEFAULT_INPUTS.items()}
+    cols["seed_purchase_price"] = rng.uniform(40000, 65000, n)
+    cols["oil_blend_sell_price"] = rng.uniform(125000, 155000, n)
+    cols["kachi_ghani_yield_pct"] = rng.integers(10, 25, n).astype(float)
+    cols["expeller_yield_pct"] = rng.integers(5, 20, n).astype(float)
+    cols["kachi_ghani_pungency"] = rng.uniform(0.2, 0.6, n)
+    cols["expeller_oil_pungency"] = rng.uniform(0.05, 0.3, n)
+    return cols
+
+
+def check_parity(cols, sample=2000):
+    """Every numeric metric of the batch engine must match the scalar engine row by row."""
+    out = calculate_metrics_batch(cols)
+    worst = 0.0
+    for i in range(min(sample, len(cols["seed_input_mt"]))):
+        scalar = calculate_all_metrics({k: float(v[i]) for k, v in cols.items()})
+        for key, value in scalar.items():
+            if isinstance(value, str): continue
+            worst = max(worst, abs(out[key][i] - value) / max(1.0, abs(value)))
+    print(f"parity vs calculate_all_metrics: worst relative error {worst:.2e} over {sample:,} scenarios")
+    if worst > 1e-9: raise SystemExit("batch engine drifted from the scalar engine")
+
+
+def main(n=100_000, repeats=5):
+    cols = random_scenarios(n)
+    check_parity(cols)
+    calculate_metrics_batch(cols)  # warm-up
+    timings = []
+    for _ in range(repeats):
+        t0 = time.perf_counter()
+        calculate_metrics_batch(cols)
+        timings.append(time.perf_counter() - t0)
+    best = min(timings)
+    print(f"calculate_metrics_batch: {n:,} scenarios in {best*1000:.1f} ms ({n/best:,.0f} scenarios/s, best of {repeats})")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
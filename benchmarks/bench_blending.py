@@ -0,0 +1,46 @@
+"""Times the seed-lot blend optimizer for growing lot counts, and checks it against the engine's two-stream rule.
+
+Run from the repo root: python benchmarks/bench_blending.py [max_lots]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_all_metrics
+from mustard_engine.blending import optimize_blend, rule_margin
+
+
+def random_lots(n, rng):
+    return {"seed_input_mt": rng.uniform(2, 30, n), "seed_purchase_price": rng.uniform(52000, 62000, n),
+            "kachi_ghani_yield_pct": rng.uniform(14, 22, n), "expeller_yield_pct": rng.uniform(10, 18, n),
+            "kachi_ghani_pungency": rng.uniform(0.15, 0.55, n), "expeller_oil_pungency": rng.uniform(0.05, 0.3, n)}
+
+
+def main(max_lots=1000):
+    rng, base = np.random.default_rng(0), EngineInputs()
+    for n in (n for n in (10, 30, 100, 300, 1000, 3000, 10000) if n <= max_lots):
+        lots = random_lots(n, rng)
+        repeats = max(20, 20_000 // n)
+        t0 = time.perf_counter()
+        for _ in range(repeats): plan = optimize_blend(lots, base, max_market_oil_mt=n)
+        print(f"{n:>6,} lots: {(time.perf_counter() - t0) / repeats * 1e6:8.0f} us per solve; "
+              f"market oil {plan.market_oil_mt:8.2f} MT, {plan.oil_sold_separately_mt:8.2f} MT sold separately, "
+              f"+₹ {plan.daily_ebitda - rule_margin(lots, base):,.0f}/day over the pooled two-stream rule")
+
+    # One lot: the engine's plan is always feasible, so the optimizer must match or beat it (it matches when the rule is optimal).
+    worst = 0.0
+    for _ in range(2000):
+        p = base.replace(kachi_ghani_pungency=float(rng.uniform(0.1, 0.6)), expeller_oil_pungency=float(rng.uniform(0.05, 0.4)),
+                         oil_blend_sell_price=float(rng.uniform(135000, 150000)))
+        if p.kachi_ghani_pungency < 0.27: continue  # below the floor the engine blends non-compliant oil
+        plan, engine = optimize_blend({}, p), calculate_all_metrics(p)["daily_ebitda"]
+        if plan.daily_ebitda < engine - 1e-6 * abs(engine): raise SystemExit(f"optimizer lost to the engine's rule: {plan.daily_ebitda} < {engine}")
+        worst = max(worst, (plan.daily_ebitda - engine) / abs(engine))
+    print(f"single lot vs calculate_all_metrics: never worse; best improvement {worst:.2e} of daily EBITDA")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1000)
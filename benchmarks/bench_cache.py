@@ -0,0 +1,59 @@
+"""Compares a `ResultCache` hit (canonical key + LRU lookup) with a full engine recompute, and checks eviction.
+
+Run from the repo root: python benchmarks/bench_cache.py
+"""
+import os
+import sys
+import timeit
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import DEFAULT_INPUTS, EngineInputs, calculate_all_metrics
+from mustard_engine.cache import ResultCache
+
+
+def main(number=20_000):
+    inputs = EngineInputs(**DEFAULT_INPUTS)
+    form_state = {**DEFAULT_INPUTS, "selected_tab": "📊 Daily View"}  # what a rerun actually hands over
+    cache = ResultCache()
+    cache.get(inputs)
+
+    recompute = min(timeit.repeat(lambda: calculate_all_metrics(inputs), number=number, repeat=3)) / number
+    hit = min(timeit.repeat(lambda: cache.get(inputs), number=number, repeat=3)) / number
+    hit_from_dict = min(timeit.repeat(lambda: cache.get(form_state), number=number, repeat=3)) / number
+    print(f"full recompute:          {recompute * 1e6:7.2f} µs")
+    print(f"cache hit (EngineInputs): {hit * 1e6:6.2f} µs  ({recompute / hit:.1f}x faster)")
+    print(f"cache hit (form dict):    {hit_from_dict * 1e6:6.2f} µs  ({recompute / hit_from_dict:.1f}x faster)")
+
+    try:
+        import streamlit as st
+    except ImportError:
+        st = None
+    if st is not None:
+        legacy = st.cache_data(lambda inputs: calculate_all_metrics(inputs))
+        legacy(form_state)
+        st_hit = min(timeit.repeat(lambda: legacy(form_state), number=number // 10, repeat=3)) / (number // 10)
+        print(f"@st.cache_data hit (form dict, previous approach): {st_hit * 1e6:.2f} µs")
+
+    budget = ResultCache(max_bytes=2 * 1024 * 1024)
+    for i in range(20_000): budget.get(inputs.replace(seed_purchase_price=40000.0 + i))
+    stats = budget.stats()
+    print(f"2 MiB budget after 20k distinct scenarios: {stats['entries']:,} entries, {stats['bytes'] / 1024:,.0f} KiB, {stats['evictions']:,} evictions")
+    assert stats["bytes"] <= budget.max_bytes
+
+    # The budget is only as good as the per-entry estimate: compare it with what tracemalloc sees allocated.
+    sized = ResultCache(max_bytes=1 << 40)
+    sized.get(inputs.replace(seed_purchase_price=0.5))
+    sized.clear()
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    for i in range(2_000): sized.get(inputs.replace(seed_purchase_price=40000.0 + i, capex=inputs.capex + i))
+    actual = (tracemalloc.get_traced_memory()[0] - before) / len(sized)
+    tracemalloc.stop()
+    estimate = sized.nbytes / len(sized)
+    print(f"per entry: {estimate:,.0f} B counted, {actual:,.0f} B allocated (tracemalloc), ratio {estimate / actual:.2f}")
+    assert 0.9 <= estimate / actual <= 1.25, "ResultCache's size estimate has drifted from the real footprint"
+
+
+if __name__ == "__main__":
+    main()
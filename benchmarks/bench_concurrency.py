@@ -0,0 +1,36 @@
+"""Fires many engine reruns in parallel and checks every session gets exactly its own numbers.
+
+Run from the repo root: python benchmarks/bench_concurrency.py [n_reruns]
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_all_metrics
+
+WATCHED = ("daily_total_revenue", "net_wc_requirement", "roce_pat", "roe_with_synergy")
+
+
+def session_inputs(i):
+    """A distinct scenario per simulated session, so any cross-talk shows up as a wrong number."""
+    return EngineInputs(seed_input_mt=100.0 + i % 200, seed_purchase_price=45000.0 + 10 * i,
+                        kachi_ghani_pungency=0.2 + (i % 40) / 100, rm_hoard_months=(i % 7) / 2, rm_hoard_financed_pct=i % 100)
+
+
+def main(n=20_000, worker_counts=(1, 2, 4, 8, 16)):
+    scenarios = [session_inputs(i) for i in range(n)]
+    expected = [{k: calculate_all_metrics(s)[k] for k in WATCHED} for s in scenarios]
+    for workers in worker_counts:
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(calculate_all_metrics, scenarios, chunksize=1))
+        elapsed = time.perf_counter() - t0
+        wrong = sum(any(r[k] != e[k] for k in WATCHED) for r, e in zip(results, expected))
+        print(f"{workers:>2} threads: {n:,} reruns in {elapsed*1000:7.1f} ms ({n/elapsed:>9,.0f} reruns/s), mismatched results: {wrong}")
+        if wrong: raise SystemExit(f"{wrong} sessions saw another session's numbers")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20_000)
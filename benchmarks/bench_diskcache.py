@@ -0,0 +1,67 @@
+"""Simulates several dashboard replicas sharing one disk cache file and reports the cross-process hit rate.
+
+Timings are per lookup, memory hits included; with fewer CPUs than processes they include waiting for a CPU.
+
+Each worker process serves the same skewed stream of scenarios (a few popular ones, a long tail) through its own
+`ResultCache` backed by the shared file, then restarts with an empty memory cache and serves it again.
+
+Run from the repo root: python benchmarks/bench_diskcache.py [n_processes] [lookups_per_process]
+"""
+import os
+import sys
+import tempfile
+import time
+from multiprocessing import get_context
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_all_metrics
+from mustard_engine.cache import ResultCache
+from mustard_engine.diskcache import DiskCache
+
+
+def scenario_stream(seed, n):
+    ranks = np.random.default_rng(seed).zipf(1.3, n) % 5000  # popular scenarios first, long tail
+    return [EngineInputs(seed_purchase_price=45000.0 + 10 * r, seed_input_mt=150.0 + r % 50) for r in ranks.tolist()]
+
+
+def serve(path, seed, n, max_bytes):
+    stream = scenario_stream(seed, n)
+    memory = ResultCache(max_entries=1000)
+    t0 = time.perf_counter()
+    for p in stream: memory.get(p)
+    times = {"memory only": (time.perf_counter() - t0) / n}
+    for run in ("first start", "restart"):
+        cache = ResultCache(max_entries=1000, disk=DiskCache(path, max_bytes=max_bytes))
+        t0 = time.perf_counter()
+        for p in stream: cache.get(p)
+        times[run] = (time.perf_counter() - t0) / n
+        disk = cache.disk.stats()["process"]
+        cache.disk.close()
+        times[f"{run} disk"] = disk
+    return times
+
+
+def main(processes=4, n=20_000, max_bytes=8 * 1024 * 1024):
+    with tempfile.TemporaryDirectory() as scratch:
+        path = os.path.join(scratch, "cache.sqlite")
+        with get_context("spawn").Pool(processes) as pool:
+            results = pool.starmap(serve, [(path, seed, n, max_bytes) for seed in range(processes)])
+        host = DiskCache(path, max_bytes=max_bytes).stats()["host"]
+    print(f"{processes} processes x {n:,} lookups (1,000-entry memory caches, {os.cpu_count()} CPU(s) shared):")
+    for i, r in enumerate(results):
+        first, restart = r["first start disk"], r["restart disk"]
+        print(f"process {i}: memory cache only {r['memory only'] * 1e6:6.1f} us/lookup; with the shared file {r['first start'] * 1e6:6.1f} us/lookup (disk hit rate {first['hit_rate']:.0%}, from other processes {first['shared_hit_rate']:.0%}); "
+              f"after restart {r['restart'] * 1e6:6.1f} us/lookup (disk hit rate {restart['hit_rate']:.0%})")
+    print(f"host: {host['entries']:,} entries, {host['bytes'] / 1e6:.1f} MB of {max_bytes / 1e6:.1f} MB, {host['writes']:,} writes, "
+          f"{host['evictions']:,} evictions, hit rate {host['hit_rate']:.0%} ({host['shared_hit_rate']:.0%} computed by another process), {host['errors']} errors")
+    cached = ResultCache(disk=DiskCache(os.path.join(tempfile.mkdtemp(), "check.sqlite")))
+    p = scenario_stream(0, 1)[0]
+    cached.get(p)
+    cached.clear()
+    if dict(cached.get(p)) != calculate_all_metrics(p): raise SystemExit("disk round trip changed the metrics")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
@@ -0,0 +1,51 @@
+"""Throughput and peak RSS of the streaming export, per format, for a grid sweep written to a temporary file.
+
+Each export runs in a fresh process at a quarter of the rows and at the full row count. If the writers stream, peak
+RSS stays the same while the row count grows four-fold.
+
+Run from the repo root: python benchmarks/bench_export.py [rows]
+"""
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine.export import FORMATS, export, grid_chunks
+
+
+def peak_rss_mb():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KiB on Linux
+
+
+def worker(fmt, rows):
+    """Exports a `rows`-row grid in this process; prints seconds, file size and peak RSS before and after, as JSON."""
+    import numpy as np
+    import pyarrow.parquet  # noqa: F401 -- imported up front so the baseline RSS includes it
+
+    side = int(np.ceil(np.sqrt(rows)))
+    axes = {"seed_purchase_price": np.linspace(45000, 65000, side), "oil_blend_sell_price": np.linspace(125000, 155000, -(-rows // side))}
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, f"sweep.{fmt}")
+        before = peak_rss_mb()
+        t0 = time.perf_counter()
+        written = export(grid_chunks(axes), path)
+        seconds = time.perf_counter() - t0
+        print(json.dumps({"rows": written, "seconds": seconds, "bytes": os.path.getsize(path), "rss_before_mb": before, "rss_peak_mb": peak_rss_mb()}))
+
+
+def main(rows=1_000_000):
+    for fmt in FORMATS:
+        for n in (rows // 4, rows):
+            out = subprocess.run([sys.executable, __file__, "--worker", fmt, str(n)], capture_output=True, text=True, check=True)
+            r = json.loads(out.stdout)
+            print(f"{fmt:>7} {r['rows']:>10,} rows: {r['rows'] / r['seconds']:>10,.0f} rows/s, {r['bytes'] / 2**20:8.1f} MB file, "
+                  f"peak RSS {r['rss_peak_mb']:6.1f} MB ({r['rss_peak_mb'] - r['rss_before_mb']:+.1f} MB over the imports)")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:2] == ["--worker"]: worker(sys.argv[2], int(sys.argv[3]))
+    else: main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,41 @@
+"""Times `format_indian_array` against the scalar formatters over a whole column, and checks the strings match.
+
+Run from the repo root: python benchmarks/bench_formatting.py [n_values]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine.formatting import format_cr, format_indian, format_indian_array, format_lakh
+
+SCALAR = {None: format_indian, "rupee": lambda v: f"₹ {format_indian(v)}", "lakh": format_lakh, "crore": format_cr}
+
+
+def rupee_column(n, seed=0):
+    """P&L-sized rupee amounts (a few hundred to a few hundred crore), both signs, with a sprinkling of NaNs."""
+    rng = np.random.default_rng(seed)
+    values = rng.choice([-1.0, 1.0], n) * 10 ** rng.uniform(2, 10, n)
+    values[rng.integers(0, n, max(1, n // 10_000))] = np.nan
+    return values
+
+
+def main(n=1_000_000):
+    values = rupee_column(n)
+    as_list = values.tolist()
+    print(f"{n:,} values")
+    for unit, scalar in SCALAR.items():
+        t0 = time.perf_counter()
+        expected = [scalar(v) for v in as_list]
+        t_scalar = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        got = format_indian_array(values, unit)
+        t_batch = time.perf_counter() - t0
+        if got.tolist() != expected: raise SystemExit(f"unit={unit!r}: batch output differs from the scalar formatter")
+        print(f"  {str(unit):<6} scalar {t_scalar*1000:7.0f} ms   batch {t_batch*1000:6.0f} ms   {t_scalar/t_batch:4.1f}x   identical")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
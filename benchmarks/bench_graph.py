@@ -0,0 +1,41 @@
+"""Sweeps single inputs through `MetricsGraph` and compares with rerunning the whole scalar engine per step.
+
+Run from the repo root: python benchmarks/bench_graph.py
+"""
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_all_metrics
+from mustard_engine.graph import NODES, MetricsGraph, downstream
+
+SWEEPS = {
+    "labor_cost_per_head_daily": [400.0 + i for i in range(2000)],
+    "main_financing_rate_pa": [5.0 + i / 200 for i in range(2000)],
+    "seed_purchase_price": [40000.0 + 10 * i for i in range(2000)],
+}
+
+
+def main():
+    base = EngineInputs()
+    print(f"{len(NODES)} nodes in the graph")
+    for name, values in SWEEPS.items():
+        graph = MetricsGraph(base)
+        graph.metrics()
+        runs_before = graph.runs
+        t0 = time.perf_counter()
+        rows = graph.sweep(name, values)
+        incremental = time.perf_counter() - t0
+        per_step = (graph.runs - runs_before) / len(values)
+
+        t0 = time.perf_counter()
+        full = [calculate_all_metrics(base.replace(**{name: v})) for v in values]
+        rerun = time.perf_counter() - t0
+        assert all(r["annual_pat"] == f["annual_pat"] and r["roce_pat"] == f["roce_pat"] for r, f in zip(rows, full))
+        print(f"{name:<27} cone {len(downstream(name)):>2} nodes, {per_step:4.1f} run/step | "
+              f"graph {incremental / len(values) * 1e6:6.1f} µs/step vs full engine {rerun / len(values) * 1e6:6.1f} µs/step")
+
+
+if __name__ == "__main__":
+    main()
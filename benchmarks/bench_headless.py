@@ -0,0 +1,56 @@
+"""Measures cold import cost of the headless engine and rows/second of the batch CLI.
+
+Run from the repo root: python benchmarks/bench_headless.py [n_rows]
+"""
+import csv
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+IMPORT_PROBE = """
+import sys, time
+t0 = time.perf_counter()
+import {module}
+elapsed = (time.perf_counter() - t0) * 1000
+heavy = sorted(m for m in ("streamlit", "pandas", "numpy") if m in sys.modules)
+print(f"{{elapsed:.1f}} {{','.join(heavy) or '-'}}")
+"""
+
+
+def cold_import(module, repeats=5):
+    """Best-of-N import time in a fresh interpreter, plus which heavy modules it dragged in."""
+    best, heavy = float("inf"), ""
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", IMPORT_PROBE.format(module=module)], cwd=ROOT,
+                             capture_output=True, text=True, check=True).stdout.split()
+        best, heavy = min(best, float(out[0])), out[1]
+    return best, heavy
+
+
+def cli_throughput(n_rows, extra_args=()):
+    with tempfile.TemporaryDirectory() as tmp:
+        src, dst = os.path.join(tmp, "scenarios.csv"), os.path.join(tmp, "results.csv")
+        with open(src, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["scenario", "seed_purchase_price", "oil_blend_sell_price", "kachi_ghani_pungency"])
+            writer.writerows((f"s{i}", 40000 + i % 25000, 125000 + i % 30000, 0.2 + (i % 40) / 100) for i in range(n_rows))
+        t0 = time.perf_counter()
+        subprocess.run([sys.executable, "-m", "mustard_engine", src, "-o", dst, *extra_args], cwd=ROOT, check=True)
+        return n_rows / (time.perf_counter() - t0)
+
+
+def main(n_rows=200_000):
+    for module in ("mustard_engine", "mustard_engine.batch", "streamlit"):
+        try: ms, heavy = cold_import(module)
+        except subprocess.CalledProcessError: print(f"import {module:<22} (not installed)"); continue
+        print(f"import {module:<22} {ms:8.1f} ms   heavy modules loaded: {heavy}")
+    print(f"CLI, all metrics:      {cli_throughput(n_rows):>10,.0f} rows/s ({n_rows:,} rows, CSV -> CSV, incl. interpreter start)")
+    print(f"CLI, three metrics:    {cli_throughput(n_rows, ['--columns', 'annual_pat,roce_pat,net_wc_requirement']):>10,.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 200_000)
@@ -0,0 +1,43 @@
+"""Times heatmap redraws (cold, cached, panned, adaptive) and checks adaptive output against the exact grid.
+
+Run from the repo root: python benchmarks/bench_heatmap.py [resolution]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs
+from mustard_engine.heatmap import GridCache
+
+AXES = ("seed_purchase_price", (40000, 65000), "oil_blend_sell_price", (120000, 160000))
+PANNED = ("seed_purchase_price", (43000, 68000), "oil_blend_sell_price", (120000, 160000))
+
+
+def timed(label, fn):
+    t0 = time.perf_counter()
+    result = fn()
+    print(f"  {label:<26} {(time.perf_counter() - t0) * 1000:7.1f} ms  {result.evaluated:>9,} evaluations  {result.values['annual_pat'].shape}")
+    return result
+
+
+def main(resolution=500):
+    p = EngineInputs()
+    exact_cache, adaptive_cache = GridCache(), GridCache()
+    exact = timed("exact, cold", lambda: exact_cache.heatmap(p, *AXES, resolution=resolution, adaptive=False))
+    timed("exact, cached redraw", lambda: exact_cache.heatmap(p, *AXES, resolution=resolution, adaptive=False))
+    adaptive = timed("adaptive, cold", lambda: adaptive_cache.heatmap(p, *AXES, resolution=resolution))
+    timed("adaptive, panned", lambda: adaptive_cache.heatmap(p, *PANNED, resolution=resolution))
+    timed("adaptive, other base", lambda: adaptive_cache.heatmap(p.replace(capex=2.5e8), *AXES, resolution=resolution))
+    for metric, grid in adaptive.values.items():
+        err = np.abs(grid - exact.values[metric]).max() / np.abs(exact.values[metric]).max()
+        print(f"  {metric:<12} adaptive vs exact: max error {err:.1e} of range")
+    flips = (np.sign(adaptive.values["annual_pat"]) != np.sign(exact.values["annual_pat"])).sum()
+    print(f"  zero-profit contour: {flips} cells on the wrong side")
+    if flips: raise SystemExit("adaptive refinement misplaced the zero-profit contour")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,53 @@
+"""Times the scenario library at scale: bulk save, re-save of known scenarios, bulk compare, load and name listing.
+
+Run from the repo root: python benchmarks/bench_library.py [n_scenarios]   (uses a scratch file under the temp dir)
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_all_metrics
+from mustard_engine.library import ScenarioLibrary
+
+
+def main(n=100_000):
+    rng = np.random.default_rng(0)
+    base = EngineInputs()
+    items = [(f"scenario {i:06d}", base.replace(seed_purchase_price=float(s), capex=float(c), equity_in_capex_pct=float(e)))
+             for i, (s, c, e) in enumerate(zip(rng.normal(50000, 2000, n).round(), rng.uniform(1e8, 3e8, n).round(-5), rng.integers(30, 101, n)))]
+    with tempfile.TemporaryDirectory() as scratch:
+        library = ScenarioLibrary(os.path.join(scratch, "scenarios.sqlite"))
+        t0 = time.perf_counter()
+        library.save_many(items)
+        print(f"save {n:,} scenarios in one transaction: {time.perf_counter() - t0:.2f} s")
+        t0 = time.perf_counter()
+        library.save_many([(f"copy of {name}", p) for name, p in items[:1000]])
+        print(f"  save 1,000 known scenarios under new names (no engine run, no scenario rows): {(time.perf_counter() - t0) * 1000:.1f} ms")
+
+        picked = [items[i][0] for i in rng.choice(n, 500, replace=False)]
+        t0 = time.perf_counter()
+        result = library.compare(picked)
+        print(f"  compare 500 scenarios (one query, stored metrics): {(time.perf_counter() - t0) * 1000:.1f} ms; varying {result.varying}")
+        t0 = time.perf_counter()
+        inputs, metrics = library.load(picked[0])
+        print(f"  load one: {(time.perf_counter() - t0) * 1000:.2f} ms; "
+              f"recent 50 names: {time_it(lambda: library.names(limit=50)):.2f} ms; prefix lookup: {time_it(lambda: library.names('scenario 0999')):.2f} ms")
+        size = sum(os.path.getsize(os.path.join(scratch, f)) for f in os.listdir(scratch))
+        print(f"  {len(library):,} names, {size / 1e6:.0f} MB on disk")
+        library.close()
+        drift = abs(metrics["roce_pat"] - calculate_all_metrics(inputs)["roce_pat"])
+        if drift > 1e-9: raise SystemExit(f"stored metrics disagree with the engine by {drift}")
+
+
+def time_it(fn):
+    t0 = time.perf_counter()
+    fn()
+    return (time.perf_counter() - t0) * 1000
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
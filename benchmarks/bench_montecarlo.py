@@ -0,0 +1,56 @@
+"""Times `run_monte_carlo` and checks the streaming sketch against exact percentiles.
+
+Run from the repo root: python benchmarks/bench_montecarlo.py [draws]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_metrics_batch
+from mustard_engine.montecarlo import (DEFAULT_CHUNK_SIZE, LogNormal, Normal, RISK_METRICS, Triangular, Uniform,
+                                       correlation_factor, draw_inputs, run_monte_carlo)
+
+DISTRIBUTIONS = {
+    "seed_purchase_price": Normal(50000, 4000), "oil_blend_sell_price": LogNormal(141000, 0.05),
+    "kachi_ghani_yield_pct": Triangular(16, 18, 19), "expeller_yield_pct": Uniform(13, 16), "kachi_ghani_pungency": Normal(0.4, 0.03),
+}
+CORRELATIONS = {("seed_purchase_price", "oil_blend_sell_price"): 0.6}
+
+
+def check_accuracy(draws=DEFAULT_CHUNK_SIZE * 5, seed=1):
+    """Sketch percentiles vs np.percentile over the very same draws (materialized, so kept small)."""
+    result = run_monte_carlo(EngineInputs(), DISTRIBUTIONS, CORRELATIONS, draws=draws, seed=seed, workers=1)
+    factor = correlation_factor(list(DISTRIBUTIONS), CORRELATIONS)
+    chunks = [calculate_metrics_batch(draw_inputs(EngineInputs(), DISTRIBUTIONS, factor, s, DEFAULT_CHUNK_SIZE))
+              for s in np.random.SeedSequence(seed).spawn(draws // DEFAULT_CHUNK_SIZE)]
+    worst = 0.0
+    for metric, summary in result.summary().items():
+        exact = np.concatenate([c[metric] for c in chunks])
+        for q, got in ((5, summary.p5), (50, summary.p50), (95, summary.p95)):
+            want = np.percentile(exact, q, method="lower")
+            worst = max(worst, abs(got - want) / abs(want))
+        if summary.prob_loss != (exact < 0).mean(): raise SystemExit(f"{metric}: probability of loss drifted")
+    print(f"sketch vs exact percentiles over {draws:,} draws: worst relative error {worst:.2e}")
+    if worst > 0.006: raise SystemExit("quantile sketch outside its accuracy bound")
+
+
+def main(draws=1_000_000):
+    check_accuracy()
+    timings = {}
+    for workers in sorted({1, os.cpu_count() or 1}):
+        t0 = time.perf_counter()
+        result = run_monte_carlo(EngineInputs(), DISTRIBUTIONS, CORRELATIONS, draws=draws, seed=0, workers=workers)
+        timings[workers] = time.perf_counter() - t0
+        print(f"{draws:,} draws, {workers} worker(s): {timings[workers]:.2f} s ({draws / timings[workers]:,.0f} draws/s)")
+        if workers == 1: reference = result.summary()
+        elif result.summary() != reference: raise SystemExit("result depends on the worker count")
+    for metric in RISK_METRICS:
+        s = reference[metric]
+        print(f"  {metric:<20} P5 {s.p5:14,.2f}  P50 {s.p50:14,.2f}  P95 {s.p95:14,.2f}  P(loss) {s.prob_loss:.2%}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,47 @@
+"""Times portfolio build, single-plant edits and consolidation, and checks totals against the scalar engine.
+
+Run from the repo root: python benchmarks/bench_portfolio.py [n_plants]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_all_metrics
+from mustard_engine.portfolio import Portfolio
+
+
+def main(n=500):
+    rng = np.random.default_rng(0)
+    plants = {"seed_input_mt": rng.uniform(80, 300, n), "seed_purchase_price": rng.normal(50000, 2000, n),
+              "oil_blend_sell_price": rng.normal(141000, 4000, n), "capex": rng.uniform(1e8, 3e8, n),
+              "equity_in_capex_pct": rng.uniform(30, 100, n), "rm_hoard_months": rng.uniform(0, 3, n),
+              "rm_hoard_financed_pct": rng.uniform(0, 80, n), "warehouse_finance_rate_pa": rng.uniform(9, 13, n)}
+    t0 = time.perf_counter()
+    book = Portfolio(plants)
+    group = book.consolidated()
+    print(f"{n:,} plants: build + consolidate {(time.perf_counter() - t0) * 1000:.2f} ms")
+    scalar = sum(calculate_all_metrics(EngineInputs.from_mapping({k: v[i] for k, v in plants.items()}))["annual_pat"] for i in range(n))
+    print(f"  group PAT vs sum of scalar runs: off by {abs(group.pat / scalar - 1):.1e}")
+
+    edits = rng.integers(0, n, 200)
+    t0 = time.perf_counter()
+    for i in edits: book.update(int(i), seed_purchase_price=float(rng.normal(50000, 2000))).consolidated()
+    per_edit = (time.perf_counter() - t0) / len(edits)
+    t0 = time.perf_counter()
+    rebuilt = Portfolio(book.inputs).consolidated()
+    print(f"  edit one plant + consolidate: {per_edit * 1000:.2f} ms (full rebuild {(time.perf_counter() - t0) * 1000:.2f} ms)")
+    drift = abs(book.consolidated().pat / rebuilt.pat - 1)
+    print(f"  incremental vs rebuilt group PAT: off by {drift:.1e}")
+
+    book.pooled_safety_stock, book.warehouse_rate_pa = True, 8.0
+    pooled = book.consolidated()
+    print(f"  pooled safety stock frees ₹{pooled.safety_stock_saving / 1e7:,.0f} Cr of WC; shared warehouse saves ₹{pooled.warehouse_interest_saving / 1e7:,.2f} Cr/yr; "
+          f"ROCE (PAT) {rebuilt.roce_pat:.2f}% -> {pooled.roce_pat:.2f}%")
+    if abs(group.pat / scalar - 1) > 1e-12 or drift > 1e-12: raise SystemExit("portfolio totals disagree with the engine")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 500)
@@ -0,0 +1,58 @@
+"""Times the memory-mapped price store against re-parsing the CSV, plus appends and back-dated corrections.
+
+Run from the repo root: python benchmarks/bench_prices.py [n_markets]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_metrics_batch
+from mustard_engine.prices import PriceStore, write_synthetic_history
+
+
+def timed(label, fn, repeat=5):
+    best = min((lambda t0: (fn(), time.perf_counter() - t0)[1])(time.perf_counter()) for _ in range(repeat))
+    print(f"  {label:<48} {best * 1000:8.2f} ms")
+    return fn()
+
+
+def main(n_markets=40):
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path, root = os.path.join(tmp, "prices.csv"), os.path.join(tmp, "store")
+        markets = tuple(f"Mandi {i:02d}" for i in range(n_markets))
+        write_synthetic_history(csv_path, markets, start="2015-01-01", end="2024-12-31")
+        print(f"10 years x {n_markets} markets ({os.path.getsize(csv_path) / 1e6:.1f} MB of CSV)")
+        timed("re-parse the CSV with pandas", lambda: pd.read_csv(csv_path, parse_dates=["date"]), repeat=2)
+        t0 = time.perf_counter()
+        rows = sum(PriceStore(root).ingest_csv(csv_path).values())
+        print(f"  {'one-off ingest':<48} {(time.perf_counter() - t0) * 1000:8.2f} ms  ({rows:,} rows)")
+
+        def load_everything():
+            store = PriceStore(root)  # a fresh process's view: nothing cached
+            return sum(float(s.prices["seed"].sum()) for s in map(store.series, store.markets()))
+        timed("open store + read every market's full history", load_everything)
+        store = PriceStore(root)
+        timed("one market, one year", lambda: store.series("Mandi 07", "2021-01-01", "2021-12-31"))
+        history = store.series("Mandi 07")
+        out = timed("replay 10 years of one market through the engine", lambda: calculate_metrics_batch(history.as_inputs(EngineInputs())))
+        print(f"    ({len(history.dates):,} daily scenarios, median annual PAT ₹{np.median(out['annual_pat']) / 1e7:.1f} Cr)")
+
+        day = np.datetime64("2025-01-01")
+        t0 = time.perf_counter()
+        store.ingest([day] * n_markets, list(markets), {"seed": np.full(n_markets, 51000.0)})
+        print(f"  {'append one new day for every market':<48} {(time.perf_counter() - t0) * 1000:8.2f} ms")
+        t0 = time.perf_counter()
+        store.ingest([np.datetime64("2019-06-03")], ["Mandi 07"], {"oil": [150000.0]})
+        print(f"  {'back-dated correction (rewrites one market)':<48} {(time.perf_counter() - t0) * 1000:8.2f} ms")
+        check = store.series("Mandi 07", "2019-06-03", "2019-06-03")
+        if check.prices["oil"][0] != 150000.0 or np.isnan(check.prices["seed"][0]): raise SystemExit("correction did not merge")
+        if store.date_range("Mandi 00")[1] != day: raise SystemExit("append was lost")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 40)
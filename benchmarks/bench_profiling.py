@@ -0,0 +1,52 @@
+"""Times what the profiling spans cost: a span with tracing off (`NULL_TRACE`) and on, a cache hit traced and untraced,
+and writing one record to the JSONL trace.
+
+Run from the repo root: python benchmarks/bench_profiling.py [repeats]
+"""
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs
+from mustard_engine.cache import ResultCache
+from mustard_engine.profiling import NULL_TRACE, Trace, Tracer
+
+
+def per_call_us(fn, repeats):
+    fn()
+    t0 = time.perf_counter()
+    for _ in range(repeats): fn()
+    return (time.perf_counter() - t0) / repeats * 1e6
+
+
+def main(repeats=100_000):
+    trace = Trace()
+
+    def span(t):
+        with t.span("phase"): pass
+
+    print(f"span, tracing off: {per_call_us(lambda: span(NULL_TRACE), repeats):6.2f} us")
+    print(f"span, tracing on:  {per_call_us(lambda: span(trace), repeats):6.2f} us")
+    print(f"lap, tracing on:   {per_call_us(lambda: trace.lap('phase'), repeats):6.2f} us")
+
+    cache, inputs = ResultCache(), EngineInputs()
+    cache.get(inputs)
+    print(f"cache hit, untraced: {per_call_us(lambda: cache.get(inputs), repeats // 10):6.2f} us")
+    print(f"cache hit, traced:   {per_call_us(lambda: cache.get(inputs, trace=trace), repeats // 10):6.2f} us")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        tracer = Tracer(os.path.join(tmp, "trace.jsonl"), max_bytes=1024 * 1024)
+        for name in ("inputs", "engine", "compliance", "pnl_view", "sensitivity_panel", "heatmap_panel"): trace.lap(name)
+        trace.note(cache="hit", elements=246, enqueue_ms=1.5)
+        print(f"record (one JSON line, rotating at 1 MB): {per_call_us(lambda: tracer.record(trace), repeats // 10):6.2f} us")
+        tracer.summary()  # the first call imports numpy
+        t0 = time.perf_counter()
+        summary = tracer.summary()
+        print(f"summary over {summary.reruns} records: {(time.perf_counter() - t0) * 1000:.1f} ms")
+        tracer.close()
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,49 @@
+"""Times multi-year projections over many scenarios and checks the steady state against the single-day engine.
+
+Run from the repo root: python benchmarks/bench_projection.py [n_scenarios] [years]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_all_metrics
+from mustard_engine.projection import project
+
+
+def main(n=1000, years=20):
+    # A flat projection with no ramp-up must reproduce the engine's annual EBITDA and net WC in every year.
+    p = EngineInputs().replace(equity_in_capex_pct=40)
+    m = calculate_all_metrics(p)
+    for resolution in ("monthly", "daily"):
+        proj = project(p, years, resolution)
+        ebitda_gap = np.abs(proj.annual["ebitda"][0, 1:] / m["annual_ebitda"] - 1).max()
+        wc_gap = np.abs(proj.annual["working_capital"][0, 1:] / m["net_wc_requirement"] - 1).max()
+        print(f"  steady state ({resolution}): EBITDA off by {ebitda_gap:.1e}, net WC by {wc_gap:.1e}")
+        if max(ebitda_gap, wc_gap) > 1e-9: raise SystemExit("projection does not reproduce the single-day engine")
+
+    rng = np.random.default_rng(0)
+    scenarios = {"capex": rng.uniform(1e8, 4e8, n), "equity_in_capex_pct": rng.uniform(30, 100, n),
+                 "seed_purchase_price": rng.normal(50000, 2000, n), "oil_blend_sell_price": rng.normal(141000, 4000, n)}
+    curves = {"seed_purchase_price": 1.04 ** np.arange(years), "oil_blend_sell_price": 1.035 ** np.arange(years)}
+    for resolution in ("monthly", "daily"):
+        t0 = time.perf_counter()
+        proj = project(scenarios, years, resolution, curves, ramp_up_months=12, debt_tenor_years=8, amortization="annuity")
+        elapsed = time.perf_counter() - t0
+        periods = years * proj.periods_per_year
+        print(f"{n:,} scenarios x {years} years {resolution} ({n * periods:,} scenario-periods): {elapsed:.2f} s, "
+              f"median project IRR {np.nanmedian(proj.project_irr):.1%}, {np.isnan(proj.project_irr).sum()} without an IRR")
+    # IRR check: discounting a scenario's own period cash flows at its IRR must give an NPV of ~0.
+    worst = 0.0
+    for i in range(5):
+        one = {k: v[i] for k, v in scenarios.items()}
+        base = project(one, years, "monthly", curves, ramp_up_months=12, debt_tenor_years=8, amortization="annuity")
+        again = project(one, years, "monthly", curves, ramp_up_months=12, debt_tenor_years=8, amortization="annuity", discount_rate_pct=base.project_irr[0] * 100)
+        worst = max(worst, abs(again.project_npv[0]) / one["capex"])
+    print(f"  NPV at the IRR: worst {worst:.1e} of capex")
+    if worst > 1e-6: raise SystemExit("IRR does not zero the NPV")
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
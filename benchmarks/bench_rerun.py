@@ -0,0 +1,138 @@
+"""Measures rerun latency and websocket delta counts against a live, headless Streamlit server.
+
+Starts `streamlit run <script>`, speaks the browser's websocket protocol, and replays two interactions:
+switching the Daily/Monthly/Annual view (`active_tab`) and dragging the first sidebar slider, plus changing the
+tornado flex % where the script has the sensitivity panel. For each it reports the time until
+`script_finished` and how many delta messages the server pushed. Widgets that live in
+an `st.fragment` are sent with that fragment's id, exactly as the browser does, so fragment reruns are
+measured as such.
+
+Run from the repo root: python benchmarks/bench_rerun.py [app.py] [repeats]
+"""
+import asyncio
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from websockets.asyncio.client import connect
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VIEWS = ("📅 Monthly View", "🗓️ Annual View")
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(script):
+    port = _free_port()
+    proc = subprocess.Popen([sys.executable, "-m", "streamlit", "run", script, "--server.headless", "true", "--server.port", str(port),
+                             "--browser.gatherUsageStats", "false", "--server.fileWatcherType", "none"],
+                            cwd=ROOT, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=1).status == 200: return proc, port
+        except OSError:
+            time.sleep(0.2)
+    proc.kill()
+    raise RuntimeError("streamlit server did not come up")
+
+
+def radio_state(widget_id, option):
+    state = WidgetState(id=widget_id)
+    state.string_value = option
+    return state
+
+
+def slider_state(widget_id, value):
+    state = WidgetState(id=widget_id)
+    state.double_array_value.data.append(value)
+    return state
+
+
+class Session:
+    """One browser tab: sends rerun requests and tallies what comes back."""
+
+    def __init__(self, ws):
+        self.ws, self.widgets = ws, {}  # widget id -> (element type, fragment id)
+
+    async def rerun(self, widget_states=(), fragment_id=""):
+        msg = BackMsg()
+        msg.rerun_script.widget_states.widgets.extend(widget_states)
+        if fragment_id: msg.rerun_script.fragment_id = fragment_id
+        t0 = time.perf_counter()
+        await self.ws.send(msg.SerializeToString())
+        deltas = 0
+        while True:
+            raw = await self.ws.recv()
+            fwd = ForwardMsg()
+            fwd.ParseFromString(raw)
+            kind = fwd.WhichOneof("type")
+            if kind == "delta":
+                deltas += 1
+                self._note_widget(fwd.delta)
+                if fwd.delta.new_element.WhichOneof("type") == "exception": raise RuntimeError(fwd.delta.new_element.exception.message)
+            elif kind == "script_finished":
+                return time.perf_counter() - t0, deltas
+
+    def _note_widget(self, delta):
+        if delta.WhichOneof("type") != "new_element": return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        widget = getattr(element, kind, None)
+        if getattr(widget, "id", ""): self.widgets.setdefault(widget.id, (kind, delta.fragment_id))
+
+    def find(self, kind, label_contains=""):
+        for wid, (k, fragment) in self.widgets.items():
+            if k == kind and label_contains in wid: return wid, fragment
+        raise LookupError(f"no {kind} widget matching {label_contains!r}")
+
+
+async def measure(script, repeats):
+    proc, port = start_server(script)
+    try:
+        async with connect(f"ws://127.0.0.1:{port}/_stcore/stream", max_size=64 * 1024 * 1024) as ws:
+            return await _interact(Session(ws), repeats)
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+async def _interact(session, repeats):
+    cold = await session.rerun()
+    radio_id, radio_fragment = session.find("radio", "active_tab")
+    slider_id, slider_fragment = session.find("slider")
+    try: flex_id, flex_fragment = session.find("slider", "tornado_pct")
+    except LookupError: flex_id = None  # scripts without the sensitivity panel
+    results = {"initial load": [cold], "tab switch": [], "slider drag": []}
+    if flex_id: results["tornado flex"] = []
+    for i in range(repeats):
+        tab = radio_state(radio_id, VIEWS[i % 2])
+        results["tab switch"].append(await session.rerun([tab], radio_fragment))
+        drag = slider_state(slider_id, 17 + i % 3)
+        results["slider drag"].append(await session.rerun([drag, tab], slider_fragment))
+        if flex_id: results["tornado flex"].append(await session.rerun([slider_state(flex_id, 5 + i % 4 * 5)], flex_fragment))
+    return results
+
+
+def main(script="app.py", repeats=20):
+    results = asyncio.run(measure(script, repeats))
+    print(f"{script}: median over {repeats} interactions")
+    for name, runs in results.items():
+        latency = statistics.median(r[0] for r in runs) * 1000
+        deltas = statistics.median(r[1] for r in runs)
+        print(f"  {name:<13} {latency:7.1f} ms   {deltas:5.0f} deltas")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else "app.py", int(sys.argv[2]) if len(sys.argv) > 2 else 20)
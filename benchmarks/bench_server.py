@@ -0,0 +1,97 @@
+"""Load-tests the HTTP scoring service: p50/p99 latency and requests/second, micro-batched vs one engine call per request.
+
+Starts `python -m mustard_engine.server` in a subprocess for each mode and drives it from here with many concurrent
+keep-alive connections, each sending single-scenario requests back to back. Then streams a bulk NDJSON request.
+
+Run from the repo root: python benchmarks/bench_server.py [connections] [requests_per_connection]
+"""
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODES = {"per request (--max-batch 1)": ["--max-batch", "1"], "micro-batched (--window-ms 2)": ["--window-ms", "2"]}
+
+
+def start(args):
+    proc = subprocess.Popen([sys.executable, "-m", "mustard_engine.server", "--port", "0", *args], cwd=ROOT, stdout=subprocess.PIPE, text=True)
+    port = int(proc.stdout.readline().rsplit(":", 1)[1].split()[0])
+    return proc, port
+
+
+def request(body, path="/v1/metrics?columns=annual_pat,roce_pat"):
+    return f"POST {path} HTTP/1.1\r\nHost: localhost\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+
+
+async def read_response(reader):
+    head = await reader.readuntil(b"\r\n\r\n")
+    length = int(head.split(b"Content-Length: ")[1].split(b"\r\n")[0])
+    return head, await reader.readexactly(length)
+
+
+async def client(port, payloads, latencies):
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    for payload in payloads:
+        t0 = time.perf_counter()
+        writer.write(payload)
+        head, body = await read_response(reader)
+        latencies.append(time.perf_counter() - t0)
+        if not head.startswith(b"HTTP/1.1 200"): raise SystemExit(f"server error: {head!r} {body!r}")
+    writer.close()
+
+
+async def load(port, connections, per_connection):
+    rng = np.random.default_rng(0)
+    payloads = [[request(json.dumps({"seed_purchase_price": float(s)}).encode()) for s in rng.normal(50000, 2000, per_connection).round()]
+                for _ in range(connections)]
+    latencies = []
+    t0 = time.perf_counter()
+    await asyncio.gather(*(client(port, p, latencies) for p in payloads))
+    elapsed = time.perf_counter() - t0
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /v1/health HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    health = json.loads((await read_response(reader))[1])
+    writer.close()
+    return np.array(latencies), elapsed, health
+
+
+async def bulk(port, n):
+    body = "".join(json.dumps({"id": i, "seed_purchase_price": 40000 + i % 25000}) + "\n" for i in range(n)).encode()
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    t0 = time.perf_counter()
+    writer.write(request(body, "/v1/metrics/bulk?columns=annual_pat,roce_pat"))
+    await reader.readuntil(b"\r\n\r\n")
+    rows, first = 0, None
+    while True:
+        size = int(await reader.readline(), 16)
+        data = await reader.readexactly(size + 2)
+        if size == 0: break
+        first = first or time.perf_counter() - t0
+        rows += data.count(b"\n") - 1
+    writer.close()
+    return rows, first, time.perf_counter() - t0
+
+
+def main(connections=64, per_connection=100):
+    results = {}
+    for mode, args in MODES.items():
+        proc, port = start(args)
+        try:
+            latencies, elapsed, health = asyncio.run(load(port, connections, per_connection))
+            if mode == list(MODES)[-1]: rows, first, total = asyncio.run(bulk(port, 200_000))
+        finally: proc.terminate()
+        results[mode] = len(latencies) / elapsed
+        p50, p99 = np.percentile(latencies, [50, 99]) * 1000
+        print(f"{mode:30s} {connections} connections: p50 {p50:6.2f} ms  p99 {p99:6.2f} ms  {results[mode]:8,.0f} req/s  "
+              f"(mean batch {health['mean_batch']:.1f} scenarios)")
+    print(f"micro-batching: {results[list(MODES)[1]] / results[list(MODES)[0]]:.1f}x the requests/second of per-request evaluation")
+    print(f"bulk NDJSON: {rows:,} scenarios streamed in {total:.2f} s ({rows / total:,.0f} rows/s), first results after {first * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    main(*(int(a) for a in sys.argv[1:3]))
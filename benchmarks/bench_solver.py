@@ -0,0 +1,38 @@
+"""Times vectorized goal seek and checks every converged answer by re-running the scalar engine.
+
+Run from the repo root: python benchmarks/bench_solver.py [n_lanes]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from mustard_engine import EngineInputs, calculate_all_metrics
+from mustard_engine.solver import goal_seek, goal_seek_batch
+
+QUESTIONS = (("seed_purchase_price", "annual_pat", 0.0), ("oil_blend_sell_price", "roce_pat", 20.0), ("seed_input_mt", "annual_ebit", 0.0),
+             ("kachi_ghani_pungency", "market_oil_to_add_mt", 5.0))
+
+
+def main(n=10_000):
+    p = EngineInputs()
+    for name, output, target in QUESTIONS:
+        t0 = time.perf_counter()
+        sol = goal_seek(p, name, output, target)
+        elapsed = time.perf_counter() - t0
+        check = calculate_all_metrics(p.replace(**{name: sol.value}))[output]
+        print(f"  {name} for {output} = {target:g}: {sol.value:,.4f} ({sol.iterations} iterations, {elapsed * 1000:.1f} ms, engine gives {check:,.6g})")
+    capex = np.linspace(1e8, 5e8, n)
+    t0 = time.perf_counter()
+    sol = goal_seek_batch({"capex": capex}, "oil_blend_sell_price", "roce_pat", 20.0)
+    elapsed = time.perf_counter() - t0
+    sample = np.random.default_rng(0).choice(n, 200, replace=False)
+    worst = max(abs(calculate_all_metrics(p.replace(capex=float(capex[i]), oil_blend_sell_price=float(sol.value[i])))["roce_pat"] - 20.0) for i in sample)
+    print(f"{n:,} capex scenarios, oil price for 20% ROCE: {elapsed * 1000:.0f} ms, {sol.converged.mean():.1%} converged, worst miss {worst:.1e} pp")
+    if not sol.converged.all() or worst > 1e-6: raise SystemExit("goal seek missed its target")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 10_000)
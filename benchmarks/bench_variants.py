@@ -0,0 +1,68 @@
+"""Times the dashboard and legacy (`mustard.py`) variants of the batch kernel, and checks the legacy variant against
+a line-by-line scalar transcription of `mustard.py`.
+
+Run from the repo root: python benchmarks/bench_variants.py [n_scenarios]
+"""
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from bench_batch import random_scenarios
+from mustard_engine import calculate_metrics_batch
+from mustard_engine.variants import DASHBOARD, LEGACY, compare_variants
+
+
+def mustard_py(p, market_oil):
+    """`mustard.py`'s formulas, written out as that script computes them (for engine inputs `p`)."""
+    seed = p["seed_input_mt"]
+    kg_oil, exp_oil = seed * p["kachi_ghani_yield_pct"] / 100, seed * p["expeller_yield_pct"] / 100
+    total_oil = kg_oil + exp_oil + market_oil
+    pungency = (kg_oil * p["kachi_ghani_pungency"] + exp_oil * p["expeller_oil_pungency"]) / total_oil if total_oil else 0.0
+    exp_used, exp_sold = exp_oil, 0.0
+    if pungency < 0.27 and total_oil > 0:
+        if p["kachi_ghani_pungency"] == p["expeller_oil_pungency"]: exp_used = 0.0
+        else: exp_used = min(exp_oil, max(0, kg_oil * (p["kachi_ghani_pungency"] - 0.27) / (0.27 - p["expeller_oil_pungency"])))
+        exp_sold = exp_oil - exp_used
+    blend = kg_oil + exp_used + market_oil
+    water, salt = seed * p["water_added_pct"] / 100, seed * p["salt_added_pct"] / 100
+    moc = seed * (100 - p["kachi_ghani_yield_pct"] - p["expeller_yield_pct"]) / 100 + water + salt
+    revenue = blend * p["oil_blend_sell_price"] + exp_sold * p["expeller_oil_sell_price"] + moc * p["moc_sell_price"]
+    cogs = seed * p["seed_purchase_price"] + market_oil * p["market_bought_oil_price"] + water * p["water_cost_per_kg"] + salt * p["salt_cost_per_kg"]
+    ebitda = revenue - cogs - seed * (p["processing_cost_per_mt"] + p["other_variable_costs_per_mt"]) - p["other_expenses_daily"]
+    hoard = seed * p["production_days_per_month"] * p["rm_hoard_months"] * p["hoarded_rm_rate"]
+    inventory = (hoard + seed * p["rm_safety_stock_days"] * p["seed_purchase_price"] + blend * p["fg_oil_safety_days"] * p["oil_blend_sell_price"]
+                 + moc * p["fg_moc_safety_days"] * p["moc_sell_price"])
+    debtors = blend * p["oil_blend_sell_price"] * p["oil_debtor_days"] + moc * p["moc_sell_price"] * p["moc_debtor_days"]
+    wc = inventory + debtors - seed * p["creditor_days"] * p["seed_purchase_price"]
+    pbt = ebitda * p["production_days_per_month"] * 12 - p["capex"] / 96 * 12 - (wc + p["capex"]) * 0.12
+    return {"daily_total_revenue": revenue, "daily_ebitda": ebitda, "annual_pbt": pbt, "capital_employed": p["capex"] + wc + p["other_assets"],
+            "net_wc_requirement": wc - hoard * p["rm_hoard_financed_pct"] / 100}
+
+
+def main(n=100_000):
+    cols = random_scenarios(n)
+    for variant in (DASHBOARD, LEGACY.replace(market_oil_mt=10.0)):
+        calculate_metrics_batch(cols, variant)
+        t0 = time.perf_counter()
+        calculate_metrics_batch(cols, variant)
+        print(f"{variant.name:>9}: {n:,} scenarios in {(time.perf_counter() - t0) * 1000:.1f} ms")
+    t0 = time.perf_counter()
+    diff = compare_variants(cols, other=LEGACY.replace(market_oil_mt=10.0), outputs=["annual_pat", "roce_pat"])
+    print(f"compare_variants (both runs and the diff): {(time.perf_counter() - t0) * 1000:.1f} ms; "
+          f"legacy minus dashboard annual PAT, median ₹ {np.median(diff.delta['annual_pat']):,.0f}")
+
+    rng, worst = np.random.default_rng(1), 0.0
+    market_oil = rng.uniform(0, 40, n)
+    out = calculate_metrics_batch(cols, LEGACY.replace(market_oil_mt=market_oil))
+    for i in rng.choice(n, min(n, 2000), replace=False):
+        expected = mustard_py({k: float(v[i]) for k, v in cols.items()}, float(market_oil[i]))
+        worst = max(worst, max(abs(out[k][i] - v) / max(1.0, abs(v)) for k, v in expected.items()))
+    print(f"parity vs mustard.py: worst relative error {worst:.2e} over {min(n, 2000):,} scenarios")
+    if worst > 1e-9: raise SystemExit("the legacy variant drifted from mustard.py")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
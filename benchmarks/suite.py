@@ -0,0 +1,262 @@
+"""Benchmark and regression suite: micro-benchmarks, full-script reruns of `app.py` and `mustard.py` through
+Streamlit's headless AppTest harness, peak memory, and golden outputs for reference scenarios, all checked against
+`benchmarks/baseline.json`.
+
+    python benchmarks/suite.py                    # run every part, compare with the baseline, exit 1 on a regression
+    python benchmarks/suite.py --only golden,micro
+    python benchmarks/suite.py --update           # re-pin the baseline from this run (after an intended change)
+
+Parts: `micro` (engine, formatting and P&L render calls), `app` (first run and a sidebar-change rerun of each
+script), `memory` (tracemalloc peaks) and `golden` (engine metrics, agreement of the scalar, graph, batch and
+autodiff evaluations of the model, the legacy variant, a blend plan and the figures each script displays). Every
+run writes its figures to `benchmarks/last_run.json`.
+
+Thresholds live in the baseline's "thresholds": a timing or memory figure regresses when it exceeds its baseline by
+more than the part's ratio. Timings are first scaled by a reference workload timed in the same run, which absorbs
+most of the difference between machines and between a quiet and a busy one; re-pin with `--update` after moving to
+very different hardware. Golden numbers must match to a relative `golden` tolerance, and golden strings exactly.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+os.environ.setdefault("MUSTARD_SCENARIO_DB", os.path.join(tempfile.mkdtemp(prefix="mustard-suite-"), "scenarios.sqlite"))  # keep runs off the real library
+from mustard_engine import EngineInputs, calculate_all_metrics, calculate_metrics_batch, format_indian, format_indian_array
+from mustard_engine.autodiff import jacobian
+from mustard_engine.blending import optimize_blend
+from mustard_engine.graph import MetricsGraph
+from mustard_engine.render import _cached_views, pnl_views, render_pnl
+from mustard_engine.variants import LEGACY, LEGACY_INPUTS
+
+BASELINE = os.path.join(ROOT, "benchmarks", "baseline.json")
+LAST_RUN = os.path.join(ROOT, "benchmarks", "last_run.json")
+PARTS = ("micro", "app", "memory", "golden")
+DEFAULT_THRESHOLDS = {"micro": 1.75, "app": 1.75, "memory": 1.25, "golden": 1e-9}
+
+# Input overrides on the dashboard defaults; together they cover every pungency branch and both financing legs.
+REFERENCE_SCENARIOS = {
+    "dashboard defaults": {},
+    "low pungency": {"kachi_ghani_pungency": 0.25, "expeller_oil_pungency": 0.1},
+    "compliant blend": {"kachi_ghani_pungency": 0.27, "expeller_oil_pungency": 0.27},
+    "debt funded, hoard financed": {"equity_in_capex_pct": 40, "rm_hoard_months": 4, "rm_hoard_financed_pct": 70, "main_financing_rate_pa": 11.5},
+    "loss making": {"seed_purchase_price": 64000, "oil_blend_sell_price": 128000},
+    "idle plant": {"seed_input_mt": 0},
+}
+REFERENCE_LOTS = {"seed_input_mt": [60.0, 70.0, 40.0, 22.0], "seed_purchase_price": [51000.0, 49500.0, 48000.0, 52500.0],
+                  "kachi_ghani_pungency": [0.48, 0.36, 0.22, 0.31], "expeller_oil_pungency": [0.14, 0.09, 0.12, 0.2]}
+SCRIPTS = {"app.py": ("slider", "Kachi Ghani Oil Pungency (%)", (0.35, 0.45)), "mustard.py": ("number_input", "Seed Input (MT)", (180.0, 220.0))}
+
+
+def best_of(fn, number, repeat=7):
+    """Seconds per call: the best of `repeat` timings of `number` calls."""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(number): fn()
+        times.append((time.perf_counter() - t0) / number)
+    return min(times)
+
+
+def reference_work():
+    """A fixed mix of interpreter and NumPy work. Timings are compared relative to it, so a slower or busier machine
+    than the baseline's does not read as a regression."""
+    total = 0.0
+    for i in range(2000): total += i * 1.5 / (i + 1)
+    return total + float(np.sqrt(np.arange(20000.0)).sum())
+
+
+def calibrate():
+    return best_of(reference_work, 20)
+
+
+# --- Parts ---
+def micro():
+    p = EngineInputs()
+    metrics = calculate_all_metrics(p)
+    rng = np.random.default_rng(0)
+    cols = {"seed_purchase_price": rng.uniform(40000, 65000, 100_000), "kachi_ghani_pungency": rng.uniform(0.2, 0.6, 100_000)}
+    amounts = rng.choice([-1.0, 1.0], 100_000) * 10 ** rng.uniform(2, 10, 100_000)
+    graph, prices = MetricsGraph(p), iter(np.tile([49000.0, 51000.0], 1_000_000))
+    return {
+        "calculate_all_metrics": best_of(lambda: calculate_all_metrics(p), 2000),
+        "calculate_metrics_batch (100k scenarios)": best_of(lambda: calculate_metrics_batch(cols), 3),
+        "MetricsGraph.update (one input) + metrics": best_of(lambda: graph.update(seed_purchase_price=next(prices)).metrics(), 2000),
+        "format_indian": best_of(lambda: format_indian(-123456789.25), 20000),
+        "format_indian_array (100k values)": best_of(lambda: format_indian_array(amounts), 3),
+        "render_pnl (one period, uncached)": best_of(lambda: render_pnl(metrics, "Annual"), 500),
+        "pnl_views (all periods, cold)": best_of(lambda: (_cached_views.cache_clear(), pnl_views(metrics)), 200),
+    }
+
+
+def _apptest(script):
+    from streamlit.testing.v1 import AppTest
+    return AppTest.from_file(os.path.join(ROOT, script), default_timeout=300)
+
+
+def _checked(at):
+    if at.exception: raise RuntimeError(f"{at._script_path} raised: {at.exception[0].value}")
+    return at
+
+
+def app(repeats=5):
+    out = {}
+    for script, (kind, label, values) in SCRIPTS.items():
+        _checked(_apptest(script).run())  # imports and first-use caches, so the timings below are steady-state
+        first, rerun = [], []
+        for i in range(repeats):
+            t0 = time.perf_counter()
+            at = _checked(_apptest(script).run())
+            first.append(time.perf_counter() - t0)
+            widget = next(w for w in getattr(at, kind) if w.label == label)
+            t0 = time.perf_counter()
+            widget.set_value(values[i % 2]).run()
+            rerun.append(time.perf_counter() - t0)
+            _checked(at)
+        out[f"{script} first run"], out[f"{script} rerun after a sidebar change"] = statistics.median(first), statistics.median(rerun)
+    return out
+
+
+def _peak_mb(fn):
+    tracemalloc.start()
+    try:
+        fn()
+        return tracemalloc.get_traced_memory()[1] / 2**20
+    finally: tracemalloc.stop()
+
+
+def memory():
+    cols = {"seed_purchase_price": np.random.default_rng(0).uniform(40000, 65000, 100_000)}
+    out = {"calculate_metrics_batch (100k scenarios)": _peak_mb(lambda: calculate_metrics_batch(cols))}
+    for script in SCRIPTS:
+        _checked(_apptest(script).run())
+        out[f"{script} first run"] = _peak_mb(lambda: _checked(_apptest(script).run()))
+    return out
+
+
+def engines_agree(changes, rel_tol=DEFAULT_THRESHOLDS["golden"]):
+    """"agree", or which metrics differ between `calculate_all_metrics` and the other evaluations of the model: a
+    `MetricsGraph` updated incrementally from the defaults, the batch engine and the Jacobian's values."""
+    p = EngineInputs().replace(**changes)
+    scalar = calculate_all_metrics(p)
+    others = {"graph": MetricsGraph(EngineInputs()).update(**p.as_dict()).metrics(),
+              "batch": {k: v[0] for k, v in calculate_metrics_batch({k: [v] for k, v in p.as_dict().items()}).items()},
+              "autodiff": jacobian(p).values}
+    differ = [f"{engine}: {k}" for engine, metrics in others.items() for k, v in metrics.items()
+              if k in scalar and not _close(scalar[k] if isinstance(v, str) else float(scalar[k]), v if isinstance(v, str) else float(v), rel_tol)]
+    return f"differ on {', '.join(differ)}" if differ else "agree"
+
+
+def golden():
+    out = {}
+    for name, changes in REFERENCE_SCENARIOS.items():
+        metrics = calculate_all_metrics(EngineInputs().replace(**changes))
+        out[f"engine: {name}"] = {k: v if isinstance(v, str) else float(v) for k, v in metrics.items()}
+    # Core, graph, batch and autodiff must give the same numbers; pinned as "agree", so any drift fails the suite.
+    out["engines agree"] = {name: engines_agree(changes) for name, changes in REFERENCE_SCENARIOS.items()}
+    legacy = calculate_metrics_batch({k: [v] for k, v in LEGACY_INPUTS.items()}, LEGACY.replace(market_oil_mt=10.0))
+    out["legacy variant: mustard.py defaults, 10 MT market oil"] = {k: float(v[0]) for k, v in legacy.items()}
+    plan = optimize_blend(REFERENCE_LOTS, EngineInputs(), max_market_oil_mt=15.0)
+    out["blend plan: reference lots"] = {k: v.tolist() if isinstance(v, np.ndarray) else float(v) for k, v in plan._asdict().items()}
+    at = _checked(_apptest("app.py").run())
+    for panel in at.expander:  # collapsed panels skip their work; open every one so its figures are shown
+        if (panel.key or "").startswith("panel_"): at.session_state[panel.key] = True
+    at = _checked(at.run())
+    out["app.py display"] = {f"{m.label} #{i}": f"{m.value} | {m.delta or ''}" for i, m in enumerate(at.metric)}
+    at = _checked(_apptest("mustard.py").run())
+    out["mustard.py display"] = {f"line {i:02d}": m.value for i, m in enumerate(at.markdown) if "**" in m.value} | {f"info {i}": m.value for i, m in enumerate(at.info)}
+    return out
+
+
+# --- Comparison ---
+def _close(a, b, rel_tol):
+    if isinstance(a, list) and isinstance(b, list): return len(a) == len(b) and all(_close(x, y, rel_tol) for x, y in zip(a, b))
+    if isinstance(a, (int, float)) and isinstance(b, (int, float)): return abs(a - b) <= rel_tol * max(1.0, abs(a), abs(b))
+    return a == b
+
+
+def compare(results, baseline):
+    """Prints every figure against its baseline; returns the number of regressions."""
+    thresholds, failures = {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}, 0
+    speed = results["calibration"] / baseline["calibration"] if baseline.get("calibration") else 1.0
+    print(f"reference workload: {results['calibration'] * 1000:.3f} ms, x{speed:.2f} the baseline's (timing ratios below are adjusted for it)")
+    for part in PARTS:
+        if part not in results: continue
+        print(f"\n[{part}]")
+        pinned = baseline.get(part, {})
+        if part == "golden":
+            for group, values in results[part].items():
+                pinned_group = pinned.get(group)
+                if pinned_group is None:
+                    print(f"  NEW   {group}: not in the baseline")
+                    continue
+                drift = [k for k in pinned_group if k not in values or not _close(pinned_group[k], values[k], thresholds["golden"])]
+                added = [k for k in values if k not in pinned_group]
+                failures += bool(drift)
+                print(f"  {'FAIL' if drift else 'ok  '}  {group}: {len(pinned_group) - len(drift)}/{len(pinned_group)} match"
+                      + (f"; new: {', '.join(added)}" if added else ""))
+                for k in drift[:10]: print(f"          {k}: {pinned_group[k]!r} -> {values.get(k, '<missing>')!r}")
+            continue
+        unit, scale = ("MB", 1) if part == "memory" else ("ms", 1000)
+        for name, value in results[part].items():
+            base = pinned.get(name)
+            ratio = value / (base * (1.0 if part == "memory" else speed)) if base else None
+            bad = ratio is not None and ratio > thresholds[part]
+            failures += bad
+            status = "NEW " if base is None else "FAIL" if bad else "ok  "
+            shown = f"{value * scale:12.4f} {unit}" + ("" if base is None else f"   baseline {base * scale:12.4f}   x{ratio:.2f} (limit x{thresholds[part]:g})")
+            print(f"  {status}  {name:<45}{shown}")
+    return failures
+
+
+def environment():
+    import streamlit
+    return {"python": platform.python_version(), "numpy": np.__version__, "streamlit": streamlit.__version__,
+            "machine": platform.machine(), "processor": platform.processor() or platform.platform(), "cpus": os.cpu_count()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the benchmark and regression suite against benchmarks/baseline.json.")
+    parser.add_argument("--only", default=",".join(PARTS), help=f"comma-separated parts to run (default: all of {', '.join(PARTS)})")
+    parser.add_argument("--update", action="store_true", help="write this run's figures into the baseline instead of failing on them")
+    parser.add_argument("--baseline", default=BASELINE)
+    args = parser.parse_args(argv)
+    parts = [p for p in args.only.split(",") if p]
+    unknown = set(parts).difference(PARTS)
+    if unknown: parser.error(f"unknown parts: {sorted(unknown)}")
+    runners = {"micro": micro, "app": app, "memory": memory, "golden": golden}
+    results, speeds = {}, [calibrate()]
+    for part in parts:
+        t0 = time.perf_counter()
+        results[part] = runners[part]()
+        speeds.append(calibrate())
+        print(f"ran {part} in {time.perf_counter() - t0:.1f} s", file=sys.stderr)
+    results["calibration"] = min(speeds)
+    results["environment"] = environment()
+    with open(LAST_RUN, "w") as f: json.dump(results, f, indent=1, ensure_ascii=False)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline) as f: baseline = json.load(f)
+    if args.update:
+        baseline = {"thresholds": {**DEFAULT_THRESHOLDS, **baseline.get("thresholds", {})}, **{k: v for k, v in baseline.items() if k != "thresholds"}, **results}
+        with open(args.baseline, "w") as f: json.dump(baseline, f, indent=1, ensure_ascii=False)
+        print(f"baseline updated: {', '.join(parts)} -> {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+    if baseline.get("environment") and baseline["environment"] != results["environment"]:
+        print(f"note: the baseline was recorded on {baseline['environment']}; timings may not compare")
+    failures = compare(results, baseline)
+    print(f"\n{failures} regression(s)" if failures else "\nno regressions")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,18 +1,8 @@
 import streamlit as st
 
-def format_cr(n):
-    try:
-        n = float(n)
-    except:
-        return n
-    return f"₹{n/1e7:.2f} Cr"
-
-def format_inr(n):
-    try:
-        n = float(n)
-    except:
-        return n
-    return f"₹{n:,.0f}"
+from mustard_engine import MIN_PUNGENCY_REQ, PUNGENCY_HIGH, PUNGENCY_LOW, calculate_metrics_batch
+from mustard_engine.formatting import format_cr, format_inr
+from mustard_engine.variants import LEGACY
 
 st.set_page_config(page_title="Mustard Plant Dashboard", layout="wide")
 
@@ -63,123 +53,21 @@ with colm:
 
 st.markdown("---")
 
-# --- Section: Processing & Revenue Logic ---
-kg_oil = seed_input * (kg_oil_yield_pct / 100)
-exp_oil = seed_input * (exp_oil_yield_pct / 100)
-total_oil = kg_oil + exp_oil + market_oil
-
-# Blend Pungency Calculation
-blend_pungency = (
-    (kg_oil * kg_pungency) +
-    (exp_oil * exp_pungency) +
-    (market_oil * 0)
-) / total_oil if total_oil else 0.0
-
-st.subheader("Blend Pungency")
-st.markdown(f"**Blend Pungency:** {blend_pungency:.4f} %")
-
-# --- Pungency Adjustment Logic ---
-pungency_ok = abs(blend_pungency - 0.27) < 1e-6 or blend_pungency == 0.27
-
-recommendation_msg = ""
-exp_oil_used_in_blend = exp_oil
-exp_oil_sold_separately = 0
-market_oil_needed = 0
-market_oil_profit = 0
-exp_oil_loss = 0
-
-if blend_pungency < 0.27 and total_oil > 0:
-    if kg_pungency == exp_pungency:
-        max_exp_oil_blend = 0
-    else:
-        max_exp_oil_blend = max(0, ((kg_oil * (kg_pungency - 0.27)) / (0.27 - exp_pungency)))
-        max_exp_oil_blend = min(exp_oil, max_exp_oil_blend)
-    exp_oil_used_in_blend = max_exp_oil_blend
-    exp_oil_sold_separately = exp_oil - exp_oil_used_in_blend
-    exp_oil_loss = exp_oil_sold_separately * (oil_sell_price - exp_oil_sell_price)
-    recommendation_msg = (
-        f"⚠️ **Blend pungency is below 0.27.**\n\n"
-        f"To achieve compliance, reduce expeller oil in blend to **{exp_oil_used_in_blend:.2f} MT**. "
-        f"Excess expeller oil (**{exp_oil_sold_separately:.2f} MT**) will be sold separately, resulting in a loss of "
-        f"{format_inr(exp_oil_loss)} per day."
-    )
-elif blend_pungency > 0.27 and total_oil > 0:
-    numerator = (kg_oil * kg_pungency) + (exp_oil * exp_pungency)
-    denominator = 0.27
-    if denominator > 0:
-        market_oil_needed = max(0, (numerator / denominator) - (kg_oil + exp_oil))
-    else:
-        market_oil_needed = 0
-    market_oil_profit = (oil_sell_price - market_oil_price) * market_oil_needed
-    recommendation_msg = (
-        f"ℹ️ **Blend pungency is above 0.27.**\n\n"
-        f"To optimize cost, you may add **{market_oil_needed:.2f} MT** of market oil (0% pungency) to bring the blend to 0.27. "
-        f"This could add a profit of {format_inr(market_oil_profit)} per day. "
-        f"(This is a recommendation; you may choose to act or ignore.)"
-    )
-else:
-    recommendation_msg = "✅ **Blend pungency is at the required 0.27. No adjustment needed.**"
-
-st.info(recommendation_msg)
-
-# --- Revenue Calculations ---
-oil_blend = kg_oil + exp_oil_used_in_blend + market_oil
-oil_blend_revenue = oil_blend * oil_sell_price
-exp_oil_revenue = exp_oil_sold_separately * exp_oil_sell_price
-
-# MoC Enhancement
-base_moc = seed_input * (moc_base_yield_pct / 100)
-water_moc = seed_input * (water_pct / 100)
-salt_moc = seed_input * (salt_pct / 100)
-enhanced_moc = base_moc + water_moc + salt_moc
-moc_enhance_cost = (water_moc * water_cost) + (salt_moc * salt_cost)
-moc_revenue = enhanced_moc * moc_sell_price
+# --- Section: Pungency (filled in once every input is read; the engine runs once, below) ---
+pungency_section = st.container()
 
 # --- Section: Costing & Margins ---
 processing_cost = st.number_input("Processing Cost (₹/MT)", min_value=0.0, value=1300.0, format="%.2f")
 other_variable_costs = st.number_input("Other Variable Costs (₹/MT)", min_value=0.0, value=2300.0, format="%.2f")
 other_expenses = st.number_input("Other Expenses (₹/day)", min_value=0.0, value=0.0, format="%.2f")
 
-# COGS Calculation (Seed, Market Oil, MoC Enhancement)
-cogs = (seed_input * seed_price) + (market_oil * market_oil_price) + moc_enhance_cost
-cogs_percent = (cogs / (oil_blend_revenue + exp_oil_revenue + moc_revenue) * 100) if (oil_blend_revenue + exp_oil_revenue + moc_revenue) else 0
-
-# GM Calculation
-gm = oil_blend_revenue + exp_oil_revenue + moc_revenue - cogs
-gm_percent = (gm / (oil_blend_revenue + exp_oil_revenue + moc_revenue) * 100) if (oil_blend_revenue + exp_oil_revenue + moc_revenue) else 0
-
-# Processing Cost Calculation
-processing_cost_total = seed_input * processing_cost
-processing_cost_percent = (processing_cost_total / (oil_blend_revenue + exp_oil_revenue + moc_revenue) * 100) if (oil_blend_revenue + exp_oil_revenue + moc_revenue) else 0
-
-# CM Calculation
-cm = gm - processing_cost_total
-cm_percent = (cm / (oil_blend_revenue + exp_oil_revenue + moc_revenue) * 100) if (oil_blend_revenue + exp_oil_revenue + moc_revenue) else 0
-
-# Variable Cost Calculation
-variable_cost_total = seed_input * other_variable_costs
-variable_cost_percent = (variable_cost_total / (oil_blend_revenue + exp_oil_revenue + moc_revenue) * 100) if (oil_blend_revenue + exp_oil_revenue + moc_revenue) else 0
-
-# EBITDA Calculation
-ebitda = cm - variable_cost_total - other_expenses
-ebitda_percent = (ebitda / (oil_blend_revenue + exp_oil_revenue + moc_revenue) * 100) if (oil_blend_revenue + exp_oil_revenue + moc_revenue) else 0
-
 # --- Monthly & Annual Projections ---
 prod_days = st.number_input("Production Days per Month", min_value=1, value=24)
 capex = st.number_input("Capex (₹)", min_value=0.0, value=170000000.0, format="%.2f")
-depreciation = capex / 96
-st.markdown(f"**Depreciation (₹/month):** {depreciation:,.0f}")
+depreciation_section = st.container()
 tax_rate = st.number_input("Tax Rate (%)", min_value=0.0, max_value=100.0, value=25.0, format="%.2f")
 other_assets = st.number_input("Other Assets (₹)", min_value=0.0, value=0.0, format="%.2f")
 
-# Annualization
-annual_gm = gm * prod_days * 12
-annual_cm = cm * prod_days * 12
-annual_ebitda = ebitda * prod_days * 12
-annual_processing_cost = processing_cost_total * prod_days * 12
-annual_variable_cost = variable_cost_total * prod_days * 12
-annual_other_expenses = other_expenses * prod_days * 12
-
 # --- Working Capital & Warehouse Financing ---
 st.header("Working Capital & Warehouse Financing")
 
@@ -199,61 +87,76 @@ with col17:
     debtor_oil_days = st.number_input("Oil Debtor Cycle (days)", min_value=0, value=5)
     debtor_moc_days = st.number_input("MoC Debtor Cycle (days)", min_value=0, value=5)
 
-daily_seed_consumption = seed_input
-monthly_seed_consumption = daily_seed_consumption * prod_days
-
-# RM Inventory
-rm_hoarded_qty = monthly_seed_consumption * hoard_months
-rm_hoarded_val = rm_hoarded_qty * hoarded_rm_rate
-rm_safety_stock_qty = daily_seed_consumption * rm_safety_stock_days
-rm_safety_stock_val = rm_safety_stock_qty * seed_price
-
-# FG Inventory
-daily_oil_output = oil_blend
-daily_moc_output = enhanced_moc
-fg_oil_inventory = daily_oil_output * fg_oil_ss_days * oil_sell_price
-fg_moc_inventory = daily_moc_output * fg_moc_ss_days * moc_sell_price
-
-# Debtors
-oil_debtors = daily_oil_output * oil_sell_price * debtor_oil_days
-moc_debtors = daily_moc_output * moc_sell_price * debtor_moc_days
-total_debtors = oil_debtors + moc_debtors
-
-# Creditors
-creditors = daily_seed_consumption * creditors_days * seed_price
-
-# Inventory
-total_inventory = rm_hoarded_val + rm_safety_stock_val + fg_oil_inventory + fg_moc_inventory
-
-# Company-funded RM (excluding financed)
-rm_company_val = rm_hoarded_qty * (1 - financed_pct / 100) * hoarded_rm_rate
-
-# Total Working Capital
+# --- Run the engine: this model's rules are the `legacy` variant of the shared batch kernel ---
+inputs = {
+    "seed_input_mt": seed_input, "kachi_ghani_yield_pct": kg_oil_yield_pct, "expeller_yield_pct": exp_oil_yield_pct,
+    "seed_purchase_price": seed_price, "hoarded_rm_rate": hoarded_rm_rate, "oil_blend_sell_price": oil_sell_price,
+    "expeller_oil_sell_price": exp_oil_sell_price, "market_bought_oil_price": market_oil_price, "moc_sell_price": moc_sell_price,
+    "kachi_ghani_pungency": kg_pungency, "expeller_oil_pungency": exp_pungency, "water_added_pct": water_pct, "water_cost_per_kg": water_cost,
+    "salt_added_pct": salt_pct, "salt_cost_per_kg": salt_cost, "processing_cost_per_mt": processing_cost,
+    "other_variable_costs_per_mt": other_variable_costs, "other_expenses_daily": other_expenses, "production_days_per_month": prod_days,
+    "capex": capex, "tax_rate_pct": tax_rate, "other_assets": other_assets, "rm_hoard_months": hoard_months,
+    "rm_hoard_financed_pct": financed_pct, "warehouse_finance_rate_pa": warehouse_int_rate, "rm_safety_stock_days": rm_safety_stock_days,
+    "creditor_days": creditors_days, "fg_oil_safety_days": fg_oil_ss_days, "fg_moc_safety_days": fg_moc_ss_days,
+    "oil_debtor_days": debtor_oil_days, "moc_debtor_days": debtor_moc_days,
+}
+m = {k: float(v[0]) for k, v in calculate_metrics_batch({k: [v] for k, v in inputs.items()}, LEGACY.replace(market_oil_mt=market_oil)).items()}
+
+revenue = m["daily_total_revenue"]
+share = lambda value: value / revenue * 100 if revenue else 0
+cogs, gm, cm, ebitda = m["daily_cogs"], m["daily_gm"], m["daily_cm"], m["daily_ebitda"]
+processing_cost_total, variable_cost_total = m["daily_processing_cost"], m["daily_variable_cost"]
+annual_days = prod_days * 12
+annual_interest, annual_depreciation, annual_pbt, annual_ebitda = m["annual_interest"], m["annual_depreciation"], m["annual_pbt"], m["annual_ebitda"]
+total_debtors, creditors, total_inventory = m["total_debtors"], m["trade_creditors"], m["total_inventory"]
 total_wc_incl_financed = total_inventory + total_debtors - creditors
-total_wc_excl_financed = rm_company_val + rm_safety_stock_val + fg_oil_inventory + fg_moc_inventory + total_debtors - creditors
-
-# Interest Calculation (12% p.a. on WC including financed + Capex)
-annual_interest = (total_wc_incl_financed + capex) * 0.12
-
-# Depreciation
-annual_depreciation = depreciation * 12
-
-# Annual PBT
-annual_pbt = annual_ebitda - annual_depreciation - annual_interest
+total_wc_excl_financed = m["net_wc_requirement"]
+
+with depreciation_section:
+    st.markdown(f"**Depreciation (₹/month):** {annual_depreciation / 12:,.0f}")
+
+with pungency_section:
+    blend_pungency = m["initial_blend_pungency"]
+    st.subheader("Blend Pungency")
+    st.markdown(f"**Blend Pungency:** {blend_pungency:.4f} %")
+    if m["pungency_status"] == PUNGENCY_LOW:
+        exp_oil_sold_separately = m["exp_oil_sold_separately_mt"]
+        exp_oil_used_in_blend = seed_input * (exp_oil_yield_pct / 100) - exp_oil_sold_separately
+        exp_oil_loss = exp_oil_sold_separately * (oil_sell_price - exp_oil_sell_price)
+        recommendation_msg = (
+            f"⚠️ **Blend pungency is below 0.27.**\n\n"
+            f"To achieve compliance, reduce expeller oil in blend to **{exp_oil_used_in_blend:.2f} MT**. "
+            f"Excess expeller oil (**{exp_oil_sold_separately:.2f} MT**) will be sold separately, resulting in a loss of "
+            f"{format_inr(exp_oil_loss)} per day."
+        )
+    elif m["pungency_status"] == PUNGENCY_HIGH:
+        # Market oil that would bring the seed oils alone down to the requirement (advice only: this model blends `market_oil`).
+        total_oil = m["final_oil_blend_mt"]
+        market_oil_needed = max(0, blend_pungency * total_oil / MIN_PUNGENCY_REQ - (total_oil - market_oil))
+        market_oil_profit = (oil_sell_price - market_oil_price) * market_oil_needed
+        recommendation_msg = (
+            f"ℹ️ **Blend pungency is above 0.27.**\n\n"
+            f"To optimize cost, you may add **{market_oil_needed:.2f} MT** of market oil (0% pungency) to bring the blend to 0.27. "
+            f"This could add a profit of {format_inr(market_oil_profit)} per day. "
+            f"(This is a recommendation; you may choose to act or ignore.)"
+        )
+    else:
+        recommendation_msg = "✅ **Blend pungency is at the required 0.27. No adjustment needed.**"
+    st.info(recommendation_msg)
 
 # --- OUTPUT SECTION ---
 
 st.header("Margin Analysis (All values in ₹ Cr unless otherwise specified)")
 st.markdown("#### Daily | Monthly | Annual")
 
-st.write(f"**Revenue:** {format_cr(oil_blend_revenue + exp_oil_revenue + moc_revenue)} | {format_cr((oil_blend_revenue + exp_oil_revenue + moc_revenue) * prod_days)} | {format_cr((oil_blend_revenue + exp_oil_revenue + moc_revenue) * prod_days * 12)}")
-st.write(f"**COGS:** {format_cr(cogs)} ({cogs_percent:.2f}%) | {format_cr(cogs * prod_days)} | {format_cr(cogs * prod_days * 12)}")
-st.write(f"**GM:** {format_cr(gm)} ({gm_percent:.2f}%) | {format_cr(gm * prod_days)} | {format_cr(annual_gm)}")
-st.write(f"**Processing Cost:** {format_cr(processing_cost_total)} ({processing_cost_percent:.2f}%) | {format_cr(processing_cost_total * prod_days)} | {format_cr(annual_processing_cost)}")
-st.write(f"**CM:** {format_cr(cm)} ({cm_percent:.2f}%) | {format_cr(cm * prod_days)} | {format_cr(annual_cm)}")
-st.write(f"**Variable Cost:** {format_cr(variable_cost_total)} ({variable_cost_percent:.2f}%) | {format_cr(variable_cost_total * prod_days)} | {format_cr(annual_variable_cost)}")
-st.write(f"**Other Expenses:** {format_cr(other_expenses)} | {format_cr(other_expenses * prod_days)} | {format_cr(annual_other_expenses)}")
-st.write(f"**EBITDA:** {format_cr(ebitda)} ({ebitda_percent:.2f}%) | {format_cr(ebitda * prod_days)} | {format_cr(annual_ebitda)}")
+st.write(f"**Revenue:** {format_cr(revenue)} | {format_cr(revenue * prod_days)} | {format_cr(revenue * annual_days)}")
+st.write(f"**COGS:** {format_cr(cogs)} ({share(cogs):.2f}%) | {format_cr(cogs * prod_days)} | {format_cr(cogs * annual_days)}")
+st.write(f"**GM:** {format_cr(gm)} ({share(gm):.2f}%) | {format_cr(gm * prod_days)} | {format_cr(gm * annual_days)}")
+st.write(f"**Processing Cost:** {format_cr(processing_cost_total)} ({share(processing_cost_total):.2f}%) | {format_cr(processing_cost_total * prod_days)} | {format_cr(processing_cost_total * annual_days)}")
+st.write(f"**CM:** {format_cr(cm)} ({share(cm):.2f}%) | {format_cr(cm * prod_days)} | {format_cr(cm * annual_days)}")
+st.write(f"**Variable Cost:** {format_cr(variable_cost_total)} ({share(variable_cost_total):.2f}%) | {format_cr(variable_cost_total * prod_days)} | {format_cr(variable_cost_total * annual_days)}")
+st.write(f"**Other Expenses:** {format_cr(other_expenses)} | {format_cr(other_expenses * prod_days)} | {format_cr(other_expenses * annual_days)}")
+st.write(f"**EBITDA:** {format_cr(ebitda)} ({share(ebitda):.2f}%) | {format_cr(ebitda * prod_days)} | {format_cr(annual_ebitda)}")
 st.write(f"**Interest (Annual):** {format_cr(annual_interest)}")
 st.write(f"**Depreciation (Annual):** {format_cr(annual_depreciation)}")
 st.write(f"**Annual PBT:** {format_cr(annual_pbt)}")
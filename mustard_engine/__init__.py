@@ -0,0 +1,18 @@
+"""Streamlit-free calculation engine behind the mustard oil dashboard.
+
+Importing the package pulls in only the standard library; NumPy is loaded the first time a batch API is used.
+"""
+from .inputs import DEFAULT_INPUTS, INPUT_NAMES, EngineInputs
+from .formatting import format_indian, format_indian_array
+from .core import calculate_all_metrics, MIN_PUNGENCY_REQ, PUNGENCY_LOW, PUNGENCY_COMPLIANT, PUNGENCY_HIGH
+
+_LAZY = {"calculate_metrics_batch": "batch"}
+
+
+def __getattr__(name):
+    if name in _LAZY:
+        from importlib import import_module
+        value = getattr(import_module(f".{_LAZY[name]}", __name__), name)
+        globals()[name] = value
+        return value
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -0,0 +1,212 @@
+"""Forward-mode automatic differentiation of the engine: every output's exact partials in one evaluation.
+
+`Dual` is a float that also carries its gradient with respect to all engine inputs. Seeding each input with its
+unit vector and running the graph's node formulas (`graph.NODES`) once on Duals yields the value and the full
+Jacobian row of every output, instead of one finite-difference rerun per input.
+
+The engine is piecewise linear-rational: the `max(0, ...)` tax and blend clamps, the pungency low/high branches
+and the `> 0` division guards. Each takes the derivative of the branch actually chosen at the evaluation point.
+When a comparison is within `kink_tolerance` of flipping, the point sits on a kink where the one-sided
+derivatives differ, and it is reported in `Jacobian.kinks` with the node that made the comparison.
+
+    jac = jacobian(EngineInputs())
+    jac.partial("annual_pat", "seed_purchase_price") * 1000   # ₹ of annual PAT per ₹1,000/MT on seed price
+"""
+import math
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from .graph import NODES, OUTPUTS
+from .inputs import INPUT_NAMES, EngineInputs
+
+DEFAULT_KINK_TOLERANCE = 1e-9
+
+_tape = threading.local()  # .kinks: list being recorded (or None), .node: node under evaluation
+
+Kink = namedtuple("Kink", "node left right")  # node whose comparison of `left` with `right` is (nearly) a tie
+
+
+def _note(a, b):
+    kinks = getattr(_tape, "kinks", None)
+    if kinks is None: return
+    a, b = float(a), float(b)
+    if abs(a - b) <= _tape.tolerance * max(abs(a), abs(b), 1.0): kinks.append(Kink(_tape.node, a, b))
+
+
+def _grad(x, size):
+    return x.grad if isinstance(x, Dual) else np.zeros(size)
+
+
+_new, _val = float.__new__, float.__float__
+
+
+def _dual(value, grad):
+    d = _new(Dual, value)
+    d.grad = grad
+    return d
+
+
+class Dual(float):
+    """A float value plus `grad`, its gradient with respect to the seeded inputs.
+
+    Subclassing float keeps the engine's formatting (`format_indian`, `f"{x:.2f}"`) and `isinstance` checks
+    working unchanged; every arithmetic operator (`+ - * / ** // %`, `divmod`, unary `- + abs`) is overridden so
+    the gradient is never silently dropped. `int()`, `round()` and `math.floor`/`ceil`/`trunc` return plain ints,
+    whose derivative is zero wherever it exists.
+    """
+    __slots__ = ("grad",)
+
+    def __new__(cls, value, grad):
+        return _dual(value, grad)
+
+    def __repr__(self): return f"Dual({_val(self)!r}, grad={self.grad!r})"
+
+    # --- Arithmetic (the `type(other) is Dual` fast path matters: this runs ~130 times per Jacobian) ---
+    def __add__(self, other):
+        if type(other) is Dual: return _dual(_val(self) + _val(other), self.grad + other.grad)
+        if isinstance(other, (int, float)): return _dual(_val(self) + other, self.grad)
+        return NotImplemented
+
+    __radd__ = __add__
+
+    def __sub__(self, other):
+        if type(other) is Dual: return _dual(_val(self) - _val(other), self.grad - other.grad)
+        if isinstance(other, (int, float)): return _dual(_val(self) - other, self.grad)
+        return NotImplemented
+
+    def __rsub__(self, other):
+        if isinstance(other, (int, float)): return _dual(other - _val(self), -self.grad)
+        return NotImplemented
+
+    def __mul__(self, other):
+        if type(other) is Dual:
+            a, b = _val(self), _val(other)
+            return _dual(a * b, self.grad * b + other.grad * a)
+        if isinstance(other, (int, float)): return _dual(_val(self) * other, self.grad * other)
+        return NotImplemented
+
+    __rmul__ = __mul__
+
+    def __truediv__(self, other):
+        if type(other) is Dual:
+            a, b = _val(self), _val(other)
+            return _dual(a / b, (self.grad - other.grad * (a / b)) / b)
+        if isinstance(other, (int, float)): return _dual(_val(self) / other, self.grad / other)
+        return NotImplemented
+
+    def __rtruediv__(self, other):
+        if isinstance(other, (int, float)):
+            b = _val(self)
+            return _dual(other / b, self.grad * (-other / (b * b)))
+        return NotImplemented
+
+    def __pow__(self, other, modulo=None):
+        if modulo is not None: return NotImplemented
+        a = _val(self)
+        if type(other) is Dual:
+            b = _val(other)
+            value = a ** b  # d(a^b) = b a^(b-1) da + a^b ln(a) db; the ln term only exists for a > 0
+            return _dual(value, self.grad * (b * a ** (b - 1) if b else 0.0) + other.grad * (value * math.log(a) if a > 0 else 0.0))
+        if isinstance(other, (int, float)): return _dual(a ** other, self.grad * (other * a ** (other - 1) if other else 0.0))
+        return NotImplemented
+
+    def __rpow__(self, other):
+        if isinstance(other, (int, float)):
+            value = other ** _val(self)
+            return _dual(value, self.grad * (value * math.log(other) if other > 0 else 0.0))
+        return NotImplemented
+
+    # --- Floor division and modulo: piecewise; a // b is constant between its jumps, a % b = a - b * (a // b) ---
+    def __floordiv__(self, other):
+        if isinstance(other, (int, float)): return _dual(_val(self) // float(other), self.grad * 0.0)
+        return NotImplemented
+
+    def __rfloordiv__(self, other):
+        if isinstance(other, (int, float)): return _dual(float(other) // _val(self), self.grad * 0.0)
+        return NotImplemented
+
+    def __mod__(self, other):
+        if type(other) is Dual:
+            q = _val(self) // _val(other)
+            return _dual(_val(self) % _val(other), self.grad - other.grad * q)
+        if isinstance(other, (int, float)): return _dual(_val(self) % other, self.grad * 1.0)
+        return NotImplemented
+
+    def __rmod__(self, other):
+        if isinstance(other, (int, float)): return _dual(other % _val(self), self.grad * -(other // _val(self)))
+        return NotImplemented
+
+    def __divmod__(self, other):
+        if isinstance(other, (int, float)): return self // other, self % other
+        return NotImplemented
+
+    def __rdivmod__(self, other):
+        if isinstance(other, (int, float)): return other // self, other % self
+        return NotImplemented
+
+    def __neg__(self): return _dual(-_val(self), -self.grad)
+
+    def __pos__(self): return self
+
+    def __abs__(self):
+        _note(self, 0.0)
+        return self if _val(self) >= 0 else -self
+
+    # --- Comparisons pick a branch; near-ties are recorded as kinks ---
+    def __lt__(self, other): _note(self, other); return float.__lt__(self, other)
+    def __le__(self, other): _note(self, other); return float.__le__(self, other)
+    def __gt__(self, other): _note(self, other); return float.__gt__(self, other)
+    def __ge__(self, other): _note(self, other); return float.__ge__(self, other)
+    def __eq__(self, other): _note(self, other); return float.__eq__(self, other)
+    def __ne__(self, other): _note(self, other); return float.__ne__(self, other)
+
+    __hash__ = float.__hash__
+
+
+class Jacobian(namedtuple("Jacobian", "values matrix wrt kinks")):
+    """`values`: {output: value}; `matrix`: {output: gradient array in `wrt` order}; `kinks`: tuple of `Kink`."""
+    __slots__ = ()
+
+    def partial(self, output, wrt):
+        """d output / d input, e.g. ₹ of annual PAT per ₹1/MT of seed price."""
+        return float(self.matrix[output][self.wrt.index(wrt)])
+
+    def row(self, output):
+        return dict(zip(self.wrt, self.matrix[output].tolist()))
+
+    def elasticity(self, output, wrt, inputs):
+        """% change in `output` per 1% change in `wrt` at the evaluation point `inputs`."""
+        value = self.values[output]
+        return self.partial(output, wrt) * getattr(inputs, wrt) / value if value else 0.0
+
+
+def jacobian(inputs=None, outputs=None, wrt=INPUT_NAMES, kink_tolerance=DEFAULT_KINK_TOLERANCE):
+    """Evaluates the engine once on Duals; returns each numeric output's value and partials w.r.t. `wrt`.
+
+    `outputs` restricts the returned outputs (default: every numeric key of `calculate_all_metrics`). Inputs
+    not in `wrt` stay plain floats, so asking for a few partials is cheaper than asking for all of them. Kinks
+    are only detected along the `wrt` directions.
+    """
+    p = EngineInputs() if inputs is None else inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)
+    wrt = tuple(wrt)
+    unknown = set(wrt).difference(INPUT_NAMES)
+    if unknown: raise ValueError(f"not engine inputs: {sorted(unknown)}")
+    n = len(wrt)
+    seeds = dict(zip(wrt, np.eye(n)))
+    values = {name: Dual(float(v), seeds[name]) if name in seeds else v for name, v in zip(INPUT_NAMES, p)}
+    _tape.kinks, _tape.tolerance = [], kink_tolerance
+    try:
+        for name, (fn, deps) in NODES.items():
+            _tape.node = name
+            values[name] = fn(*[values[d] for d in deps])
+        kinks = tuple(_tape.kinks)
+    finally:
+        _tape.kinks = None
+    result, matrix = {}, {}
+    for key in (OUTPUTS if outputs is None else outputs):
+        value = values[OUTPUTS.get(key, key)]
+        if isinstance(value, str): continue
+        result[key], matrix[key] = float(value), _grad(value, n)
+    return Jacobian(result, matrix, wrt, kinks)
@@ -0,0 +1,165 @@
+"""Vectorized twin of `calculate_all_metrics`: columns of scenarios in, columns of metrics out."""
+import numpy as np
+
+from .core import MIN_PUNGENCY_REQ, PUNGENCY_COMPLIANT, PUNGENCY_HIGH, PUNGENCY_LOW
+from .inputs import DEFAULT_INPUTS, INPUT_NAMES
+from .variants import DASHBOARD, get_variant
+
+
+def _columns(inputs):
+    """Pulls every declared input out of a dict of arrays/scalars or a DataFrame, broadcast to one shape."""
+    cols = {}
+    for name in INPUT_NAMES:
+        try: value = inputs[name]
+        except KeyError: value = DEFAULT_INPUTS[name]
+        cols[name] = np.asarray(value, dtype=np.float64)
+    shapes = np.broadcast_shapes(*(c.shape for c in cols.values()))
+    return {k: np.broadcast_to(v, shapes) for k, v in cols.items()}
+
+
+def _safe_div(num, den, ok):
+    """`num / den` where `ok`, else 0 — without tripping divide-by-zero warnings on the masked lanes."""
+    return np.where(ok, num / np.where(ok, den, 1.0), 0.0)
+
+
+def calculate_metrics_batch(inputs, variant=DASHBOARD):
+    """Runs the engine over many scenarios at once.
+
+    `inputs` maps input names to arrays (or scalars, which broadcast) — a DataFrame with one row per
+    scenario works as-is. Missing inputs fall back to the dashboard defaults. Returns a dict of float64
+    arrays with the same numeric keys as `calculate_all_metrics`, `pungency_status` (PUNGENCY_LOW /
+    PUNGENCY_COMPLIANT / PUNGENCY_HIGH) included; the recommendation text is left out.
+    `variant` (a `variants.ModelVariant` or its name) picks the formula rules; the default is the dashboard's.
+    """
+    v = get_variant(variant)
+    c = _columns(inputs)
+    seed_input_mt = c["seed_input_mt"]
+
+    kachi_ghani_yield, expeller_yield = c["kachi_ghani_yield_pct"]/100, c["expeller_yield_pct"]/100
+    moc_base_yield, min_pungency_req = 1-(kachi_ghani_yield+expeller_yield), MIN_PUNGENCY_REQ
+    kachi_ghani_oil_produced_mt, expeller_oil_produced_mt = seed_input_mt*kachi_ghani_yield, seed_input_mt*expeller_yield
+    total_produced_oil = kachi_ghani_oil_produced_mt + expeller_oil_produced_mt
+    kg_pungency, exp_pungency = c["kachi_ghani_pungency"], c["expeller_oil_pungency"]
+    pungency_mass = kachi_ghani_oil_produced_mt * kg_pungency + expeller_oil_produced_mt * exp_pungency
+    fixed_market_oil = v.market_oil == "fixed"
+    blended_oil = total_produced_oil + v.market_oil_mt if fixed_market_oil else total_produced_oil  # fixed market oil has zero pungency
+    has_oil = blended_oil > 0
+    initial_blend_pungency = _safe_div(pungency_mass, blended_oil, has_oil)
+
+    # --- Pungency branches as masks: low -> divert expeller oil, high -> add market oil ---
+    low = has_oil & (initial_blend_pungency < min_pungency_req)
+    high = has_oil & (initial_blend_pungency > min_pungency_req) & ~low
+    denominator = min_pungency_req - exp_pungency
+    low_blendable = np.maximum(0, _safe_div(kachi_ghani_oil_produced_mt * (kg_pungency - min_pungency_req), denominator, denominator != 0))
+    if fixed_market_oil:
+        low_blendable = np.where(kg_pungency == exp_pungency, 0.0, np.minimum(expeller_oil_produced_mt, low_blendable))
+        exp_oil_used_in_blend_mt = np.where(low, low_blendable, expeller_oil_produced_mt)
+        market_oil_to_add_mt = np.zeros_like(seed_input_mt) + v.market_oil_mt
+    else:
+        exp_oil_used_in_blend_mt = np.where(low & (denominator != 0), low_blendable, expeller_oil_produced_mt)
+        market_oil_to_add_mt = np.where(high, np.maximum(0, (pungency_mass / min_pungency_req) - total_produced_oil), 0.0)
+    exp_oil_sold_separately_mt = np.where(low, expeller_oil_produced_mt - exp_oil_used_in_blend_mt, 0.0)
+    pungency_status = np.where(low, PUNGENCY_LOW, np.where(high, PUNGENCY_HIGH, PUNGENCY_COMPLIANT))
+
+    final_oil_blend_mt = kachi_ghani_oil_produced_mt + exp_oil_used_in_blend_mt + market_oil_to_add_mt
+    water_added_mt, salt_added_mt = seed_input_mt*(c["water_added_pct"]/100), seed_input_mt*(c["salt_added_pct"]/100)
+    enhanced_moc_mt = (seed_input_mt * moc_base_yield) + water_added_mt + salt_added_mt
+    daily_revenue_oil_blend = final_oil_blend_mt*c["oil_blend_sell_price"]
+    daily_revenue_expeller_separate = exp_oil_sold_separately_mt*c["expeller_oil_sell_price"]
+    daily_revenue_moc = enhanced_moc_mt*c["moc_sell_price"]
+    daily_total_revenue = daily_revenue_oil_blend + daily_revenue_expeller_separate + daily_revenue_moc
+    cost_seed = seed_input_mt * c["seed_purchase_price"]
+    cost_market_oil = market_oil_to_add_mt * c["market_bought_oil_price"]
+    cost_moc_enhancement = (water_added_mt*v.moc_additive_kg_per_mt*c["water_cost_per_kg"]) + (salt_added_mt*v.moc_additive_kg_per_mt*c["salt_cost_per_kg"])
+    daily_cogs = cost_seed + cost_market_oil + cost_moc_enhancement
+    daily_gm = daily_total_revenue - daily_cogs
+    daily_processing_cost = seed_input_mt * c["processing_cost_per_mt"]
+    daily_cm = daily_gm - daily_processing_cost
+    daily_variable_cost = seed_input_mt * c["other_variable_costs_per_mt"]
+    other_expenses_daily = c["other_expenses_daily"]
+    daily_ebitda = daily_cm - daily_variable_cost - other_expenses_daily
+
+    # --- Working capital ---
+    production_days_per_month = c["production_days_per_month"]
+    monthly_seed_consumption = seed_input_mt * production_days_per_month
+    rm_hoarded_value = monthly_seed_consumption*c["rm_hoard_months"]*c["hoarded_rm_rate"]
+    rm_safety_stock_value = seed_input_mt*c["rm_safety_stock_days"]*c["seed_purchase_price"]
+    inventory_rm = rm_hoarded_value + rm_safety_stock_value
+    total_daily_oil_revenue, total_daily_oil_qty = daily_revenue_oil_blend+daily_revenue_expeller_separate, final_oil_blend_mt+exp_oil_sold_separately_mt
+    if v.oil_wc_basis == "blend": total_daily_oil_revenue, total_daily_oil_qty = daily_revenue_oil_blend, final_oil_blend_mt
+    avg_oil_price = _safe_div(total_daily_oil_revenue, total_daily_oil_qty, total_daily_oil_qty > 0)
+    fg_oil_inventory_value = total_daily_oil_qty*avg_oil_price*c["fg_oil_safety_days"]
+    fg_moc_inventory_value = enhanced_moc_mt*c["moc_sell_price"]*c["fg_moc_safety_days"]
+    inventory_fg = fg_oil_inventory_value + fg_moc_inventory_value
+    total_inventory = inventory_rm + inventory_fg
+    debtors_oil, debtors_moc = total_daily_oil_revenue*c["oil_debtor_days"], daily_revenue_moc*c["moc_debtor_days"]
+    total_debtors, trade_creditors = debtors_oil + debtors_moc, seed_input_mt*c["seed_purchase_price"]*c["creditor_days"]
+    financed_rm_hoard_value = rm_hoarded_value*(c["rm_hoard_financed_pct"]/100)
+    gross_wc = total_inventory + total_debtors - trade_creditors
+    net_wc_requirement = gross_wc - financed_rm_hoard_value
+    annual_production_days = production_days_per_month * 12
+    annual_ebitda = daily_ebitda * annual_production_days
+
+    # --- Interest, depreciation, tax ---
+    capex, equity_in_capex_pct = c["capex"], c["equity_in_capex_pct"]
+    if v.financing == "flat":  # one rate on all capex and gross WC
+        main_capital_to_finance = capex + gross_wc
+        interest_on_main_capital = main_capital_to_finance * (v.flat_interest_rate_pa/100)
+        interest_on_hoard = np.zeros_like(interest_on_main_capital)
+    else:
+        debt_funded_capex = capex * (1 - equity_in_capex_pct/100)
+        main_capital_to_finance = debt_funded_capex + net_wc_requirement
+        interest_on_main_capital = main_capital_to_finance * (c["main_financing_rate_pa"]/100)
+        interest_on_hoard = financed_rm_hoard_value * (c["warehouse_finance_rate_pa"]/100)
+    annual_interest = interest_on_main_capital + interest_on_hoard
+    if v.depreciation_months is None:
+        depreciation_years = c["depreciation_years"]
+        annual_depreciation = _safe_div(capex, depreciation_years, depreciation_years > 0)
+    else:
+        depreciation_months = np.asarray(v.depreciation_months, dtype=np.float64)
+        annual_depreciation = _safe_div(capex * 12, depreciation_months, depreciation_months > 0)
+    annual_ebit = annual_ebitda - annual_depreciation
+    annual_pbt = annual_ebit - annual_interest
+    tax_rate_pct = c["tax_rate_pct"]
+    annual_tax = np.maximum(0, annual_pbt * (tax_rate_pct/100))
+    annual_pat = annual_pbt - annual_tax
+
+    # --- ROCE & ROE ---
+    capital_employed = capex + (gross_wc if v.capital_basis == "gross" else net_wc_requirement) + c["other_assets"]
+    has_ce = capital_employed != 0
+    roce_pat = _safe_div(annual_pat, capital_employed, has_ce) * 100
+    roce_ebit = _safe_div(annual_ebit, capital_employed, has_ce) * 100
+    equity_funded_capex = capex * (equity_in_capex_pct/100)
+    shareholders_equity = equity_funded_capex + net_wc_requirement + c["other_assets"]
+    has_equity = shareholders_equity > 0
+    roe = _safe_div(annual_pat, shareholders_equity, has_equity) * 100
+
+    # --- Solvex synergy ---
+    moc_consumed_inhouse_mt = enhanced_moc_mt*(c["moc_consumed_perc"]/100)
+    daily_solvex_saving = moc_consumed_inhouse_mt*c["logistics_saved_per_ton"] + c["labor_saved_nos"]*c["labor_cost_per_head_daily"] + moc_consumed_inhouse_mt*c["brokerage_saved_per_ton"]
+    annual_solvex_saving = daily_solvex_saving * annual_production_days
+    annual_pat_with_synergy = annual_pat + annual_solvex_saving
+    annual_ebit_with_synergy = annual_ebit + annual_solvex_saving
+    roce_pat_with_synergy = _safe_div(annual_pat_with_synergy, capital_employed, has_ce) * 100
+    roce_ebit_with_synergy = _safe_div(annual_ebit_with_synergy, capital_employed, has_ce) * 100
+    roe_with_synergy = _safe_div(annual_pat_with_synergy, shareholders_equity, has_equity) * 100
+
+    return {
+        "seed_input_mt": seed_input_mt, "pungency_status": pungency_status, "initial_blend_pungency": initial_blend_pungency,
+        "final_oil_blend_mt": final_oil_blend_mt, "exp_oil_sold_separately_mt": exp_oil_sold_separately_mt, "enhanced_moc_mt": enhanced_moc_mt,
+        "daily_total_revenue": daily_total_revenue, "daily_gm": daily_gm, "daily_cm": daily_cm, "daily_ebitda": daily_ebitda,
+        "daily_cogs": daily_cogs, "daily_processing_cost": daily_processing_cost, "daily_variable_cost": daily_variable_cost, "daily_other_expenses": other_expenses_daily,
+        "production_days_per_month": production_days_per_month, "annual_production_days": annual_production_days,
+        "annual_interest": annual_interest, "annual_depreciation": annual_depreciation, "tax_rate_pct": tax_rate_pct, "annual_ebit": annual_ebit,
+        "annual_ebitda": annual_ebitda, "annual_pbt": annual_pbt, "annual_tax": annual_tax, "annual_pat": annual_pat,
+        "total_inventory": total_inventory, "total_debtors": total_debtors, "trade_creditors": trade_creditors,
+        "financed_rm_hoard_value": financed_rm_hoard_value, "net_wc_requirement": net_wc_requirement, "capex": capex,
+        "capital_employed": capital_employed, "shareholders_equity": shareholders_equity,
+        "roce_pat": roce_pat, "roce_ebit": roce_ebit, "roe": roe,
+        "roce_pat_with_synergy": roce_pat_with_synergy, "roce_ebit_with_synergy": roce_ebit_with_synergy, "roe_with_synergy": roe_with_synergy,
+        "daily_solvex_saving": daily_solvex_saving,
+        "market_oil_to_add_mt": market_oil_to_add_mt, "water_added_mt": water_added_mt, "salt_added_mt": salt_added_mt,
+        "cost_seed": cost_seed, "cost_market_oil": cost_market_oil, "cost_moc_enhancement": cost_moc_enhancement,
+        "interest_on_hoard": interest_on_hoard, "interest_on_main_capital": interest_on_main_capital, "main_capital_to_finance": main_capital_to_finance,
+        "inventory_rm": inventory_rm, "inventory_fg": inventory_fg,
+    }
@@ -0,0 +1,122 @@
+"""Blend optimizer for many seed lots: which oil goes into the blend, which is sold separately, and how much market oil
+to add, for the most daily margin at or above the pungency floor.
+
+    lots = {"seed_input_mt": [60, 80, 60], "kachi_ghani_pungency": [0.45, 0.31, 0.22], "seed_purchase_price": [58000, 56500, 54000]}
+    plan = optimize_blend(lots, EngineInputs(), max_market_oil_mt=20)
+    plan.expeller_blend_mt, plan.market_oil_mt, plan.daily_ebitda
+
+Each lot has its own tonnage, price, yields and pungencies (columns named as the engine inputs; missing ones take
+`inputs`' values). Prices, MoC additives and per-MT costs are plant-wide, from `inputs`. The day's lots are all
+crushed, so the only choices are where each oil stream goes. Blending earns `oil_blend_sell_price`; oil kept out of the
+blend, of either kind, is sold as straight oil at `expeller_oil_sell_price`. Market oil (0% pungency) costs
+`market_bought_oil_price`, up to `max_market_oil_mt` a day (None: no limit).
+
+That is a linear program with a single coupling row: the blend's pungency-weighted tonnes must stay at or above the
+floor. Each MT of a stream blended brings `pungency - floor` of "headroom" (MT x % points, negative below the
+floor) and a margin change, so the LP is a continuous knapsack and a sort solves it exactly: streams that add both
+margin and headroom go in; the headroom they bring, plus any bought from streams that add headroom at a margin cost, is
+spent on the streams and market oil that earn most per unit of headroom. The buying stops where the next unit of
+headroom costs more than it earns. That is O(n log n) and a few hundred microseconds for hundreds of lots.
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .core import MIN_PUNGENCY_REQ, calculate_all_metrics
+from .inputs import EngineInputs
+
+LOT_FIELDS = ("seed_input_mt", "seed_purchase_price", "kachi_ghani_yield_pct", "expeller_yield_pct", "kachi_ghani_pungency", "expeller_oil_pungency")
+
+# Per lot (arrays): oil produced and blended, by stream. Plant totals: MT a day and ₹ a day, as the engine's keys.
+# shadow_price: ₹ a day that one more unit of headroom (1 MT of blended oil 1 % point above the floor) would add.
+BlendPlan = namedtuple("BlendPlan", "kachi_ghani_oil_mt expeller_oil_mt kachi_ghani_blend_mt expeller_blend_mt market_oil_mt final_oil_blend_mt "
+                                    "oil_sold_separately_mt blend_pungency daily_total_revenue daily_cogs daily_gm daily_cm daily_ebitda shadow_price")
+
+
+def lot_columns(lots, inputs=None):
+    """{field: (n,) float array} from a DataFrame, dict of columns or list of mappings; missing fields take `inputs`' values
+    (so `{}` is the sidebar's plant as a single lot)."""
+    p = EngineInputs() if inputs is None else inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)
+    if isinstance(lots, (list, tuple)): lots = {f: [lot.get(f, getattr(p, f)) for lot in lots] for f in LOT_FIELDS}
+    cols = {f: np.asarray(lots[f] if f in lots else getattr(p, f), dtype=np.float64) for f in LOT_FIELDS}
+    shape = np.broadcast_shapes((1,), *(np.shape(v) for v in cols.values()))  # all scalars: one lot
+    if len(shape) != 1: raise ValueError("lots must be one-dimensional columns (one row per lot)")
+    return {f: np.broadcast_to(v, shape) for f, v in cols.items()}
+
+
+def _knapsack(gain, headroom, upper):
+    """max gain·z subject to headroom·z >= 0 and 0 <= z <= upper; returns (z, shadow price of the headroom row)."""
+    z = np.zeros_like(gain)
+    free = (headroom >= 0) & (gain >= 0) & ((headroom > 0) | (gain > 0))
+    z[free] = upper[free]
+    budget = float(headroom[free] @ upper[free])
+    supply, demand = np.flatnonzero((headroom > 0) & (gain < 0)), np.flatnonzero((headroom < 0) & (gain > 0))
+    price = np.abs(gain) / np.where(headroom != 0, np.abs(headroom), 1.0)  # ₹ per unit of headroom, bought or spent
+    supply, demand = supply[np.argsort(price[supply], kind="stable")], demand[np.argsort(-price[demand], kind="stable")]
+    s_cap, d_cap = headroom[supply] * upper[supply], -headroom[demand] * upper[demand]  # d_cap is inf for unlimited market oil
+    s_end, d_end = budget + np.cumsum(s_cap), np.cumsum(d_cap)
+    # Headroom traded, q: spend it while the demand step covering q earns more than the supply step covering q costs.
+    s_price, d_price = np.append(price[supply], np.inf), np.append(price[demand], 0.0)
+    s_total = s_end[-1] if len(supply) else budget
+    points = np.unique(np.concatenate(([0.0, budget, s_total], s_end, d_end)))
+    points = points[np.isfinite(points) & (points <= s_total)]
+    starts = points[:-1]
+    cost = np.where(starts < budget, 0.0, s_price[np.searchsorted(s_end, starts, side="right")])
+    earns = d_price[np.searchsorted(d_end, starts, side="right")]
+    profitable = np.flatnonzero(earns > cost)  # a prefix: earnings fall and costs rise with q
+    traded = points[profitable[-1] + 1] if len(profitable) else 0.0
+    d_start, s_start = np.concatenate(([0.0], d_end[:-1])), np.concatenate(([0.0], s_end[:-1] - budget))
+    d_take, s_take = np.clip(traded - d_start, 0, d_cap), np.clip(max(0.0, traded - budget) - s_start, 0, s_cap)
+    z[demand], z[supply] = d_take / -headroom[demand], s_take / headroom[supply]
+    used = supply[s_take > 0]
+    shadow = max(d_price[np.searchsorted(d_end, traded, side="right")], price[used[-1]] if len(used) else 0.0)
+    return z, shadow
+
+
+def optimize_blend(lots, inputs=None, max_market_oil_mt=None, min_pungency=MIN_PUNGENCY_REQ):
+    """The margin-maximizing `BlendPlan` for a day's seed lots (see the module docstring)."""
+    p = EngineInputs() if inputs is None else inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)
+    c = lot_columns(lots, p)
+    if max_market_oil_mt is None and min_pungency <= 0: raise ValueError("unlimited market oil needs a positive pungency floor")
+    seed = c["seed_input_mt"]
+    kg_oil, exp_oil = seed * c["kachi_ghani_yield_pct"] / 100, seed * c["expeller_yield_pct"] / 100
+    n = len(seed)
+    # Items: every lot's Kachi Ghani oil, then its expeller oil, then market oil; z is MT blended.
+    upper = np.concatenate((kg_oil, exp_oil, [np.inf if max_market_oil_mt is None else float(max_market_oil_mt)]))
+    headroom = np.concatenate((c["kachi_ghani_pungency"] - min_pungency, c["expeller_oil_pungency"] - min_pungency, [-min_pungency]))
+    gain = np.concatenate((np.full(2 * n, p.oil_blend_sell_price - p.expeller_oil_sell_price), [p.oil_blend_sell_price - p.market_bought_oil_price]))
+    z, shadow = _knapsack(gain, headroom, upper)
+    kg_blend, exp_blend, market_oil = z[:n], z[n:2 * n], float(z[-1])
+    blend = float(kg_blend.sum() + exp_blend.sum()) + market_oil
+    separate = max(0.0, float(kg_oil.sum() + exp_oil.sum() - kg_blend.sum() - exp_blend.sum()))
+    pungency = float(kg_blend @ c["kachi_ghani_pungency"] + exp_blend @ c["expeller_oil_pungency"]) / blend if blend > 0 else 0.0
+
+    total_seed = float(seed.sum())
+    water, salt = total_seed * p.water_added_pct / 100, total_seed * p.salt_added_pct / 100
+    moc = float(seed @ (1 - (c["kachi_ghani_yield_pct"] + c["expeller_yield_pct"]) / 100)) + water + salt
+    revenue = blend * p.oil_blend_sell_price + separate * p.expeller_oil_sell_price + moc * p.moc_sell_price
+    cogs = float(seed @ c["seed_purchase_price"]) + market_oil * p.market_bought_oil_price + (water * 1000 * p.water_cost_per_kg) + (salt * 1000 * p.salt_cost_per_kg)
+    gm = revenue - cogs
+    cm = gm - total_seed * p.processing_cost_per_mt
+    ebitda = cm - total_seed * p.other_variable_costs_per_mt - p.other_expenses_daily
+    return BlendPlan(kg_oil, exp_oil, kg_blend, exp_blend, market_oil, blend, separate, pungency, revenue, cogs, gm, cm, ebitda, shadow)
+
+
+def pooled_inputs(lots, inputs=None):
+    """`inputs` with the lots pooled into one seed stream (tonnage-weighted yields and price, oil-weighted pungencies):
+    what the engine's two-stream rule sees, for comparison with `optimize_blend`."""
+    p = EngineInputs() if inputs is None else inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)
+    c = lot_columns(lots, p)
+    seed = c["seed_input_mt"]
+    total = float(seed.sum())
+    if total <= 0: return p.replace(seed_input_mt=0.0)
+    kg_oil, exp_oil = seed * c["kachi_ghani_yield_pct"], seed * c["expeller_yield_pct"]
+    weighted = lambda values, weights: float(values @ weights / weights.sum()) if weights.sum() > 0 else float(values.mean())
+    return p.replace(seed_input_mt=total, seed_purchase_price=weighted(c["seed_purchase_price"], seed),
+                     kachi_ghani_yield_pct=weighted(c["kachi_ghani_yield_pct"], seed), expeller_yield_pct=weighted(c["expeller_yield_pct"], seed),
+                     kachi_ghani_pungency=weighted(c["kachi_ghani_pungency"], kg_oil), expeller_oil_pungency=weighted(c["expeller_oil_pungency"], exp_oil))
+
+
+def rule_margin(lots, inputs=None):
+    """Daily EBITDA under the engine's two-stream rule with the lots pooled (the baseline `optimize_blend` improves on)."""
+    return calculate_all_metrics(pooled_inputs(lots, inputs))["daily_ebitda"]
@@ -0,0 +1,128 @@
+"""Bounded, process-wide result cache for the scalar engine.
+
+Keys are a canonical tuple of exactly the engine's declared inputs, each rounded to a fixed resolution
+(1e-9 by default), so `0.1 + 0.2` and `0.3` (or `18` and `18.0`) land on the same entry and unrelated
+form state can never fragment the cache. Entries are evicted least-recently-used once either the entry
+count or the approximate memory budget is exceeded.
+
+A `disk` tier (`diskcache.DiskCache`) can sit behind the in-memory LRU so that worker processes on one host share
+results: a memory miss reads the shared file before running the engine, and computed results are written to it.
+`shared_cache()` adds that tier when $MUSTARD_DISK_CACHE names a file.
+"""
+import os
+import sys
+import threading
+from collections import OrderedDict
+from types import MappingProxyType
+
+from .core import calculate_all_metrics
+from .inputs import EngineInputs
+from .profiling import NULL_TRACE
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+DEFAULT_RESOLUTION = 1e-9
+
+
+def canonical_key(inputs, resolution=DEFAULT_RESOLUTION):
+    """Tuple of the declared inputs in `INPUT_NAMES` order, as integer multiples of `resolution`; extra keys are ignored."""
+    p = inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)
+    scale = 1 / resolution
+    return tuple([round(v * scale) for v in p])
+
+
+_ENTRY_OVERHEAD = sys.getsizeof(MappingProxyType({})) + sys.getsizeof((None, 0))  # the read-only view and the LRU's (result, nbytes) pair
+
+
+def _sizeof(key, result):
+    """Approximate footprint of one entry: the key tuple and its ints, the raw result dict and its values (metric names
+    are interned and shared, so they are not counted), and the entry's wrappers. `bench_cache.py` checks it against
+    tracemalloc."""
+    return (sys.getsizeof(key) + sum(sys.getsizeof(v) for v in key) + sys.getsizeof(result) + sum(sys.getsizeof(v) for v in result.values())
+            + _ENTRY_OVERHEAD)
+
+
+class ResultCache:
+    """Thread-safe LRU cache of engine results with hit/miss/eviction counters.
+
+    Cached results are returned as read-only mappings, since the same object is handed to every session.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES, max_entries=None, resolution=DEFAULT_RESOLUTION, engine=calculate_all_metrics, disk=None):
+        self.max_bytes, self.max_entries, self.resolution, self.engine, self.disk = max_bytes, max_entries, resolution, engine, disk
+        self._entries = OrderedDict()  # key -> (result, nbytes)
+        self._lock = threading.Lock()
+        self.nbytes = self.hits = self.misses = self.evictions = 0
+
+    def key(self, inputs):
+        return canonical_key(inputs, self.resolution)
+
+    def get(self, inputs, compute=None, trace=NULL_TRACE):
+        """Returns the cached metrics for `inputs`, computing and storing them on a miss.
+
+        `compute` overrides the cache's engine for this call, e.g. a session's incremental `MetricsGraph`. A
+        `profiling.Trace` gets "input_hash" and "compute" spans and a `cache` note ("hit", "disk hit" or "miss").
+        """
+        with trace.span("input_hash"):
+            p = inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)
+            key = self.key(p)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                trace.note(cache="hit")
+                return entry[0]
+            self.misses += 1
+        # Compute outside the lock so one slow miss does not stall other sessions' hits.
+        stored = self.disk.get(key) if self.disk is not None else None
+        trace.note(cache="miss" if stored is None else "disk hit")
+        with trace.span("compute"): raw = stored if stored is not None else (compute or self.engine)(p)
+        result = MappingProxyType(raw)
+        if stored is None and self.disk is not None: self.disk.put(key, result)
+        self._store(key, result, _sizeof(key, raw))  # sized before wrapping: getsizeof of the proxy is the proxy alone
+        return result
+
+    __call__ = get
+
+    def _store(self, key, result, nbytes):
+        with self._lock:
+            if key in self._entries: return
+            self._entries[key] = (result, nbytes)
+            self.nbytes += nbytes
+            while self._entries and (self.nbytes > self.max_bytes or (self.max_entries is not None and len(self._entries) > self.max_entries)):
+                _, (_, dropped) = self._entries.popitem(last=False)
+                self.nbytes -= dropped
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.nbytes = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"entries": len(self._entries), "bytes": self.nbytes, "max_bytes": self.max_bytes, "max_entries": self.max_entries,
+                    "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+                    "hit_rate": self.hits / lookups if lookups else 0.0, "disk": self.disk.stats() if self.disk is not None else None}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_cache():
+    """The one `ResultCache` every session in this process uses, backed by $MUSTARD_DISK_CACHE when that is set."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None:
+                path = os.environ.get("MUSTARD_DISK_CACHE")
+                if path:
+                    from .diskcache import DiskCache
+                    _shared = ResultCache(disk=DiskCache(path))
+                else: _shared = ResultCache()
+    return _shared
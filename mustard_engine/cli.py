@@ -0,0 +1,178 @@
+"""Command-line batch runner: streams a CSV/JSONL of scenarios through the engine in fixed-size chunks.
+
+    python -m mustard_engine scenarios.csv -o results.csv --chunk-size 50000 --stats
+
+Each input row holds any subset of the engine's input names (the rest take the dashboard defaults); other
+columns, such as a scenario id, are passed through to the output untouched. Memory stays bounded by one chunk.
+Results can also be written as Parquet or XLSX (`-o results.parquet`), through the writers in `export`.
+
+JSONL rows may each set different fields. A chunk echoes every field any of its rows (or an earlier chunk) used, and
+rows that leave an input out take its default. For a tabular output (CSV, Parquet, XLSX) a JSONL file is first
+scanned for its field names, so the header covers every row. From stdin the header is fixed by the first chunk, and a
+field that first appears later is an error rather than a misaligned column.
+"""
+import argparse
+import csv
+import json
+import sys
+import time
+
+from .inputs import DEFAULT_INPUTS, INPUT_NAMES
+
+DEFAULT_CHUNK_SIZE = 20_000
+
+
+BINARY_FORMATS = ("parquet", "xlsx")
+
+
+def _format_of(path, explicit):
+    if explicit: return explicit
+    if path.endswith((".parquet", ".xlsx")): return path.rsplit(".", 1)[1]
+    return "jsonl" if path.endswith((".jsonl", ".ndjson")) else "csv"
+
+
+def _open(path, mode):
+    if path == "-": return sys.stdin if "r" in mode else sys.stdout.buffer if "b" in mode else sys.stdout
+    return open(path, mode) if "b" in mode else open(path, mode, newline="", encoding="utf-8")
+
+
+def read_rows(stream, fmt):
+    """Yields one dict per scenario without loading the whole file."""
+    if fmt == "csv":
+        yield from csv.DictReader(stream)
+    else:
+        for line in stream:
+            if line.strip(): yield json.loads(line)
+
+
+def scan_keys(path):
+    """Every field name used in a JSONL file, in first-seen order; one pass that keeps only the names."""
+    keys = {}
+    with _open(path, "r") as stream:
+        for line in stream:
+            if line.strip(): keys.update(dict.fromkeys(json.loads(line)))
+    return keys
+
+
+def iter_chunks(rows, chunk_size):
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk: yield chunk
+
+
+def _number(value, default):
+    return default if value is None or value == "" else float(value)
+
+
+def _column(chunk, name):
+    import numpy as np
+
+    values = [row.get(name) for row in chunk]
+    if None not in values:  # NumPy would read None as NaN, not as the default
+        try: return np.asarray(values, dtype=np.float64)
+        except (TypeError, ValueError): pass
+    return np.array([_number(v, DEFAULT_INPUTS[name]) for v in values])
+
+
+def evaluate_chunk(chunk, columns=None, keys=()):
+    """Runs one chunk through the batch engine; returns (passthrough columns, given input columns, metric columns).
+
+    The fields are those of every row in the chunk plus `keys` (e.g. those of earlier chunks). Inputs no row sets
+    are left at their defaults inside the engine and not echoed back; a row without an input another row sets takes
+    the default. `columns` restricts which metrics are written — text formatting, not the engine, dominates the cost
+    per row — and an unknown name is a ValueError.
+    """
+    import numpy as np
+
+    from .batch import calculate_metrics_batch
+
+    fields = dict.fromkeys(keys)
+    for row in chunk: fields.update(dict.fromkeys(row))
+    given = [name for name in INPUT_NAMES if name in fields]
+    extra = [k for k in fields if k not in DEFAULT_INPUTS]
+    inputs = {name: _column(chunk, name) for name in given}
+    metrics = calculate_metrics_batch(inputs)
+    unknown = set(columns or ()).difference(metrics)
+    if unknown: raise ValueError(f"unknown metrics: {sorted(unknown)}")
+    wanted = [k for k in (columns or metrics) if k not in inputs]
+    passthrough = {k: [row.get(k) for row in chunk] for k in extra}
+    # With no inputs given the metrics are scalars: one value for every row.
+    return passthrough, {k: v.tolist() for k, v in inputs.items()}, {k: np.broadcast_to(metrics[k], len(chunk)).tolist() for k in wanted}
+
+
+class _Writer:
+    def __init__(self, stream, fmt):
+        from .export import open_writer
+
+        self.stream, self.fmt, self.header = stream, fmt, None
+        self.binary = open_writer(stream, fmt) if fmt in BINARY_FORMATS else None
+
+    def write(self, passthrough, inputs, metrics):
+        columns = {**passthrough, **inputs, **metrics}
+        if self.fmt == "jsonl":
+            names, dumps = list(columns), json.dumps
+            self.stream.writelines(dumps(dict(zip(names, row))) + "\n" for row in zip(*columns.values()))
+            return
+        # Tabular outputs have one header: later chunks are written under it by name.
+        if self.header is None:
+            self.header = list(columns)
+            if self.binary is None: csv.writer(self.stream).writerow(self.header)
+        late = [name for name in columns if name not in self.header]
+        if late: raise ValueError(f"fields {late} first appear after the header was written; write JSONL, or read the scenarios from a file")
+        rows = len(next(iter(columns.values()), ()))
+        columns = {name: columns.get(name, [None] * rows) for name in self.header}
+        if self.binary is not None: self.binary.write(columns)
+        else: csv.writer(self.stream).writerows(zip(*columns.values()))
+
+    def close(self):
+        if self.binary is not None: self.binary.close()
+
+
+def run(src, dst, in_format=None, out_format=None, chunk_size=DEFAULT_CHUNK_SIZE, columns=None):
+    """Streams `src` -> `dst`; returns the number of scenarios written."""
+    in_fmt, out_fmt = _format_of(src, in_format), _format_of(dst, out_format)
+    written = 0
+    keys = scan_keys(src) if in_fmt == "jsonl" and out_fmt != "jsonl" and src != "-" else {}
+    with _open(src, "r") as fin, _open(dst, "wb" if out_fmt in BINARY_FORMATS else "w") as fout:
+        writer = _Writer(fout, out_fmt)
+        for chunk in iter_chunks(read_rows(fin, in_fmt), chunk_size):
+            passthrough, inputs, metrics = evaluate_chunk(chunk, columns, keys)
+            keys.update(dict.fromkeys(passthrough), **dict.fromkeys(inputs))  # later chunks echo the same fields
+            writer.write(passthrough, inputs, metrics)
+            written += len(chunk)
+        writer.close()
+    return written
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m mustard_engine", description="Run a file of scenarios through the mustard oil engine.")
+    parser.add_argument("input", help="CSV or JSONL of scenarios ('-' for stdin)")
+    parser.add_argument("-o", "--output", default="-", help="CSV, JSONL, Parquet or XLSX results file (default: stdout)")
+    parser.add_argument("--in-format", choices=("csv", "jsonl"), help="override format detection for the input")
+    parser.add_argument("--out-format", choices=("csv", "jsonl", *BINARY_FORMATS), help="override format detection for the output")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE, help=f"scenarios per engine call (default: {DEFAULT_CHUNK_SIZE:,})")
+    parser.add_argument("--columns", type=lambda s: [c.strip() for c in s.split(",") if c.strip()], help="comma-separated metrics to write (default: all)")
+    parser.add_argument("--stats", action="store_true", help="report import time and rows/second on stderr")
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    t_import = time.perf_counter()
+    from . import batch  # NumPy and the batch kernel, timed separately from the run
+    unknown = set(args.columns or ()).difference(batch.calculate_metrics_batch({}))
+    if unknown: build_parser().error(f"--columns: unknown metrics: {', '.join(sorted(unknown))}")
+    t0 = time.perf_counter()
+    try: rows = run(args.input, args.output, args.in_format, args.out_format, args.chunk_size, args.columns)
+    except ValueError as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    elapsed = time.perf_counter() - t0
+    if args.stats:
+        print(f"batch engine import: {(t0 - t_import) * 1000:.1f} ms", file=sys.stderr)
+        print(f"{rows:,} scenarios in {elapsed:.2f} s ({rows / elapsed if elapsed else 0:,.0f} rows/s)", file=sys.stderr)
+    return 0
@@ -0,0 +1,180 @@
+"""Scalar calculation engine: one scenario in, one dict of metrics out. Pure — no globals, no Streamlit.
+
+Every formula is defined once, as a named node (`NODES`) whose parameter names are its dependencies: engine inputs
+or other nodes, in topological order. `calculate_all_metrics` runs every node; `graph.MetricsGraph` reruns only the
+nodes an input change dirties, and `autodiff` runs them on dual numbers. `batch.calculate_metrics_batch` is the
+NumPy form of the same model, and `benchmarks/suite.py` checks that all of them agree on the reference scenarios.
+"""
+import inspect
+
+from .formatting import format_indian
+from .inputs import DEFAULT_INPUTS, INPUT_NAMES, EngineInputs
+
+MIN_PUNGENCY_REQ = 0.2700
+PUNGENCY_LOW, PUNGENCY_COMPLIANT, PUNGENCY_HIGH = -1, 0, 1
+ENGINE_VERSION = 2  # bump whenever a formula or the set of outputs changes: results persisted under an older version are recomputed
+
+NODES = {}  # name -> (function, dependency names), in definition (= topological) order
+
+
+def _define(name, fn):
+    deps = tuple(inspect.signature(fn).parameters)
+    unknown = [d for d in deps if d not in NODES and d not in DEFAULT_INPUTS]
+    if unknown: raise NameError(f"node {name!r} depends on undefined {unknown}")
+    if name in NODES or name in DEFAULT_INPUTS: raise NameError(f"node {name!r} is already defined")
+    NODES[name] = (fn, deps)
+
+
+def _pungency_plan(kachi_ghani_oil_produced_mt, expeller_oil_produced_mt, total_produced_oil, initial_blend_pungency,
+                   kachi_ghani_pungency, expeller_oil_pungency, oil_blend_sell_price, expeller_oil_sell_price, market_bought_oil_price):
+    """(expeller oil used in blend, expeller oil sold separately, market oil added, recommendation, PUNGENCY_* status)."""
+    min_pungency_req = MIN_PUNGENCY_REQ
+    exp_oil_used_in_blend_mt, exp_oil_sold_separately_mt, market_oil_to_add_mt = expeller_oil_produced_mt, 0, 0
+    if initial_blend_pungency < min_pungency_req and total_produced_oil > 0:
+        if (denominator := min_pungency_req - expeller_oil_pungency) != 0: exp_oil_used_in_blend_mt = max(0, (kachi_ghani_oil_produced_mt * (kachi_ghani_pungency - min_pungency_req)) / denominator)
+        exp_oil_sold_separately_mt = expeller_oil_produced_mt - exp_oil_used_in_blend_mt
+        loss = exp_oil_sold_separately_mt * (oil_blend_sell_price - expeller_oil_sell_price)
+        recommendation = f"🔴 **Pungency Low ({initial_blend_pungency:.2f}%)**: Sell {exp_oil_sold_separately_mt:.2f} MT of Expeller Oil separately. Est. daily opportunity loss: ₹ {format_indian(abs(loss))}."
+        status = PUNGENCY_LOW
+    elif initial_blend_pungency > min_pungency_req and total_produced_oil > 0:
+        if min_pungency_req > 0: market_oil_to_add_mt = max(0, ((kachi_ghani_oil_produced_mt * kachi_ghani_pungency + expeller_oil_produced_mt * expeller_oil_pungency) / min_pungency_req) - total_produced_oil)
+        profit = market_oil_to_add_mt * (oil_blend_sell_price - market_bought_oil_price)
+        recommendation = f"🟢 **Pungency High ({initial_blend_pungency:.2f}%)**: Add {market_oil_to_add_mt:.2f} MT of Market Oil to optimize. Est. daily profit opportunity: ₹ {format_indian(profit)}."
+        status = PUNGENCY_HIGH
+    else: recommendation, status = f"✅ **Pungency Compliant ({initial_blend_pungency:.2f}%)**: No action needed.", PUNGENCY_COMPLIANT
+    return exp_oil_used_in_blend_mt, exp_oil_sold_separately_mt, market_oil_to_add_mt, recommendation, status
+
+
+# --- Oil yields & pungency ---
+_define("kachi_ghani_yield", lambda kachi_ghani_yield_pct: kachi_ghani_yield_pct/100)
+_define("expeller_yield", lambda expeller_yield_pct: expeller_yield_pct/100)
+_define("moc_base_yield", lambda kachi_ghani_yield, expeller_yield: 1-(kachi_ghani_yield+expeller_yield))
+_define("kachi_ghani_oil_produced_mt", lambda seed_input_mt, kachi_ghani_yield: seed_input_mt*kachi_ghani_yield)
+_define("expeller_oil_produced_mt", lambda seed_input_mt, expeller_yield: seed_input_mt*expeller_yield)
+_define("total_produced_oil", lambda kachi_ghani_oil_produced_mt, expeller_oil_produced_mt: kachi_ghani_oil_produced_mt + expeller_oil_produced_mt)
+_define("initial_blend_pungency", lambda kachi_ghani_oil_produced_mt, expeller_oil_produced_mt, total_produced_oil, kachi_ghani_pungency, expeller_oil_pungency:
+        (kachi_ghani_oil_produced_mt * kachi_ghani_pungency + expeller_oil_produced_mt * expeller_oil_pungency) / total_produced_oil if total_produced_oil > 0 else 0)
+_define("pungency_plan", _pungency_plan)
+_define("exp_oil_used_in_blend_mt", lambda pungency_plan: pungency_plan[0])
+_define("exp_oil_sold_separately_mt", lambda pungency_plan: pungency_plan[1])
+_define("market_oil_to_add_mt", lambda pungency_plan: pungency_plan[2])
+_define("pungency_recommendation", lambda pungency_plan: pungency_plan[3])
+_define("pungency_status", lambda pungency_plan: pungency_plan[4])
+
+# --- Daily P&L ---
+_define("final_oil_blend_mt", lambda kachi_ghani_oil_produced_mt, exp_oil_used_in_blend_mt, market_oil_to_add_mt: kachi_ghani_oil_produced_mt + exp_oil_used_in_blend_mt + market_oil_to_add_mt)
+_define("water_added_mt", lambda seed_input_mt, water_added_pct: seed_input_mt*(water_added_pct/100))
+_define("salt_added_mt", lambda seed_input_mt, salt_added_pct: seed_input_mt*(salt_added_pct/100))
+_define("enhanced_moc_mt", lambda seed_input_mt, moc_base_yield, water_added_mt, salt_added_mt: (seed_input_mt * moc_base_yield) + water_added_mt + salt_added_mt)
+_define("daily_revenue_oil_blend", lambda final_oil_blend_mt, oil_blend_sell_price: final_oil_blend_mt*oil_blend_sell_price)
+_define("daily_revenue_expeller_separate", lambda exp_oil_sold_separately_mt, expeller_oil_sell_price: exp_oil_sold_separately_mt*expeller_oil_sell_price)
+_define("daily_revenue_moc", lambda enhanced_moc_mt, moc_sell_price: enhanced_moc_mt*moc_sell_price)
+_define("daily_total_revenue", lambda daily_revenue_oil_blend, daily_revenue_expeller_separate, daily_revenue_moc: daily_revenue_oil_blend + daily_revenue_expeller_separate + daily_revenue_moc)
+_define("cost_seed", lambda seed_input_mt, seed_purchase_price: seed_input_mt * seed_purchase_price)
+_define("cost_market_oil", lambda market_oil_to_add_mt, market_bought_oil_price: market_oil_to_add_mt * market_bought_oil_price)
+_define("cost_moc_enhancement", lambda water_added_mt, water_cost_per_kg, salt_added_mt, salt_cost_per_kg: (water_added_mt*1000*water_cost_per_kg) + (salt_added_mt*1000*salt_cost_per_kg))
+_define("daily_cogs", lambda cost_seed, cost_market_oil, cost_moc_enhancement: cost_seed + cost_market_oil + cost_moc_enhancement)
+_define("daily_gm", lambda daily_total_revenue, daily_cogs: daily_total_revenue - daily_cogs)
+_define("daily_processing_cost", lambda seed_input_mt, processing_cost_per_mt: seed_input_mt * processing_cost_per_mt)
+_define("daily_cm", lambda daily_gm, daily_processing_cost: daily_gm - daily_processing_cost)
+_define("daily_variable_cost", lambda seed_input_mt, other_variable_costs_per_mt: seed_input_mt * other_variable_costs_per_mt)
+_define("daily_ebitda", lambda daily_cm, daily_variable_cost, other_expenses_daily: daily_cm - daily_variable_cost - other_expenses_daily)
+
+# --- Working capital ---
+_define("monthly_seed_consumption", lambda seed_input_mt, production_days_per_month: seed_input_mt * production_days_per_month)
+_define("rm_hoarded_value", lambda monthly_seed_consumption, rm_hoard_months, hoarded_rm_rate: monthly_seed_consumption*rm_hoard_months*hoarded_rm_rate)
+_define("rm_safety_stock_value", lambda seed_input_mt, rm_safety_stock_days, seed_purchase_price: seed_input_mt*rm_safety_stock_days*seed_purchase_price)
+_define("inventory_rm", lambda rm_hoarded_value, rm_safety_stock_value: rm_hoarded_value + rm_safety_stock_value)
+_define("total_daily_oil_revenue", lambda daily_revenue_oil_blend, daily_revenue_expeller_separate: daily_revenue_oil_blend+daily_revenue_expeller_separate)
+_define("total_daily_oil_qty", lambda final_oil_blend_mt, exp_oil_sold_separately_mt: final_oil_blend_mt+exp_oil_sold_separately_mt)
+_define("avg_oil_price", lambda total_daily_oil_revenue, total_daily_oil_qty: total_daily_oil_revenue/total_daily_oil_qty if total_daily_oil_qty > 0 else 0)
+_define("fg_oil_inventory_value", lambda total_daily_oil_qty, avg_oil_price, fg_oil_safety_days: total_daily_oil_qty*avg_oil_price*fg_oil_safety_days)
+_define("fg_moc_inventory_value", lambda enhanced_moc_mt, moc_sell_price, fg_moc_safety_days: enhanced_moc_mt*moc_sell_price*fg_moc_safety_days)
+_define("inventory_fg", lambda fg_oil_inventory_value, fg_moc_inventory_value: fg_oil_inventory_value + fg_moc_inventory_value)
+_define("total_inventory", lambda inventory_rm, inventory_fg: inventory_rm + inventory_fg)
+_define("debtors_oil", lambda total_daily_oil_revenue, oil_debtor_days: total_daily_oil_revenue*oil_debtor_days)
+_define("debtors_moc", lambda daily_revenue_moc, moc_debtor_days: daily_revenue_moc*moc_debtor_days)
+_define("total_debtors", lambda debtors_oil, debtors_moc: debtors_oil + debtors_moc)
+_define("trade_creditors", lambda seed_input_mt, seed_purchase_price, creditor_days: seed_input_mt*seed_purchase_price*creditor_days)
+_define("financed_rm_hoard_value", lambda rm_hoarded_value, rm_hoard_financed_pct: rm_hoarded_value*(rm_hoard_financed_pct/100))
+_define("gross_wc", lambda total_inventory, total_debtors, trade_creditors: total_inventory + total_debtors - trade_creditors)
+_define("net_wc_requirement", lambda gross_wc, financed_rm_hoard_value: gross_wc - financed_rm_hoard_value)
+_define("annual_production_days", lambda production_days_per_month: production_days_per_month * 12)
+_define("annual_ebitda", lambda daily_ebitda, annual_production_days: daily_ebitda * annual_production_days)
+
+# --- Interest, depreciation & tax ---
+_define("debt_funded_capex", lambda capex, equity_in_capex_pct: capex * (1 - equity_in_capex_pct/100))
+_define("main_capital_to_finance", lambda debt_funded_capex, net_wc_requirement: debt_funded_capex + net_wc_requirement)
+_define("interest_on_main_capital", lambda main_capital_to_finance, main_financing_rate_pa: main_capital_to_finance * (main_financing_rate_pa/100))
+_define("interest_on_hoard", lambda financed_rm_hoard_value, warehouse_finance_rate_pa: financed_rm_hoard_value * (warehouse_finance_rate_pa/100))
+_define("annual_interest", lambda interest_on_main_capital, interest_on_hoard: interest_on_main_capital + interest_on_hoard)
+_define("annual_depreciation", lambda capex, depreciation_years: capex/depreciation_years if depreciation_years > 0 else 0)
+_define("annual_ebit", lambda annual_ebitda, annual_depreciation: annual_ebitda - annual_depreciation)
+_define("annual_pbt", lambda annual_ebit, annual_interest: annual_ebit - annual_interest)
+_define("annual_tax", lambda annual_pbt, tax_rate_pct: max(0, annual_pbt * (tax_rate_pct/100)))
+_define("annual_pat", lambda annual_pbt, annual_tax: annual_pbt - annual_tax)
+
+# --- ROCE & ROE ---
+_define("capital_employed", lambda capex, net_wc_requirement, other_assets: capex + net_wc_requirement + other_assets)
+_define("roce_pat", lambda annual_pat, capital_employed: (annual_pat / capital_employed) * 100 if capital_employed != 0 else 0)
+_define("roce_ebit", lambda annual_ebit, capital_employed: (annual_ebit / capital_employed) * 100 if capital_employed != 0 else 0)
+_define("equity_funded_capex", lambda capex, equity_in_capex_pct: capex * (equity_in_capex_pct/100))
+_define("shareholders_equity", lambda equity_funded_capex, net_wc_requirement, other_assets: equity_funded_capex + net_wc_requirement + other_assets)
+_define("roe", lambda annual_pat, shareholders_equity: (annual_pat / shareholders_equity) * 100 if shareholders_equity > 0 else 0)
+
+# --- Solvex synergy ---
+_define("moc_consumed_inhouse_mt", lambda enhanced_moc_mt, moc_consumed_perc: enhanced_moc_mt*(moc_consumed_perc/100))
+_define("daily_solvex_saving", lambda moc_consumed_inhouse_mt, logistics_saved_per_ton, labor_saved_nos, labor_cost_per_head_daily, brokerage_saved_per_ton:
+        sum([moc_consumed_inhouse_mt*logistics_saved_per_ton, labor_saved_nos*labor_cost_per_head_daily, moc_consumed_inhouse_mt*brokerage_saved_per_ton]))
+_define("annual_solvex_saving", lambda daily_solvex_saving, annual_production_days: daily_solvex_saving * annual_production_days)
+_define("annual_pat_with_synergy", lambda annual_pat, annual_solvex_saving: annual_pat + annual_solvex_saving)
+_define("annual_ebit_with_synergy", lambda annual_ebit, annual_solvex_saving: annual_ebit + annual_solvex_saving)
+_define("roce_pat_with_synergy", lambda annual_pat_with_synergy, capital_employed: (annual_pat_with_synergy / capital_employed) * 100 if capital_employed != 0 else 0)
+_define("roce_ebit_with_synergy", lambda annual_ebit_with_synergy, capital_employed: (annual_ebit_with_synergy / capital_employed) * 100 if capital_employed != 0 else 0)
+_define("roe_with_synergy", lambda annual_pat_with_synergy, shareholders_equity: (annual_pat_with_synergy / shareholders_equity) * 100 if shareholders_equity > 0 else 0)
+
+# Output key -> node or input it reads, in the order of `calculate_all_metrics`' return dict.
+OUTPUTS = {
+    "seed_input_mt": "seed_input_mt", "pungency_recommendation": "pungency_recommendation", "final_oil_blend_mt": "final_oil_blend_mt",
+    "exp_oil_sold_separately_mt": "exp_oil_sold_separately_mt", "enhanced_moc_mt": "enhanced_moc_mt",
+    "daily_total_revenue": "daily_total_revenue", "daily_gm": "daily_gm", "daily_cm": "daily_cm", "daily_ebitda": "daily_ebitda",
+    "daily_cogs": "daily_cogs", "daily_processing_cost": "daily_processing_cost", "daily_variable_cost": "daily_variable_cost", "daily_other_expenses": "other_expenses_daily",
+    "production_days_per_month": "production_days_per_month", "annual_production_days": "annual_production_days",
+    "annual_interest": "annual_interest", "annual_depreciation": "annual_depreciation", "tax_rate_pct": "tax_rate_pct", "annual_ebit": "annual_ebit",
+    "annual_ebitda": "annual_ebitda", "annual_pbt": "annual_pbt", "annual_tax": "annual_tax", "annual_pat": "annual_pat",
+    "total_inventory": "total_inventory", "total_debtors": "total_debtors", "trade_creditors": "trade_creditors",
+    "financed_rm_hoard_value": "financed_rm_hoard_value", "net_wc_requirement": "net_wc_requirement", "capex": "capex",
+    "capital_employed": "capital_employed", "shareholders_equity": "shareholders_equity",
+    "roce_pat": "roce_pat", "roce_ebit": "roce_ebit", "roe": "roe",
+    "roce_pat_with_synergy": "roce_pat_with_synergy", "roce_ebit_with_synergy": "roce_ebit_with_synergy", "roe_with_synergy": "roe_with_synergy",
+    "daily_solvex_saving": "daily_solvex_saving",
+    "market_oil_to_add_mt": "market_oil_to_add_mt", "water_added_mt": "water_added_mt", "salt_added_mt": "salt_added_mt",
+    "cost_seed": "cost_seed", "cost_market_oil": "cost_market_oil", "cost_moc_enhancement": "cost_moc_enhancement",
+    "interest_on_hoard": "interest_on_hoard", "interest_on_main_capital": "interest_on_main_capital", "main_capital_to_finance": "main_capital_to_finance",
+    "inventory_rm": "inventory_rm", "inventory_fg": "inventory_fg",
+    "initial_blend_pungency": "initial_blend_pungency", "pungency_status": "pungency_status",  # as in the batch engine
+}
+
+
+def _compile():
+    """`NODES` as one straight-line function of the inputs: each node's value is a local passed to its dependents,
+    so a full run costs the node calls and nothing else (a dict-driven loop over the nodes is ~4x slower)."""
+    namespace = {f"_{name}": fn for name, (fn, _) in NODES.items()}
+    source = [f"def evaluate({', '.join(INPUT_NAMES)}):"]
+    source += [f"    {name} = _{name}({', '.join(deps)})" for name, (_, deps) in NODES.items()]
+    source.append("    return {" + ", ".join(f"{key!r}: {node}" for key, node in OUTPUTS.items()) + "}")
+    exec("\n".join(source), namespace)
+    return namespace["evaluate"]
+
+
+_evaluate = _compile()
+
+
+def calculate_all_metrics(inputs):
+    """Runs the full P&L, working-capital and return model for one scenario.
+
+    `inputs` is an `EngineInputs` or any mapping of input names to values (extra keys are ignored, missing
+    ones take the dashboard defaults). Nothing outside the function is read or written, so concurrent calls
+    from different sessions or threads cannot see each other's numbers.
+    """
+    return _evaluate(*(inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)))
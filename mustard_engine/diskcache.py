@@ -0,0 +1,183 @@
+"""Host-wide result cache tier: one SQLite file shared by every worker process (e.g. Streamlit replicas).
+
+    cache = ResultCache(disk=DiskCache("/dev/shm/mustard-cache.sqlite"))   # /dev/shm keeps the file in RAM
+    cache.get(inputs)      # memory LRU, then the shared file, then the engine (and the result is written back)
+
+Entries are looked up by `canonical_key` tuple (the in-memory cache's own key) and stored under a BLAKE2b-128 digest of
+`ENGINE_VERSION` plus that tuple, so a formula change makes every old entry unreachable; entries from an older version are also purged when a process opens the file. Each write is
+one SQLite transaction (WAL mode), so readers in other processes see a whole entry or none. The file is bounded by
+`max_bytes` of stored results: a write that takes it over the bound evicts least-recently-read entries down to 90%.
+
+Values are `marshal`led dicts (str/float/int only; the format is tied to the Python version, which is part of the
+digest too). Reads never write: hit counts and read times are buffered per process and flushed every `flush_every`
+lookups (and by `stats()`), and a read time is only recorded once it is `touch_after` seconds stale, so the hot path
+is one indexed SELECT. `stats()` reports this process's lookups, how many hits
+were on entries another process computed, and the counters summed over every process that has used the file.
+"""
+import atexit
+import hashlib
+import marshal
+import os
+import sqlite3
+import struct
+import sys
+import threading
+import time
+
+from .core import ENGINE_VERSION
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+COUNTERS = ("hits", "shared_hits", "misses", "writes", "evictions", "errors")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (key BLOB PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, version INTEGER NOT NULL,
+                                    writer BLOB NOT NULL, accessed REAL NOT NULL) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS entries_by_accessed ON entries(accessed);
+CREATE TABLE IF NOT EXISTS counters (name TEXT PRIMARY KEY, value INTEGER NOT NULL);
+"""
+
+
+def cache_digest(key, version=ENGINE_VERSION):
+    """16-byte digest of a `canonical_key` tuple under engine `version`: the multiples as little-endian float64 (exact,
+    as in `library`), prefixed with the version and the Python version `marshal` writes for."""
+    return hashlib.blake2b(struct.pack(f"<qqq{len(key)}d", version, *sys.version_info[:2], *map(float, key)), digest_size=16).digest()
+
+
+class DiskCache:
+    """Engine results in one SQLite file shared by all processes on a host; safe to use from many threads.
+
+    Failures of the tier itself (a locked or unwritable file) are counted as `errors` and treated as misses.
+    """
+
+    def __init__(self, path, max_bytes=DEFAULT_MAX_BYTES, flush_every=256, touch_after=60.0, timeout=5.0):
+        self.path, self.max_bytes, self.flush_every, self.touch_after, self.timeout = os.fspath(path), max_bytes, flush_every, touch_after, timeout
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self.writer = None  # per-process token, set on connect: tells this process's entries from other processes'
+        self._lock = threading.Lock()
+        self._db, self._pid = None, None
+        self._local = dict.fromkeys(COUNTERS, 0)    # this process, since it opened the file
+        self._pending = dict.fromkeys(COUNTERS, 0)  # not yet added to the shared counters
+        self._touched = {}                          # key -> last read time, not yet written
+        self._lookups = 0
+        atexit.register(self.close)  # hand the buffered counters to the file
+
+    def _connect(self):
+        """This process's connection (reopened after a fork); caller holds the lock."""
+        if self._pid != os.getpid():
+            self._db = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False, isolation_level=None)
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.execute("PRAGMA synchronous=NORMAL")
+            self._db.execute(f"PRAGMA mmap_size={int(self.max_bytes) * 2}")  # reads come straight from the page cache
+            self._db.executescript(_SCHEMA)
+            self._db.execute("BEGIN IMMEDIATE")
+            stale = self._db.execute("SELECT COALESCE(SUM(size), 0) FROM entries WHERE version != ?", (ENGINE_VERSION,)).fetchone()[0]
+            if stale:  # written before a formula changed
+                self._db.execute("DELETE FROM entries WHERE version != ?", (ENGINE_VERSION,))
+                self._db.execute("UPDATE counters SET value = value - ? WHERE name = 'bytes'", (stale,))
+            self._db.execute("COMMIT")
+            self._pid = os.getpid()
+            self.writer = os.urandom(8)
+        return self._db
+
+    def _count(self, name, n=1):
+        self._local[name] += n
+        self._pending[name] += n
+
+    # --- Lookups ---
+    def get(self, key):
+        """Stored metrics (a new dict) for a `canonical_key` tuple, or None."""
+        key = cache_digest(key)
+        with self._lock:
+            try:
+                row = self._connect().execute("SELECT value, writer, accessed FROM entries WHERE key = ?", (key,)).fetchone()
+            except sqlite3.Error:
+                self._count("errors")
+                return None
+            if row is None: self._count("misses")
+            else:
+                self._count("hits")
+                if row[1] != self.writer: self._count("shared_hits")
+                now = time.time()
+                if now - row[2] > self.touch_after: self._touched[key] = now
+            self._lookups += 1
+            if self._lookups % self.flush_every == 0: self._flush()
+        return None if row is None else marshal.loads(row[0])
+
+    def put(self, key, metrics):
+        """Stores `metrics` under a `canonical_key` tuple (first writer wins), evicting least-recently-read entries past `max_bytes`."""
+        key = cache_digest(key)
+        value = marshal.dumps({name: v.item() if hasattr(v, "item") else v for name, v in metrics.items()})  # NumPy scalars as Python ones
+        with self._lock:
+            try:
+                db = self._connect()
+                db.execute("BEGIN IMMEDIATE")
+                try:
+                    if db.execute("INSERT OR IGNORE INTO entries VALUES (?, ?, ?, ?, ?, ?)",
+                                  (key, value, len(value), ENGINE_VERSION, self.writer, time.time())).rowcount:
+                        self._count("writes")
+                        self._evict(db, len(value))
+                    db.execute("COMMIT")
+                except BaseException:
+                    db.execute("ROLLBACK")
+                    raise
+            except sqlite3.Error: self._count("errors")
+
+    def _evict(self, db, added):
+        """Keeps the stored bytes within `max_bytes`; runs inside the write transaction."""
+        total = db.execute("INSERT INTO counters VALUES ('bytes', ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value RETURNING value",
+                           (added,)).fetchone()[0]
+        if total <= self.max_bytes: return
+        freed, doomed = 0, []
+        for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            doomed.append((key,))
+            freed += size
+            if total - freed <= 0.9 * self.max_bytes: break
+        db.executemany("DELETE FROM entries WHERE key = ?", doomed)
+        db.execute("UPDATE counters SET value = value - ? WHERE name = 'bytes'", (freed,))
+        self._count("evictions", len(doomed))
+
+    # --- Housekeeping ---
+    def _flush(self):
+        """Adds this process's buffered counters and read times to the file; caller holds the lock."""
+        pending, touched = {k: v for k, v in self._pending.items() if v}, self._touched
+        if not pending and not touched: return
+        try:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            db.executemany("INSERT INTO counters VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value", pending.items())
+            db.executemany("UPDATE entries SET accessed = ? WHERE key = ?", [(t, k) for k, t in touched.items()])
+            db.execute("COMMIT")
+        except sqlite3.Error:
+            if self._db is not None and self._db.in_transaction: self._db.execute("ROLLBACK")
+            return
+        self._pending, self._touched = dict.fromkeys(COUNTERS, 0), {}
+
+    def stats(self):
+        """This process's counters, and the same counters (plus entries and bytes) over every process using the file."""
+        with self._lock:
+            self._flush()
+            db = self._connect()
+            shared = dict.fromkeys(COUNTERS + ("bytes",), 0)
+            shared.update(db.execute("SELECT name, value FROM counters"))
+            shared["entries"] = db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+            local = dict(self._local)
+        for counts in (local, shared):
+            lookups = counts["hits"] + counts["misses"]
+            counts["hit_rate"] = counts["hits"] / lookups if lookups else 0.0
+            counts["shared_hit_rate"] = counts["shared_hits"] / lookups if lookups else 0.0
+        return {"process": local, "host": shared, "max_bytes": self.max_bytes, "path": self.path}
+
+    def clear(self):
+        with self._lock:
+            db = self._connect()
+            db.execute("BEGIN IMMEDIATE")
+            db.execute("DELETE FROM entries")
+            db.execute("UPDATE counters SET value = 0 WHERE name = 'bytes'")
+            db.execute("COMMIT")
+            self._touched = {}
+
+    def close(self):
+        with self._lock:
+            self._flush()
+            if self._db is not None and self._pid == os.getpid(): self._db.close()
+            self._db, self._pid = None, None
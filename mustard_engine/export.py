@@ -0,0 +1,287 @@
+"""Streaming export of engine results to CSV, Parquet or XLSX: one row per scenario, its inputs and every metric.
+
+    axes = {"seed_purchase_price": np.linspace(48000, 62000, 1000), "oil_blend_sell_price": np.linspace(130000, 150000, 1000)}
+    export(grid_chunks(axes, EngineInputs()), "sweep.parquet")          # 1M rows, one chunk in memory at a time
+    for data in iter_export(frame_chunks(df), "xlsx"): response.write(data)
+
+Scenarios arrive as an iterable of chunks, each a dict of input columns or a DataFrame (`grid_chunks`,
+`frame_chunks`, or Monte Carlo's `draw_inputs`). Each chunk goes through `calculate_metrics_batch` and is written
+before the next one is evaluated, so memory stays at one chunk whatever the row count. Columns that are not engine
+inputs, such as a scenario id, come first, then every engine input, then every batch metric
+(`pungency_status` is the PUNGENCY_LOW / COMPLIANT / HIGH code, in place of the recommendation text).
+
+Writers take a path or any binary stream with `write`, seekable or not. Each chunk becomes an Arrow table
+(pyarrow ships with Streamlit and is imported on first write), and Arrow's C++ kernels do the per-cell work:
+
+- CSV goes through Arrow's CSV writer. Numbers are written in their shortest round-trip form, e.g. 192, not 192.0.
+- Parquet goes through Arrow's Parquet writer. Each chunk is one row group.
+- XLSX is a zip of worksheet XML, with each row built by Arrow string kernels, so it needs no Excel library. A new
+  sheet starts every 1,048,575 rows (Excel's limit), each with the header row.
+"""
+import io
+import math
+import os
+import zipfile
+
+import numpy as np
+
+from .batch import calculate_metrics_batch
+from .inputs import DEFAULT_INPUTS, INPUT_NAMES, EngineInputs
+from .variants import DASHBOARD
+
+FORMATS = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet",
+           "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"}  # format -> MIME type
+DEFAULT_CHUNK_SIZE = 50_000
+XLSX_MAX_ROWS = 1_048_576  # per sheet, the header row included
+
+
+def format_of(path, explicit=None):
+    """The export format named by `explicit`, else by the file extension (CSV if it names none)."""
+    fmt = explicit or os.path.splitext(os.fspath(path))[1].lstrip(".").lower()
+    if explicit and fmt not in FORMATS: raise ValueError(f"unknown export format {fmt!r}; expected one of {sorted(FORMATS)}")
+    return fmt if fmt in FORMATS else "csv"
+
+
+# --- Scenario chunks ---
+def grid_chunks(axes, base=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Chunks of the full grid over `axes` ({input name: values}), with `base` (EngineInputs or mapping) elsewhere.
+    The last axis varies fastest, and no more than one chunk of the grid exists at a time. With no axes the grid is
+    the single `base` row."""
+    p = EngineInputs() if base is None else base if isinstance(base, EngineInputs) else EngineInputs.from_mapping(base)
+    unknown = set(axes).difference(DEFAULT_INPUTS)
+    if unknown: raise ValueError(f"not engine inputs: {sorted(unknown)}")
+    values = [np.asarray(v, dtype=np.float64).ravel() for v in axes.values()]
+    shape = tuple(len(v) for v in values)
+    total = math.prod(shape)
+    if not axes:
+        yield p.as_dict()
+        return
+    for start in range(0, total, chunk_size):
+        index = np.unravel_index(np.arange(start, min(total, start + chunk_size)), shape)
+        yield {**p.as_dict(), **{name: v[i] for name, v, i in zip(axes, values, index)}}
+
+
+def frame_chunks(columns, chunk_size=DEFAULT_CHUNK_SIZE):
+    """Row slices of a DataFrame, or of a dict of equal-length columns (scalars repeat on every row)."""
+    if hasattr(columns, "iloc"):
+        for start in range(0, len(columns), chunk_size): yield columns.iloc[start:start + chunk_size]
+        return
+    arrays = {name: np.asarray(v) for name, v in columns.items()}
+    rows = max((len(v) for v in arrays.values() if v.ndim), default=1)
+    for start in range(0, rows, chunk_size): yield {name: v[start:start + chunk_size] if v.ndim else v for name, v in arrays.items()}
+
+
+def result_chunks(chunks, variant=DASHBOARD, columns=None):
+    """Evaluates each chunk; yields {column: 1-D array}: the passthrough columns, every input, then the metrics
+    (only `columns`, if given)."""
+    for chunk in chunks:
+        metrics = calculate_metrics_batch(chunk, variant)
+        wanted = list(metrics) if columns is None else list(columns)
+        unknown = set(wanted).difference(metrics)
+        if unknown: raise ValueError(f"unknown metrics: {sorted(unknown)}")
+        shape = np.broadcast_shapes((1,), *(np.shape(v) for v in metrics.values()))
+        rows = math.prod(shape)
+        flat = lambda values: np.broadcast_to(values, shape).reshape(rows)
+        extra = {name: flat(np.asarray(chunk[name])) for name in chunk if name not in DEFAULT_INPUTS}
+        inputs = {name: flat(np.asarray(chunk[name] if name in chunk else DEFAULT_INPUTS[name], dtype=np.float64)) for name in INPUT_NAMES}
+        yield {**extra, **inputs, **{name: flat(metrics[name]) for name in wanted if name not in inputs}}
+
+
+# --- Writers ---
+class ChunkSink(io.RawIOBase):
+    """Write-only, unseekable binary stream that hands back what was written since the last `drain()`: a writer's
+    output, a piece at a time, for a chunked HTTP response."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts, self._position = [], 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._parts.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data, self._parts = b"".join(self._parts), []
+        return data
+
+
+def _arrow(values):
+    """One column as an Arrow array; an object column whose values Arrow cannot type together (mixed JSON) becomes text."""
+    import pyarrow as pa
+
+    array = np.asarray(values)
+    try: return pa.array(array)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return pa.array([None if v is None else str(v) for v in array.tolist()])
+
+
+class _Writer:
+    """Writes chunks of columns ({name: 1-D array or list}) to `stream` as Arrow tables; closes it only if it opened it.
+    Every chunk is cast to the first one's schema."""
+
+    def __init__(self, stream, owns=False):
+        self.stream, self.owns, self.rows, self.schema = stream, owns, 0, None
+
+    def write(self, columns):
+        import pyarrow as pa
+
+        table = pa.table({str(name): _arrow(values) for name, values in columns.items()})
+        if self.schema is None: self.schema = table.schema
+        else: table = table.cast(self.schema)
+        if table.num_rows: self._write(table)
+        self.rows += table.num_rows
+
+    def close(self):
+        try: self._finish()
+        finally:
+            if self.owns: self.stream.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class _CsvWriter(_Writer):
+    _writer = None
+
+    def _write(self, table):
+        import pyarrow.csv as pcsv
+
+        if self._writer is None: self._writer = pcsv.CSVWriter(self.stream, self.schema)
+        self._writer.write_table(table)
+
+    def _finish(self):
+        if self._writer is not None: self._writer.close()  # the stream stays open for its owner
+
+
+class _ParquetWriter(_Writer):
+    _writer = None
+
+    def _write(self, table):
+        import pyarrow.parquet as pq
+
+        if self._writer is None: self._writer = pq.ParquetWriter(self.stream, self.schema)
+        self._writer.write_table(table)
+
+    def _finish(self):
+        if self._writer is not None: self._writer.close()
+
+
+_XML = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+_MAIN, _RELS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main", "http://schemas.openxmlformats.org/package/2006/relationships"
+_OFFICE = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+_SHEET_HEAD = (f'{_XML}<worksheet xmlns="{_MAIN}"><sheetViews><sheetView workbookViewId="0">'
+               '<pane ySplit="1" topLeftCell="A2" activePane="bottomLeft" state="frozen"/></sheetView></sheetViews><sheetData>')
+_XLSX_SLICE = 8192  # rows turned into XML at a time
+
+
+def _xlsx_cells(array):
+    """One column's cells as an Arrow string array: numbers as values, text inline, missing and non-finite values empty."""
+    import pyarrow as pa
+    import pyarrow.compute as pc
+
+    kind = array.type
+    if pa.types.is_boolean(kind): cells = pc.if_else(array, '<c t="b"><v>1</v></c>', '<c t="b"><v>0</v></c>')
+    elif pa.types.is_integer(kind) or pa.types.is_floating(kind):
+        cells = pc.binary_join_element_wise("<c><v>", pc.cast(array, pa.string()), "</v></c>", "")  # shortest round-trip digits
+        if pa.types.is_floating(kind): cells = pc.if_else(pc.is_finite(array), cells, None)
+    else:
+        text = pc.cast(array, pa.string())
+        for char, entity in (("&", "&amp;"), ("<", "&lt;"), (">", "&gt;")): text = pc.replace_substring(text, char, entity)
+        cells = pc.if_else(pc.equal(text, ""), None, pc.binary_join_element_wise('<c t="inlineStr"><is><t>', text, "</t></is></c>", ""))
+    return pc.fill_null(cells, "<c/>")
+
+
+def _string_bytes(strings):
+    """The concatenated values of an Arrow string array, without a copy."""
+    _, offsets, data = strings.buffers()
+    offsets = np.frombuffer(offsets, dtype=np.int32)[strings.offset:strings.offset + len(strings) + 1]
+    return memoryview(data)[offsets[0]:offsets[-1]] if len(strings) else b""
+
+
+class _XlsxWriter(_Writer):
+    def __init__(self, stream, owns=False):
+        super().__init__(stream, owns)
+        self._zip = zipfile.ZipFile(stream, "w", zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._sheet, self._sheets, self._sheet_rows = None, 0, 0
+
+    def _new_sheet(self):
+        import pyarrow as pa
+
+        if self._sheet is not None: self._end_sheet()
+        self._sheets += 1
+        self._sheet = self._zip.open(f"xl/worksheets/sheet{self._sheets}.xml", "w", force_zip64=True)
+        header = _xlsx_cells(pa.array(self.schema.names if self.schema is not None else [], pa.string()))
+        self._sheet.write(f"{_SHEET_HEAD}<row>{''.join(header.to_pylist())}</row>".encode())
+        self._sheet_rows = 1
+
+    def _end_sheet(self):
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+
+    def _write(self, table):
+        import pyarrow.compute as pc
+
+        start = 0
+        while start < table.num_rows:
+            if self._sheet is None or self._sheet_rows >= XLSX_MAX_ROWS: self._new_sheet()
+            part = table.slice(start, min(_XLSX_SLICE, XLSX_MAX_ROWS - self._sheet_rows))
+            rows = pc.binary_join_element_wise("<row>", *(_xlsx_cells(column.combine_chunks()) for column in part.columns), "</row>", "")
+            self._sheet.write(_string_bytes(rows))
+            self._sheet_rows += part.num_rows
+            start += part.num_rows
+
+    def _finish(self):
+        if self._sheet is None: self._new_sheet()  # no rows: one sheet, holding the header if a chunk arrived
+        self._end_sheet()
+        sheets = range(1, self._sheets + 1)
+        self._zip.writestr("[Content_Types].xml", f'{_XML}<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+                           '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+                           '<Default Extension="xml" ContentType="application/xml"/>'
+                           '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+                           + "".join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                                     for i in sheets) + "</Types>")
+        self._zip.writestr("_rels/.rels", f'{_XML}<Relationships xmlns="{_RELS}"><Relationship Id="rId1" Type="{_OFFICE}/officeDocument" Target="xl/workbook.xml"/></Relationships>')
+        self._zip.writestr("xl/workbook.xml", f'{_XML}<workbook xmlns="{_MAIN}" xmlns:r="{_OFFICE}"><sheets>'
+                           + "".join(f'<sheet name="Results{"" if i == 1 else f" {i}"}" sheetId="{i}" r:id="rId{i}"/>' for i in sheets) + "</sheets></workbook>")
+        self._zip.writestr("xl/_rels/workbook.xml.rels", f'{_XML}<Relationships xmlns="{_RELS}">'
+                           + "".join(f'<Relationship Id="rId{i}" Type="{_OFFICE}/worksheet" Target="worksheets/sheet{i}.xml"/>' for i in sheets) + "</Relationships>")
+        self._zip.close()
+
+
+_WRITERS = {"csv": _CsvWriter, "parquet": _ParquetWriter, "xlsx": _XlsxWriter}
+
+
+def open_writer(dst, fmt=None):
+    """A writer for `dst`, a path (format from its extension unless `fmt` is given) or a binary stream (`fmt` needed,
+    else CSV). Use it as a context manager; `.write(columns)` appends one chunk and `.rows` counts what was written."""
+    if isinstance(dst, (str, os.PathLike)): return _WRITERS[format_of(dst, fmt)](open(dst, "wb"), owns=True)
+    return _WRITERS[format_of("", fmt or "csv")](dst)
+
+
+def export(chunks, dst, fmt=None, variant=DASHBOARD, columns=None):
+    """Evaluates the scenario `chunks` and writes the results to `dst` (see `open_writer`); returns the rows written."""
+    with open_writer(dst, fmt) as writer:
+        for result in result_chunks(chunks, variant, columns): writer.write(result)
+    return writer.rows
+
+
+def iter_export(chunks, fmt="csv", variant=DASHBOARD, columns=None):
+    """`export` as a generator of bytes: the file's next piece after each chunk, for a streamed response."""
+    sink = ChunkSink()
+    with open_writer(sink, fmt) as writer:
+        for result in result_chunks(chunks, variant, columns):
+            writer.write(result)
+            data = sink.drain()
+            if data: yield data
+    data = sink.drain()
+    if data: yield data
@@ -0,0 +1,191 @@
+"""Number formatting shared by both dashboards and the engine's recommendation text.
+
+The scalar helpers (`format_indian`, `format_cr`, `format_inr`) format one value at a time. `format_indian_array`
+formats a whole NumPy array or pandas column in one pass and produces exactly the same strings — digits are
+grouped by index arithmetic on a character matrix rather than by per-cell string slicing.
+"""
+from functools import lru_cache
+
+
+def format_indian(num):
+    """Formats a number into the Indian numbering system for better readability."""
+    if not isinstance(num, (int, float)): return num
+    num_str = f"{abs(num):,.0f}"
+    parts = num_str.split('.')
+    integer_part = parts[0].replace(',', '')
+    if len(integer_part) > 3:
+        last_three = integer_part[-3:]
+        other_digits = integer_part[:-3]
+        if other_digits:
+            formatted_other_digits = ','.join([other_digits[max(0, i-2):i] for i in range(len(other_digits), 0, -2)][::-1])
+            formatted_num = f"{formatted_other_digits},{last_three}"
+        else: formatted_num = last_three
+    else: formatted_num = integer_part
+    return '-' + formatted_num if num < 0 else formatted_num
+
+
+def format_cr(n):
+    try:
+        n = float(n)
+    except:
+        return n
+    return f"₹{n/1e7:.2f} Cr"
+
+
+def format_lakh(n):
+    try:
+        n = float(n)
+    except:
+        return n
+    return f"₹{n/1e5:.2f} L"
+
+
+def format_inr(n):
+    try:
+        n = float(n)
+    except:
+        return n
+    return f"₹{n:,.0f}"
+
+
+# --- Batch formatting ---
+_INT_DIGITS = 19           # widest non-negative int64
+_EXACT_LIMIT = 2.0 ** 53   # beyond this, float -> int64 rounding is no longer exact; use the scalar path
+_CHUNK = 65_536
+
+
+_UNITS = {  # unit -> (scalar formatter, divisor, prefix, suffix); divisor None means whole rupees in Indian grouping
+    None: (format_indian, None, "", ""),
+    "rupee": (lambda v: f"₹ {format_indian(v)}", None, "₹ ", ""),
+    "lakh": (format_lakh, 1e5, "₹", " L"),
+    "crore": (format_cr, 1e7, "₹", " Cr"),
+}
+
+
+@lru_cache(maxsize=1)
+def _quads():
+    """UCS-4 codes of "0000" .. "9999", one row per value."""
+    import numpy as np
+
+    return np.array([list(f"{i:04d}") for i in range(10_000)]).view(np.uint32).reshape(10_000, 4).copy()
+
+
+def _digit_codes(mag):
+    """(codes, place, length) for non-negative int64 `mag`.
+
+    `codes` is a right-aligned, zero-padded UCS-4 digit matrix only as wide as the chunk's longest number (so
+    crore and lakh columns stay narrow), `place` is each column's place value counted from the units, and
+    `length` is each row's digit count. Digits are peeled off four at a time through a lookup table.
+    """
+    import numpy as np
+
+    length = np.searchsorted(10 ** np.arange(_INT_DIGITS, dtype=np.int64), mag, side="right").clip(1)
+    groups = -(-int(length.max(initial=1)) // 4)
+    quads = mag[:, None] // (10_000 ** np.arange(groups - 1, -1, -1, dtype=np.int64)) % 10_000
+    codes = _quads()[quads].reshape(len(mag), 4 * groups)
+    return codes, np.arange(4 * groups - 1, -1, -1), length
+
+
+def _codes(text):
+    import numpy as np
+
+    return np.array([ord(ch) for ch in text], dtype=np.uint32)
+
+
+def _compose(n, width, prefix, pieces):
+    """`prefix` on every row, then (destination columns, UCS-4 codes, mask) pieces scattered into place.
+
+    Returns one string per row; trailing unused columns are NUL, which NumPy strips.
+    """
+    import numpy as np
+
+    out = np.zeros((n, width + 1), dtype=np.uint32)  # the extra column swallows masked-out writes
+    out[:, :len(prefix)] = _codes(prefix)
+    rows = np.arange(n)[:, None] * (width + 1)
+    for dest, codes, mask in pieces:
+        np.put(out, rows + np.where(mask, dest, width), codes)
+    return out[:, :width].copy().view(f"U{width}").ravel()
+
+
+def _sign(n, prefix, neg):
+    import numpy as np
+
+    return np.full((n, 1), len(prefix)), np.full((n, 1), ord("-"), dtype=np.uint32), neg[:, None] > 0
+
+
+def _indian_strings(mag, neg, prefix):
+    """`prefix` + optional '-' + Indian-grouped digits of non-negative int64 `mag`."""
+    import numpy as np
+
+    n = len(mag)
+    codes, place, length = _digit_codes(mag)
+    commas = np.where(length > 3, (length - 2) // 2, 0)
+    last = len(prefix) + neg + length + commas - 1  # column of the units digit
+    most = max((len(place) - 2) // 2, 0)
+    k = np.arange(1, most + 1)  # the k-th comma from the right sits 3k characters left of the units digit
+    pieces = [_sign(n, prefix, neg),
+              (last[:, None] - place - np.maximum((place - 1) // 2, 0), codes, place < length[:, None]),
+              (last[:, None] - 3 * k, np.broadcast_to(_codes(","), (n, most)), commas[:, None] >= k)]
+    return _compose(n, len(prefix) + 1 + len(place) + most, prefix, pieces)
+
+
+def _fixed2_strings(values, prefix, suffix):
+    """`f"{prefix}{v:.2f}{suffix}"` for a float array, plus a mask of lanes safe to format this way.
+
+    Lanes that are non-finite, too large, or within rounding error of a half-cent tie are flagged for the scalar path.
+    """
+    import numpy as np
+
+    n = len(values)
+    scaled = values * 100
+    finite = np.isfinite(scaled) & (np.abs(scaled) < _EXACT_LIMIT)
+    magnitude = np.abs(np.where(finite, scaled, 0.0))
+    ok = finite & ~(np.abs(magnitude - np.trunc(magnitude) - 0.5) <= 2 * np.spacing(magnitude))
+    cents = np.rint(magnitude).astype(np.int64)
+    codes, place, length = _digit_codes(cents // 100)
+    neg = np.signbit(values).astype(np.int64)
+    dot = len(prefix) + neg + length
+    tail = np.concatenate([np.broadcast_to(_codes("."), (n, 1)), _quads()[cents % 100][:, 2:],
+                           np.broadcast_to(_codes(suffix), (n, len(suffix)))], axis=1)
+    pieces = [_sign(n, prefix, neg),
+              (dot[:, None] - 1 - place, codes, place < length[:, None]),
+              (dot[:, None] + np.arange(tail.shape[1]), tail, True)]
+    return _compose(n, len(prefix) + 1 + len(place) + tail.shape[1], prefix, pieces), ok
+
+
+def format_indian_array(values, unit=None):
+    """Formats a whole array or pandas column; output matches the scalar formatter for `unit` element for element.
+
+    `unit` is None (plain Indian grouping, as `format_indian`), "rupee" ("₹ 1,23,456"), "lakh" (as
+    `format_lakh`) or "crore" (as `format_cr`). NaN and infinities format the way the scalar helpers format
+    them. A pandas Series comes back as a Series on the same index; anything else as a NumPy string array.
+    """
+    import numpy as np
+
+    if unit not in _UNITS: raise ValueError(f"unit must be one of {list(_UNITS)}, got {unit!r}")
+    scalar, divisor, prefix, suffix = _UNITS[unit]
+    arr = np.asarray(values)
+    if arr.dtype.kind not in "iuf": arr = arr.astype(np.float64)
+    flat = arr.ravel()
+    parts = []
+    for start in range(0, len(flat), _CHUNK):
+        chunk = flat[start:start + _CHUNK]
+        if divisor is not None:
+            out, ok = _fixed2_strings(chunk.astype(np.float64) / divisor, prefix, suffix)
+        else:
+            if chunk.dtype.kind == "f":
+                ok = np.isfinite(chunk) & (np.abs(chunk) < _EXACT_LIMIT)
+                mag = np.rint(np.abs(np.where(ok, chunk, 0.0))).astype(np.int64)
+            else:
+                ok = np.abs(chunk.astype(np.float64)) < _EXACT_LIMIT
+                mag = np.abs(np.where(ok, chunk, 0)).astype(np.int64)
+            out = _indian_strings(mag, (chunk < 0).astype(np.int64), prefix)
+        if not ok.all():
+            out = out.astype(object)
+            for i in np.flatnonzero(~ok): out[i] = scalar(chunk[i].item())
+            out = out.astype(str)
+        parts.append(out)
+    result = (np.concatenate(parts) if parts else np.array([], dtype=str)).reshape(arr.shape)
+    if hasattr(values, "index") and hasattr(values, "name"):  # pandas Series in, Series out
+        return type(values)(result, index=values.index, name=values.name)
+    return result
@@ -0,0 +1,97 @@
+"""The engine as a dependency graph of named nodes, recomputing only what an input change dirties.
+
+The nodes are the engine's formulas (`core.NODES`); each one's parameter names are its dependencies (engine
+inputs or other nodes), so the graph's shape is read straight off the formulas. `MetricsGraph` holds one
+scenario: `update()` marks the changed inputs' downstream nodes dirty, and the next evaluation runs just
+those, in topological order. A node whose value comes out unchanged does not dirty its own dependents.
+
+    g = MetricsGraph(inputs)
+    g.update(labor_cost_per_head_daily=600.0)
+    g.metrics()      # same dict as calculate_all_metrics
+    g.last_run       # ('daily_solvex_saving', 'annual_solvex_saving', ..., 'roe_with_synergy')
+"""
+from .core import NODES, OUTPUTS
+from .inputs import INPUT_NAMES, EngineInputs
+
+# Direct dependents of every input and node; nodes are already in topological order by construction.
+DEPENDENTS = {name: [] for name in (*INPUT_NAMES, *NODES)}
+for _name, (_fn, _deps) in NODES.items():
+    for _dep in _deps: DEPENDENTS[_dep].append(_name)
+_ORDER = {name: i for i, name in enumerate(NODES)}
+
+
+def downstream(*names):
+    """Every node transitively affected by the given inputs or nodes, in evaluation order."""
+    seen, stack = set(), list(names)
+    while stack:
+        for child in DEPENDENTS[stack.pop()]:
+            if child not in seen:
+                seen.add(child)
+                stack.append(child)
+    return sorted(seen, key=_ORDER.__getitem__)
+
+
+class MetricsGraph:
+    """One scenario held as a graph of node values, recomputed incrementally.
+
+    `last_run` lists the nodes evaluated by the most recent recompute; `runs` counts node evaluations
+    over the graph's lifetime.
+    """
+
+    def __init__(self, inputs=None):
+        p = EngineInputs() if inputs is None else inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)
+        self.values = p.as_dict()
+        self._dirty = set(NODES)
+        self.last_run, self.runs = (), 0
+
+    @property
+    def inputs(self):
+        return EngineInputs.from_mapping(self.values)
+
+    def update(self, **changes):
+        """Sets input values; only nodes downstream of an input whose value actually changed are marked dirty."""
+        unknown = set(changes).difference(INPUT_NAMES)
+        if unknown: raise TypeError(f"Unknown engine inputs: {', '.join(sorted(unknown))}")
+        for name, value in changes.items():
+            if self.values[name] != value:
+                self.values[name] = value
+                self._dirty.update(DEPENDENTS[name])
+        return self
+
+    def recompute(self):
+        """Evaluates dirty nodes in topological order; unchanged results stop propagating. Returns the nodes run."""
+        values, dirty, ran = self.values, self._dirty, []
+        for name, (fn, deps) in NODES.items():
+            if name not in dirty: continue
+            new = fn(*[values[d] for d in deps])
+            ran.append(name)
+            old = values.get(name, _MISSING)
+            values[name] = new
+            if old is _MISSING or old != new: dirty.update(DEPENDENTS[name])
+        dirty.clear()
+        self.runs += len(ran)
+        self.last_run = tuple(ran)
+        return self.last_run
+
+    def metrics(self):
+        """The same dict `calculate_all_metrics` returns, recomputing whatever is dirty first."""
+        self.recompute()
+        return {key: self.values[source] for key, source in OUTPUTS.items()}
+
+    def __getitem__(self, name):
+        self.recompute()
+        return self.values[name]
+
+    def sweep(self, name, values, outputs=("annual_pat", "roce_pat")):
+        """Varies one input across `values`, recomputing only its downstream cone each step; restores the input after."""
+        original, rows = self.values[name], []
+        try:
+            for value in values:
+                self.update(**{name: value}).recompute()
+                rows.append({out: self.values[OUTPUTS.get(out, out)] for out in outputs})
+        finally:
+            self.update(**{name: original})
+        return rows
+
+
+_MISSING = object()
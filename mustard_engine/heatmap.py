@@ -0,0 +1,155 @@
+"""2-D heatmaps of engine outputs over two inputs, evaluated on a cached lattice with adaptive refinement.
+
+Grid points sit on a lattice whose step along each axis is a power of two, so a window is always a slice of the
+same lattice: panning reuses every tile already computed, and zooming in by 2x reuses every other point of the
+previous level. Tiles of `TILE` x `TILE` points are cached (LRU) under a key made of the *non-axis* inputs, the
+axis names, the metrics stored and the lattice step; one batched engine call fills all tiles a redraw is missing.
+
+With `adaptive=True` the window is first evaluated on a lattice `COARSE` times coarser and bilinearly upsampled.
+Only fine tiles where the contour metric (annual PAT by default) changes sign, or the pungency branch changes,
+are then evaluated exactly — elsewhere the engine is smooth and the interpolation is within a fraction of a
+percent. A seed x oil price view at resolution 500 (626 x 391 points) costs ~60k evaluations instead of 280k,
+and panning it by a tenth of its width costs ~6k.
+"""
+import math
+import threading
+from collections import OrderedDict, namedtuple
+
+import numpy as np
+
+from .batch import calculate_metrics_batch
+from .cache import canonical_key
+from .inputs import INPUT_NAMES, EngineInputs
+
+HEATMAP_METRICS = ("annual_pat", "roce_pat", "roce_ebit", "roe")
+TILE = 32
+COARSE = 4   # coarse lattice step, in fine steps (a power of two, so coarse points are fine points)
+DEFAULT_MAX_TILES = 4096
+
+Heatmap = namedtuple("Heatmap", "x y values evaluated")  # values: {metric: (len(y), len(x)) array}; evaluated: engine calls made
+
+
+def lattice_step(lo, hi, resolution):
+    """The power-of-two step giving closest to `resolution` points across [lo, hi] (within a factor of sqrt 2)."""
+    span = hi - lo
+    if span <= 0: raise ValueError("axis range must have high > low")
+    return 2.0 ** round(math.log2(span / max(resolution - 1, 1)))
+
+
+class GridCache:
+    """LRU of evaluated lattice tiles, shared by every heatmap drawn in the process."""
+
+    def __init__(self, max_tiles=DEFAULT_MAX_TILES):
+        self.max_tiles = max_tiles
+        self._tiles = OrderedDict()  # (context, sx, sy, ti, tj) -> {metric: (TILE, TILE) array}
+        self._lock = threading.Lock()
+        self.hits = self.misses = 0
+
+    def _get_tiles(self, context, base, axes, steps, ids, metrics):
+        """{(ti, tj): tile} for `ids`, evaluating every missing tile in one batched engine call."""
+        (x_name, y_name), (sx, sy) = axes, steps
+        found, missing = {}, []
+        with self._lock:
+            for tid in ids:
+                tile = self._tiles.get((context, sx, sy) + tid)
+                if tile is None: missing.append(tid)
+                else:
+                    self._tiles.move_to_end((context, sx, sy) + tid)
+                    found[tid] = tile
+            self.hits += len(found)
+            self.misses += len(missing)
+        if missing:
+            offsets = np.arange(TILE)
+            xs = np.concatenate([np.tile((ti * TILE + offsets) * sx, TILE) for ti, _ in missing])
+            ys = np.concatenate([np.repeat((tj * TILE + offsets) * sy, TILE) for _, tj in missing])
+            out = calculate_metrics_batch({**base, x_name: xs, y_name: ys})
+            with self._lock:
+                for k, tid in enumerate(missing):
+                    tile = {m: out[m][k * TILE * TILE:(k + 1) * TILE * TILE].reshape(TILE, TILE) for m in metrics}
+                    found[tid] = self._tiles[(context, sx, sy) + tid] = tile
+                while len(self._tiles) > self.max_tiles: self._tiles.popitem(last=False)
+        return found, len(missing) * TILE * TILE
+
+    def _window(self, context, base, axes, steps, i0, i1, j0, j1, metrics, only=None):
+        """Exact values on lattice indices [i0, i1] x [j0, j1] (rows are y), assembled from tiles.
+
+        `only` restricts evaluation to those tile ids; other tiles are left as NaN.
+        """
+        ids = [(ti, tj) for tj in range(j0 // TILE, j1 // TILE + 1) for ti in range(i0 // TILE, i1 // TILE + 1)]
+        if only is not None: ids = [tid for tid in ids if tid in only]
+        tiles, evaluated = self._get_tiles(context, base, axes, steps, ids, metrics)
+        grids = {m: np.full((j1 - j0 + 1, i1 - i0 + 1), np.nan) for m in metrics}
+        for (ti, tj), tile in tiles.items():
+            xa, xb = max(i0, ti * TILE), min(i1, ti * TILE + TILE - 1)
+            ya, yb = max(j0, tj * TILE), min(j1, tj * TILE + TILE - 1)
+            for m in metrics:
+                grids[m][ya - j0:yb - j0 + 1, xa - i0:xb - i0 + 1] = tile[m][ya - tj * TILE:yb - tj * TILE + 1, xa - ti * TILE:xb - ti * TILE + 1]
+        return grids, evaluated
+
+    def heatmap(self, base, x_name, x_range, y_name, y_range, resolution=500, metrics=HEATMAP_METRICS, adaptive=True, contour="annual_pat"):
+        """Evaluates `metrics` over x_range x y_range with every other input fixed at `base`."""
+        if x_name == y_name or x_name not in INPUT_NAMES or y_name not in INPUT_NAMES: raise ValueError("need two different engine inputs as axes")
+        p = base if isinstance(base, EngineInputs) else EngineInputs.from_mapping(base)
+        stored = tuple(dict.fromkeys((*metrics, contour, "pungency_status")))
+        # The non-axis inputs and the metrics a tile holds: another metric set must not read these tiles.
+        context = (canonical_key(p.replace(**{x_name: 0, y_name: 0})), x_name, y_name, tuple(sorted(stored)))
+        sx, sy = lattice_step(*x_range, resolution), lattice_step(*y_range, resolution)
+        i0, i1 = math.ceil(x_range[0] / sx), math.floor(x_range[1] / sx)
+        j0, j1 = math.ceil(y_range[0] / sy), math.floor(y_range[1] / sy)
+        x, y = np.arange(i0, i1 + 1) * sx, np.arange(j0, j1 + 1) * sy
+        base_cols, axes = p.as_dict(), (x_name, y_name)
+        if not adaptive:
+            grids, evaluated = self._window(context, base_cols, axes, (sx, sy), i0, i1, j0, j1, stored)
+            return Heatmap(x, y, {m: grids[m] for m in metrics}, evaluated)
+
+        # --- Coarse pass, upsampled ---
+        ci0, ci1, cj0, cj1 = i0 // COARSE, -(-i1 // COARSE), j0 // COARSE, -(-j1 // COARSE)
+        coarse, evaluated = self._window(context, base_cols, axes, (sx * COARSE, sy * COARSE), ci0, ci1, cj0, cj1, stored)
+        fx, fy = np.arange(i0, i1 + 1) / COARSE - ci0, np.arange(j0, j1 + 1) / COARSE - cj0
+        ix, iy = np.minimum(fx.astype(int), ci1 - ci0 - 1).clip(0), np.minimum(fy.astype(int), cj1 - cj0 - 1).clip(0)
+        wx, wy = (fx - ix)[None, :], (fy - iy)[:, None]
+        grids = {}
+        for m in stored:
+            c = coarse[m]
+            top = c[iy][:, ix] * (1 - wx) + c[iy][:, ix + 1] * wx
+            bottom = c[iy + 1][:, ix] * (1 - wx) + c[iy + 1][:, ix + 1] * wx
+            grids[m] = top * (1 - wy) + bottom * wy
+
+        # --- Exact tiles wherever the contour or the pungency branch runs through ---
+        sign, status = np.sign(coarse[contour]), coarse["pungency_status"]
+        refine = set()
+        for tj in range(j0 // TILE, j1 // TILE + 1):
+            for ti in range(i0 // TILE, i1 // TILE + 1):
+                a, b = max(ti * TILE // COARSE - ci0 - 1, 0), min((ti + 1) * TILE // COARSE - ci0 + 1, ci1 - ci0) + 1
+                c, d = max(tj * TILE // COARSE - cj0 - 1, 0), min((tj + 1) * TILE // COARSE - cj0 + 1, cj1 - cj0) + 1
+                block_sign, block_status = sign[c:d, a:b], status[c:d, a:b]
+                if block_sign.size and (block_sign.min() != block_sign.max() or block_status.min() != block_status.max()): refine.add((ti, tj))
+        if refine:
+            exact, n = self._window(context, base_cols, axes, (sx, sy), i0, i1, j0, j1, stored, only=refine)
+            evaluated += n
+            for m in stored:
+                mask = ~np.isnan(exact[m])
+                grids[m][mask] = exact[m][mask]
+        return Heatmap(x, y, {m: grids[m] for m in metrics}, evaluated)
+
+    def clear(self):
+        with self._lock: self._tiles.clear()
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {"tiles": len(self._tiles), "max_tiles": self.max_tiles, "hits": self.hits, "misses": self.misses,
+                    "hit_rate": self.hits / lookups if lookups else 0.0}
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_grid_cache():
+    """The one `GridCache` every session in this process uses."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None: _shared = GridCache()
+    return _shared
@@ -0,0 +1,80 @@
+"""Declared engine inputs, in sidebar order, with the dashboard's default values."""
+from collections import namedtuple
+
+DEFAULT_INPUTS = {
+    # --- Production & Prices ---
+    "seed_input_mt": 192.0, "kachi_ghani_yield_pct": 18, "expeller_yield_pct": 15,
+    "seed_purchase_price": 50000.0, "oil_blend_sell_price": 141000.0, "moc_sell_price": 22000.0,
+    # --- Costs & Expenses ---
+    "processing_cost_per_mt": 2500.0, "other_variable_costs_per_mt": 0.0, "other_expenses_daily": 45000.0,
+    "production_days_per_month": 24.0,
+    # --- Pungency & MoC Enhancement ---
+    "kachi_ghani_pungency": 0.4, "expeller_oil_pungency": 0.12, "expeller_oil_sell_price": 136000.0,
+    "market_bought_oil_price": 132000.0, "water_added_pct": 2, "water_cost_per_kg": 1.0,
+    "salt_added_pct": 3, "salt_cost_per_kg": 5.0,
+    # --- Capex, Tax & Financing ---
+    "capex": 200000000.0, "equity_in_capex_pct": 100, "depreciation_years": 15, "tax_rate_pct": 25,
+    "other_assets": 0.0, "warehouse_finance_rate_pa": 10.0, "main_financing_rate_pa": 10.0, "rm_hoard_financed_pct": 0,
+    # --- Working Capital Cycles ---
+    "rm_hoard_months": 0.0, "hoarded_rm_rate": 50000.0, "rm_safety_stock_days": 48.0, "fg_oil_safety_days": 15.0,
+    "fg_moc_safety_days": 4.0, "oil_debtor_days": 5.0, "moc_debtor_days": 5.0, "creditor_days": 5.0,
+    # --- Solvex Plant Synergy ---
+    "moc_consumed_perc": 100, "logistics_saved_per_ton": 400.0, "labor_saved_nos": 4.0,
+    "labor_cost_per_head_daily": 550.0, "brokerage_saved_per_ton": 150.0,
+}
+
+INPUT_NAMES = tuple(DEFAULT_INPUTS)
+
+INPUT_LABELS = {
+    "seed_input_mt": "Daily Seed Input (MT)", "kachi_ghani_yield_pct": "Kachi Ghani Oil Yield (%)",
+    "expeller_yield_pct": "Expeller Oil Yield (%)", "seed_purchase_price": "Seed Purchase Price (₹/MT)",
+    "oil_blend_sell_price": "Oil Blend Sell Price (₹/MT)", "moc_sell_price": "MoC Sell Price (₹/MT)",
+    "processing_cost_per_mt": "Processing Cost (₹/MT of Seed)", "other_variable_costs_per_mt": "Other Variable Costs (₹/MT of Seed)",
+    "other_expenses_daily": "Other Fixed Expenses (₹/day)", "production_days_per_month": "Production Days per Month",
+    "kachi_ghani_pungency": "Kachi Ghani Oil Pungency (%)", "expeller_oil_pungency": "Expeller Oil Pungency (%)",
+    "expeller_oil_sell_price": "Expeller Oil Sell Price (₹/MT)", "market_bought_oil_price": "Market-Bought Oil Price (₹/MT)",
+    "water_added_pct": "Water Added to MoC (% of seed)", "water_cost_per_kg": "Water Cost (₹/kg)",
+    "salt_added_pct": "Salt Added to MoC (% of seed)", "salt_cost_per_kg": "Salt Cost (₹/kg)",
+    "capex": "Capex (₹)", "equity_in_capex_pct": "Equity % in Capex", "depreciation_years": "Depreciation Period (Years)",
+    "tax_rate_pct": "Tax Rate (%)", "other_assets": "Other Assets (₹)",
+    "warehouse_finance_rate_pa": "Warehouse Finance Interest Rate (% p.a.)",
+    "main_financing_rate_pa": "Main Financing Cost Interest Rate (% p.a.)", "rm_hoard_financed_pct": "% of Hoarded RM Financed",
+    "rm_hoard_months": "Raw Material Hoard (months)", "hoarded_rm_rate": "Hoarded RM Rate (₹/MT)",
+    "rm_safety_stock_days": "RM Safety Stock (days)", "fg_oil_safety_days": "FG (Oil) Safety Stock (days)",
+    "fg_moc_safety_days": "FG (MoC) Safety Stock (days)", "oil_debtor_days": "Oil Debtor Cycle (days)",
+    "moc_debtor_days": "MoC Debtor Cycle (days)", "creditor_days": "Creditors Days",
+    "moc_consumed_perc": "% of MOC Consumed In-House", "logistics_saved_per_ton": "Logistics Saved (₹/Ton of MOC)",
+    "labor_saved_nos": "Labor Headcount Saved (Daily)", "labor_cost_per_head_daily": "Cost per Labor Head (₹/Day)",
+    "brokerage_saved_per_ton": "Brokerage Saved (₹/Ton of MOC)",
+}
+
+# (min, max) the sidebar allows; None where a number_input is unbounded on that side.
+INPUT_BOUNDS = {
+    "kachi_ghani_yield_pct": (0, 100), "expeller_yield_pct": (0, 100),
+    "kachi_ghani_pungency": (0.0, 1.0), "expeller_oil_pungency": (0.0, 1.0), "water_added_pct": (0, 10), "salt_added_pct": (0, 10),
+    "equity_in_capex_pct": (0, 100), "depreciation_years": (1, None), "tax_rate_pct": (0, 50),
+    "warehouse_finance_rate_pa": (0.0, 25.0), "main_financing_rate_pa": (0.0, 25.0), "rm_hoard_financed_pct": (0, 100),
+    "moc_consumed_perc": (0, 100),
+}
+
+
+class EngineInputs(namedtuple("_EngineInputs", INPUT_NAMES, defaults=tuple(DEFAULT_INPUTS.values()))):
+    """Immutable snapshot of every declared engine input; safe to share across sessions and threads.
+
+    A slotted named tuple: missing inputs take the dashboard defaults and unknown keywords are rejected, but
+    `from_mapping` ignores extra keys so a broader dict (e.g. a whole form state) can be passed straight in.
+    """
+    __slots__ = ()
+
+    @classmethod
+    def from_mapping(cls, mapping):
+        return cls._make([mapping[name] if name in mapping else default for name, default in DEFAULT_INPUTS.items()])
+
+    def replace(self, **changes):
+        return self._replace(**changes)
+
+    def as_dict(self):
+        return dict(zip(INPUT_NAMES, self))
+
+    def as_tuple(self):
+        return tuple(self)
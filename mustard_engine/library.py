@@ -0,0 +1,215 @@
+"""Persistent scenario library: named input sets and their metrics in a local SQLite file.
+
+    library = ScenarioLibrary("data/scenarios.sqlite")
+    library.save("Base case", EngineInputs())
+    inputs, metrics = library.load("Base case")             # stored metrics; no engine run
+    library.compare(library.names()[:500]).metrics["roce_pat"]
+
+Scenarios are content-addressed: the key is a 128-bit BLAKE2b digest of the inputs' `canonical_key` multiples, so two names
+for the same inputs share one row, and `18` vs `18.0` (or 0.1 + 0.2 vs 0.3) hash alike. Inputs and metrics are
+stored as packed float64 blobs in `INPUT_NAMES` / `METRIC_NAMES` order, which decode straight into NumPy
+columns for bulk reads; the orders are recorded in the `meta` table and a file from an older layout is migrated
+on open. Every row remembers the `ENGINE_VERSION` that computed its
+metrics; rows from an older engine are recomputed in one batch the next time they are read.
+
+Schema: `scenarios(hash PRIMARY KEY, inputs, metrics, engine_version, created)` WITHOUT ROWID, and
+`names(name PRIMARY KEY, hash, saved)` with an index on `names(hash)`. The file runs in WAL mode, and
+`save_many` writes any number of scenarios in one transaction with one batched engine call.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import calculate_metrics_batch
+from .cache import DEFAULT_RESOLUTION
+from .core import ENGINE_VERSION
+from .inputs import DEFAULT_INPUTS, INPUT_NAMES, EngineInputs
+
+METRIC_NAMES = tuple(calculate_metrics_batch({}))
+DEFAULT_PATH = os.environ.get("MUSTARD_SCENARIO_DB", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "scenarios.sqlite"))
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+CREATE TABLE IF NOT EXISTS scenarios (hash BLOB PRIMARY KEY, inputs BLOB NOT NULL, metrics BLOB, engine_version INTEGER NOT NULL, created REAL NOT NULL) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS names (name TEXT PRIMARY KEY, hash BLOB NOT NULL REFERENCES scenarios(hash), saved REAL NOT NULL);
+CREATE INDEX IF NOT EXISTS names_by_hash ON names(hash);
+CREATE INDEX IF NOT EXISTS names_by_saved ON names(saved);
+"""
+
+# inputs / metrics: {name: (n,) float64 array}, rows in `names` order; `varying`: inputs that differ between rows.
+Comparison = namedtuple("Comparison", "names hashes inputs metrics varying")
+
+
+def _hashes(grid):
+    """Row-wise content hashes of an (n, len(INPUT_NAMES)) input grid: BLAKE2b-128 of the `canonical_key`
+    multiples, held as float64 (exact: past 2**53 a float is already a whole number, as `round` would return)."""
+    keys = np.round(np.asarray(grid, dtype=np.float64).reshape(-1, len(INPUT_NAMES)) * (1 / DEFAULT_RESOLUTION)) + 0.0  # + 0.0 folds -0.0
+    data = np.ascontiguousarray(keys, dtype="<f8")
+    return [hashlib.blake2b(row, digest_size=16).digest() for row in data]
+
+
+def scenario_hash(inputs):
+    """16-byte content hash of the declared inputs (insensitive to int/float spelling and float noise)."""
+    p = inputs if isinstance(inputs, EngineInputs) else EngineInputs.from_mapping(inputs)
+    return _hashes([tuple(p)])[0]
+
+
+def _pack(values):
+    return np.ascontiguousarray(values, dtype="<f8").tobytes()
+
+
+class ScenarioLibrary:
+    """Named scenarios in one SQLite file; one connection shared by every thread behind a lock."""
+
+    def __init__(self, path=DEFAULT_PATH):
+        self.path = os.fspath(path)
+        if self.path != ":memory:": os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.executescript(_SCHEMA)
+        meta = {key: tuple(json.loads(value)) for key, value in self._db.execute("SELECT key, value FROM meta")}
+        if meta != {"inputs": INPUT_NAMES, "metrics": METRIC_NAMES}: self._migrate(meta)
+
+    def _migrate(self, meta):
+        """Brings a new file, or one written for a different input/metric list, to the current layout: inputs are
+        re-packed by name (inputs added since take their defaults) and stored metrics are marked stale."""
+        old_inputs = meta.get("inputs", INPUT_NAMES)
+        self._db.execute("BEGIN")
+        if old_inputs != INPUT_NAMES:
+            rows = self._db.execute("SELECT hash, inputs FROM scenarios").fetchall()
+            for h, blob in rows:
+                values = dict(zip(old_inputs, np.frombuffer(blob, dtype="<f8").tolist()))
+                self._db.execute("UPDATE scenarios SET inputs = ? WHERE hash = ?", (_pack([values.get(k, DEFAULT_INPUTS[k]) for k in INPUT_NAMES]), h))
+        if meta.get("metrics", METRIC_NAMES) != METRIC_NAMES or old_inputs != INPUT_NAMES:
+            self._db.execute("UPDATE scenarios SET metrics = NULL")
+        self._db.executemany("INSERT OR REPLACE INTO meta VALUES (?, ?)", [("inputs", json.dumps(INPUT_NAMES)), ("metrics", json.dumps(METRIC_NAMES))])
+        self._db.execute("COMMIT")
+
+    def close(self):
+        with self._lock: self._db.close()
+
+    # --- Writing ---
+    def save(self, name, inputs, metrics=None):
+        """Saves `inputs` under `name` (replacing whatever the name pointed at); returns the scenario hash.
+
+        `metrics` are the engine's outputs for `inputs` if already computed, e.g. the dashboard's
+        `calculate_all_metrics` dict (it holds every batch metric); otherwise the engine runs once here.
+        """
+        return self.save_many([(name, inputs)], None if metrics is None else {k: np.atleast_1d(metrics[k]) for k in METRIC_NAMES})[0]
+
+    def save_many(self, items, metrics=None):
+        """Saves (name, inputs) pairs in one transaction; scenarios already stored are not recomputed or rewritten, and a
+        scenario a re-saved name pointed at is dropped once no name points at it."""
+        items = [(name, p if isinstance(p, EngineInputs) else EngineInputs.from_mapping(p)) for name, p in items]
+        if not items: return []
+        grid = np.array([p for _, p in items], dtype=np.float64)
+        hashes = _hashes(grid)
+        with self._lock:
+            named = {name: (h, i) for i, ((name, _), h) in enumerate(zip(items, hashes))}  # a name given twice keeps its last inputs
+            known = self._existing({h for h, _ in named.values()})
+            fresh = {h: i for h, i in named.values() if h not in known or self._stale(known[h])}
+            rows, now = [], time.time()
+            if fresh:
+                index = np.fromiter(fresh.values(), dtype=np.intp, count=len(fresh))
+                if metrics is None: out = calculate_metrics_batch(dict(zip(INPUT_NAMES, grid[index].T)))
+                else: out = {k: np.asarray(metrics[k], dtype=np.float64)[index] for k in METRIC_NAMES}
+                table = np.column_stack([np.broadcast_to(np.asarray(out[k], dtype=np.float64), len(index)) for k in METRIC_NAMES])
+                rows = sorted(zip(fresh, map(_pack, grid[index]), map(_pack, table), [ENGINE_VERSION] * len(index), [now] * len(index)))
+            self._db.execute("BEGIN")
+            try:  # rows go in key order, so each B-tree page is touched once
+                replaced = self._db.execute("SELECT DISTINCT hash FROM names WHERE name IN (SELECT value FROM json_each(?))",
+                                            (json.dumps(list(named)),)).fetchall()
+                self._db.executemany("INSERT OR REPLACE INTO scenarios VALUES (?, ?, ?, ?, ?)", rows)
+                self._db.executemany("INSERT OR REPLACE INTO names VALUES (?, ?, ?)", sorted((name, h, now) for name, (h, _) in named.items()))
+                # a re-saved name's old scenario goes once no other name points at it, as in `delete`
+                self._db.executemany("DELETE FROM scenarios WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM names WHERE hash = ?)", [row * 2 for row in replaced])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+        return hashes
+
+    def _existing(self, hashes):
+        """{hash: engine_version} for the hashes already stored."""
+        found, hashes = {}, list(hashes)
+        for start in range(0, len(hashes), 500):  # well under SQLite's bound-parameter limit
+            chunk = hashes[start:start + 500]
+            found.update(self._db.execute(f"SELECT hash, engine_version FROM scenarios WHERE hash IN ({','.join('?' * len(chunk))})", chunk))
+        return found
+
+    @staticmethod
+    def _stale(version):
+        return version != ENGINE_VERSION
+
+    def delete(self, name):
+        """Removes a name; its scenario row goes too once no other name points at it."""
+        with self._lock:
+            row = self._db.execute("SELECT hash FROM names WHERE name = ?", (name,)).fetchone()
+            if row is None: return
+            self._db.execute("BEGIN")
+            self._db.execute("DELETE FROM names WHERE name = ?", (name,))
+            self._db.execute("DELETE FROM scenarios WHERE hash = ? AND NOT EXISTS (SELECT 1 FROM names WHERE hash = ?)", row * 2)
+            self._db.execute("COMMIT")
+
+    # --- Reading ---
+    def names(self, prefix=None, limit=None):
+        """Saved names, most recently saved first."""
+        query = "SELECT name FROM names" + (" WHERE name >= ? AND name < ?" if prefix else "") + " ORDER BY saved DESC, name" + (f" LIMIT {int(limit)}" if limit else "")
+        args = (prefix, prefix + "\U0010ffff") if prefix else ()
+        with self._lock: return [name for (name,) in self._db.execute(query, args)]
+
+    def __len__(self):
+        with self._lock: return self._db.execute("SELECT COUNT(*) FROM names").fetchone()[0]
+
+    def load(self, name):
+        """(EngineInputs, {metric: value}) saved under `name`, from the stored row (recomputed only if stale)."""
+        result = self.compare([name])
+        if not result.names: raise KeyError(f"no scenario named {name!r}")
+        inputs = EngineInputs._make(float(result.inputs[k][0]) for k in INPUT_NAMES)
+        return inputs, {k: float(v[0]) for k, v in result.metrics.items()}
+
+    def compare(self, names):
+        """Loads many named scenarios in one query; stale or missing metrics are recomputed in one batch and stored."""
+        names = list(dict.fromkeys(names))
+        with self._lock:
+            rows = self._db.execute("SELECT n.name, s.hash, s.inputs, s.metrics, s.engine_version FROM names n JOIN scenarios s ON s.hash = n.hash "
+                                    "WHERE n.name IN (SELECT value FROM json_each(?))", (json.dumps(names),)).fetchall()
+        position = {name: i for i, name in enumerate(names)}
+        rows.sort(key=lambda row: position[row[0]])
+        n = len(rows)
+        grid = np.frombuffer(b"".join(row[2] for row in rows), dtype="<f8").reshape(n, len(INPUT_NAMES))
+        inputs = dict(zip(INPUT_NAMES, grid.T.copy()))
+        stale = np.array([row[3] is None or self._stale(row[4]) for row in rows], dtype=bool)
+        table = np.empty((n, len(METRIC_NAMES)))
+        if (~stale).any(): table[~stale] = np.frombuffer(b"".join(row[3] for row, s in zip(rows, stale) if not s), dtype="<f8").reshape(-1, len(METRIC_NAMES))
+        if stale.any():
+            out = calculate_metrics_batch({k: v[stale] for k, v in inputs.items()})
+            table[stale] = np.column_stack([np.broadcast_to(out[k], int(stale.sum())) for k in METRIC_NAMES])
+            with self._lock:
+                self._db.execute("BEGIN")
+                self._db.executemany("UPDATE scenarios SET metrics = ?, engine_version = ? WHERE hash = ?",
+                                     [(_pack(table[i]), ENGINE_VERSION, rows[i][1]) for i in np.flatnonzero(stale)])
+                self._db.execute("COMMIT")
+        varying = tuple(k for k in INPUT_NAMES if n and (inputs[k] != inputs[k][0]).any())
+        return Comparison([row[0] for row in rows], [row[1] for row in rows], inputs, dict(zip(METRIC_NAMES, table.T)), varying)
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_library():
+    """The one `ScenarioLibrary` (at `DEFAULT_PATH`, or $MUSTARD_SCENARIO_DB) every session in this process uses."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None: _shared = ScenarioLibrary()
+    return _shared
@@ -0,0 +1,214 @@
+"""Monte Carlo risk mode: draw uncertain inputs from distributions and summarise the spread of key metrics.
+
+Draws are generated and evaluated in fixed-size chunks through `calculate_metrics_batch`; each chunk is folded
+into a bounded-memory `QuantileSketch` per metric and then discarded, so 10M draws cost no more memory than one
+chunk. Chunks get their own child of one `SeedSequence`, so results depend only on `seed` and `chunk_size` —
+not on how many worker processes ran them.
+
+    dists = {"seed_purchase_price": Normal(50000, 4000), "oil_blend_sell_price": Normal(141000, 8000)}
+    run_monte_carlo(EngineInputs(), dists, {("seed_purchase_price", "oil_blend_sell_price"): 0.6}).summary()
+"""
+import math
+import multiprocessing
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from .batch import calculate_metrics_batch
+from .inputs import INPUT_BOUNDS, EngineInputs
+
+RISK_METRICS = ("annual_pat", "roce_ebit", "roce_pat", "net_wc_requirement")
+DEFAULT_CHUNK_SIZE = 100_000
+DEFAULT_RELATIVE_ACCURACY = 0.005
+
+
+# --- Distributions: each maps standard-normal draws to its marginal, so correlation is a Gaussian copula ---
+def _norm_cdf(z):
+    """Standard normal CDF via the Numerical Recipes erfc approximation (fractional error < 1.2e-7)."""
+    x = np.abs(z) / math.sqrt(2)
+    t = 1 / (1 + 0.5 * x)
+    poly = -x*x - 1.26551223 + t*(1.00002368 + t*(0.37409196 + t*(0.09678418 + t*(-0.18628806 + t*(0.27886807
+           + t*(-1.13520398 + t*(1.48851587 + t*(-0.82215223 + t*0.17087277))))))))
+    tail = 0.5 * t * np.exp(poly)
+    return np.where(z >= 0, 1 - tail, tail)
+
+
+class Normal(namedtuple("Normal", "mean sd")):
+    __slots__ = ()
+
+    def from_normal(self, z): return self.mean + self.sd * z
+
+
+class LogNormal(namedtuple("LogNormal", "median sigma")):
+    """Multiplicative noise around `median`; `sigma` is the standard deviation of the log."""
+    __slots__ = ()
+
+    def from_normal(self, z): return self.median * np.exp(self.sigma * z)
+
+
+class Uniform(namedtuple("Uniform", "low high")):
+    __slots__ = ()
+
+    def from_normal(self, z): return self.low + (self.high - self.low) * _norm_cdf(z)
+
+
+class Triangular(namedtuple("Triangular", "low mode high")):
+    __slots__ = ()
+
+    def from_normal(self, z):
+        u, span = _norm_cdf(z), self.high - self.low
+        cut = (self.mode - self.low) / span if span else 0.5
+        return np.where(u < cut, self.low + np.sqrt(u * span * (self.mode - self.low)),
+                        self.high - np.sqrt((1 - u) * span * (self.high - self.mode)))
+
+
+def correlation_factor(names, correlations):
+    """Cholesky factor of the correlation matrix over `names`; `correlations` maps (name, name) pairs to rho."""
+    corr = np.eye(len(names))
+    index = {name: i for i, name in enumerate(names)}
+    for (a, b), rho in (correlations or {}).items():
+        if a not in index or b not in index: raise ValueError(f"correlation between {a!r} and {b!r}: both need a distribution")
+        corr[index[a], index[b]] = corr[index[b], index[a]] = rho
+    try: return np.linalg.cholesky(corr)
+    except np.linalg.LinAlgError: raise ValueError("correlations do not form a valid (positive definite) correlation matrix") from None
+
+
+# --- Streaming quantiles ---
+class QuantileSketch:
+    """Mergeable quantile sketch with bounded memory (log-bucketed, in the style of DDSketch).
+
+    Every value lands in a bucket whose bounds are within `relative_accuracy` of each other, so any quantile
+    is returned to within that relative error. Buckets cover magnitudes on a log scale, so a few thousand span
+    everything from paise to lakh crore; past `max_buckets`, the smallest magnitudes are merged together. Exact
+    count, sum, min, max and the number of negative values are tracked alongside.
+    """
+
+    def __init__(self, relative_accuracy=DEFAULT_RELATIVE_ACCURACY, max_buckets=4096):
+        self.relative_accuracy, self.max_buckets = relative_accuracy, max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._log_gamma = math.log(self.gamma)
+        self.positive, self.negative = {}, {}  # bucket index -> count, for value and -value respectively
+        self.zeros = self.count = self.negatives = 0
+        self.total, self.min, self.max = 0.0, math.inf, -math.inf
+
+    def add(self, values):
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if not len(values): return self
+        self.count += len(values)
+        self.total += float(values.sum())
+        self.min, self.max = min(self.min, float(values.min())), max(self.max, float(values.max()))
+        self.negatives += int((values < 0).sum())
+        self.zeros += int((values == 0).sum())
+        for store, part in ((self.positive, values[values > 0]), (self.negative, -values[values < 0])):
+            if not len(part): continue
+            keys, counts = np.unique(np.ceil(np.log(part) / self._log_gamma).astype(np.int64), return_counts=True)
+            for key, n in zip(keys.tolist(), counts.tolist()): store[key] = store.get(key, 0) + n
+        self._collapse()
+        return self
+
+    def merge(self, other):
+        if (self.relative_accuracy, self.max_buckets) != (other.relative_accuracy, other.max_buckets): raise ValueError("can only merge sketches with the same settings")
+        for mine, theirs in ((self.positive, other.positive), (self.negative, other.negative)):
+            for key, n in theirs.items(): mine[key] = mine.get(key, 0) + n
+        self.zeros += other.zeros; self.count += other.count; self.negatives += other.negatives; self.total += other.total
+        self.min, self.max = min(self.min, other.min), max(self.max, other.max)
+        self._collapse()
+        return self
+
+    def _collapse(self):
+        """Folds the lowest-magnitude buckets of each store into one another until under `max_buckets`."""
+        for store in (self.positive, self.negative):
+            excess = len(store) - self.max_buckets // 2
+            if excess <= 0: continue
+            keys = sorted(store)
+            spill = sum(store.pop(key) for key in keys[:excess + 1])
+            store[keys[excess]] = spill
+
+    def _value(self, key):
+        return 2 * self.gamma ** key / (self.gamma + 1)  # bucket midpoint in relative terms
+
+    def quantile(self, q):
+        if not self.count: return math.nan
+        rank = q * (self.count - 1)
+        seen = 0
+        for key in sorted(self.negative, reverse=True):  # most negative first
+            seen += self.negative[key]
+            if seen > rank: return max(self.min, -self._value(key))
+        seen += self.zeros
+        if seen > rank: return 0.0
+        for key in sorted(self.positive):
+            seen += self.positive[key]
+            if seen > rank: return min(self.max, self._value(key))
+        return self.max
+
+    @property
+    def mean(self): return self.total / self.count if self.count else math.nan
+
+    @property
+    def prob_negative(self): return self.negatives / self.count if self.count else math.nan
+
+
+# --- Running the simulation ---
+Summary = namedtuple("Summary", "p5 p50 p95 mean prob_loss")
+
+
+class MonteCarloResult(namedtuple("MonteCarloResult", "draws seed sketches")):
+    """`sketches` maps each metric to its merged `QuantileSketch`."""
+    __slots__ = ()
+
+    def summary(self):
+        """{metric: Summary(p5, p50, p95, mean, prob_loss)}; prob_loss is the share of draws below zero."""
+        return {metric: Summary(s.quantile(0.05), s.quantile(0.5), s.quantile(0.95), s.mean, s.prob_negative)
+                for metric, s in self.sketches.items()}
+
+
+def draw_inputs(base, distributions, factor, seed, size):
+    """One chunk of scenario columns: `base` everywhere, with each input in `distributions` sampled and clipped."""
+    rng = np.random.default_rng(seed)
+    z = rng.standard_normal((size, len(distributions))) @ factor.T
+    columns = dict(base.as_dict())
+    for i, (name, dist) in enumerate(distributions.items()):
+        lo, hi = INPUT_BOUNDS.get(name, (None, None))
+        values = dist.from_normal(z[:, i])
+        columns[name] = np.clip(values, lo, hi) if lo is not None or hi is not None else values
+    return columns
+
+
+def _run_chunk(base, distributions, factor, seed, size, metrics, relative_accuracy):
+    """Draws and evaluates one chunk; returns a sketch per metric (small, so cheap to send back from a worker)."""
+    out = calculate_metrics_batch(draw_inputs(base, distributions, factor, seed, size))
+    return {metric: QuantileSketch(relative_accuracy).add(out[metric]) for metric in metrics}
+
+
+def run_monte_carlo(base, distributions, correlations=None, draws=1_000_000, seed=0, chunk_size=DEFAULT_CHUNK_SIZE,
+                    workers=1, metrics=RISK_METRICS, relative_accuracy=DEFAULT_RELATIVE_ACCURACY):
+    """Runs `draws` scenarios around `base`, sampling each input in `distributions` (name -> Normal/LogNormal/
+    Uniform/Triangular) with optional pairwise `correlations`. Inputs are clipped to the sidebar's bounds.
+
+    By default chunks run in-process; `workers` > 1 (None: all cores) spawns that many processes for the call, which
+    pays off only for runs of several seconds. The result is the same for a given `seed` and `chunk_size` whatever
+    the worker count.
+    """
+    p = base if isinstance(base, EngineInputs) else EngineInputs.from_mapping(base)
+    unknown = set(distributions) - set(p._fields)
+    if unknown: raise ValueError(f"not engine inputs: {sorted(unknown)}")
+    factor = correlation_factor(list(distributions), correlations)
+    sizes = [min(chunk_size, draws - start) for start in range(0, draws, chunk_size)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(p, dict(distributions), factor, s, n, tuple(metrics), relative_accuracy) for s, n in zip(seeds, sizes)]
+    workers = min(os.cpu_count() or 1 if workers is None else workers, len(jobs)) or 1
+    sketches = {metric: QuantileSketch(relative_accuracy) for metric in metrics}
+    if workers == 1:
+        parts = (_run_chunk(*job) for job in jobs)
+    else:
+        pool = ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("spawn"))  # never fork a threaded server
+        parts = pool.map(_run_chunk, *zip(*jobs))
+    try:
+        for part in parts:  # merged in chunk order as results arrive, so only the sketches stay in memory
+            for metric, sketch in part.items(): sketches[metric].merge(sketch)
+    finally:
+        if workers > 1: pool.shutdown()
+    return MonteCarloResult(draws, seed, sketches)
@@ -0,0 +1,118 @@
+"""Multi-plant portfolio: many crushing units, each with its own inputs, evaluated and consolidated together.
+
+All plants run through one `calculate_metrics_batch` call, and the per-plant result arrays are kept, so a
+drill-down into any plant reads the same numbers the totals were summed from. `Portfolio.update` edits one
+plant: the engine reruns for that plant alone and its row is written back in place; the group overlays and
+totals below are plain array arithmetic over the stored rows (no engine work), so they are redone in full.
+
+Two group-level effects can be switched on:
+
+- `pooled_safety_stock`: RM and FG safety stocks held as one group buffer. A pooled buffer covers the group's
+  combined variability, sqrt((1 - rho) * sum(s_i^2) + rho * sum(s_i)^2) for plant buffers s_i and demand
+  correlation rho (`demand_correlation`; rho = 0 is the textbook square-root law, rho = 1 saves nothing). The
+  saving is allocated back to plants in proportion to their own buffers and comes off their net WC and interest.
+- `warehouse_rate_pa`: one shared warehouse facility financing every plant's financed RM hoard at this rate,
+  instead of each plant's own `warehouse_finance_rate_pa`.
+
+    book = Portfolio([EngineInputs(), EngineInputs(seed_input_mt=120.0)], names=["Alwar", "Kota"], pooled_safety_stock=True)
+    book.update("Kota", seed_purchase_price=52000.0).consolidated().roce_pat
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import _columns, _safe_div, calculate_metrics_batch
+from .inputs import INPUT_NAMES, EngineInputs
+
+DEFAULT_DEMAND_CORRELATION = 0.5  # plants in one region buy and sell in correlated markets
+
+# Consolidated group figures (annual ₹, ROCE/ROE in %); savings are what the group effects are worth.
+Consolidated = namedtuple("Consolidated", "plants revenue ebitda depreciation ebit interest pbt tax pat net_wc_requirement "
+                                          "capital_employed shareholders_equity roce_ebit roce_pat roe safety_stock_saving warehouse_interest_saving")
+PLANT_LINES = ("revenue", "ebitda", "depreciation", "ebit", "interest", "pbt", "tax", "pat", "net_wc_requirement",
+               "capital_employed", "shareholders_equity", "roce_ebit", "roce_pat", "roe", "safety_stock_saving", "warehouse_interest_saving")
+
+
+def _plant_columns(plants):
+    """Input columns (writable float arrays, one row per plant) from a DataFrame, dict of arrays or list of scenarios."""
+    if isinstance(plants, (list, tuple)):
+        rows = [p if isinstance(p, EngineInputs) else EngineInputs.from_mapping(p) for p in plants]
+        return {name: np.array([getattr(p, name) for p in rows], dtype=np.float64) for name in INPUT_NAMES}
+    return {name: np.array(np.atleast_1d(column), dtype=np.float64) for name, column in _columns(plants).items()}
+
+
+class Portfolio:
+    """Per-plant inputs and engine results, with group consolidation; edit plants in place with `update`."""
+
+    def __init__(self, plants, names=None, pooled_safety_stock=False, demand_correlation=DEFAULT_DEMAND_CORRELATION, warehouse_rate_pa=None):
+        self.inputs = _plant_columns(plants)
+        n = len(self.inputs["capex"])
+        self.names = list(names) if names is not None else [f"Plant {i + 1}" for i in range(n)]
+        if len(self.names) != n: raise ValueError(f"{len(self.names)} names for {n} plants")
+        if not 0 <= demand_correlation <= 1: raise ValueError("demand_correlation must be between 0 and 1")
+        self.pooled_safety_stock, self.demand_correlation, self.warehouse_rate_pa = pooled_safety_stock, demand_correlation, warehouse_rate_pa
+        self.results = {key: np.array(values, dtype=np.float64) for key, values in calculate_metrics_batch(self.inputs).items()}
+
+    def __len__(self):
+        return len(self.names)
+
+    def _index(self, plant):
+        if isinstance(plant, str):
+            try: return self.names.index(plant)
+            except ValueError: raise KeyError(f"no plant named {plant!r}") from None
+        if not -len(self) <= plant < len(self): raise IndexError(f"plant {plant} out of range for {len(self)} plants")
+        return plant % len(self)
+
+    def update(self, plant, **changes):
+        """Changes some inputs of one plant (by index or name) and reruns the engine for that plant only."""
+        i = self._index(plant)
+        unknown = set(changes).difference(INPUT_NAMES)
+        if unknown: raise ValueError(f"not engine inputs: {sorted(unknown)}")
+        for name, value in changes.items(): self.inputs[name][i] = value
+        row = calculate_metrics_batch({name: column[i:i + 1] for name, column in self.inputs.items()})
+        for key, values in row.items(): self.results[key][i] = values[0]
+        return self
+
+    # --- Group effects and consolidation ---
+    def plant_lines(self):
+        """{line: per-plant array} after the group effects; `consolidated` sums these, so drill-downs add up."""
+        c, r = self.inputs, self.results
+        safety = c["seed_input_mt"] * c["rm_safety_stock_days"] * c["seed_purchase_price"] + r["inventory_fg"]
+        saving = np.zeros(len(self))
+        if self.pooled_safety_stock and safety.sum() > 0:
+            rho, total = self.demand_correlation, safety.sum()
+            saving = safety * (1 - np.sqrt((1 - rho) * (safety ** 2).sum() + rho * total ** 2) / total)
+        warehouse_saving = np.zeros(len(self))
+        if self.warehouse_rate_pa is not None:
+            warehouse_saving = r["financed_rm_hoard_value"] * (c["warehouse_finance_rate_pa"] - self.warehouse_rate_pa) / 100
+        net_wc = r["net_wc_requirement"] - saving
+        interest = r["annual_interest"] - saving * c["main_financing_rate_pa"] / 100 - warehouse_saving
+        ebit = r["annual_ebit"]
+        pbt = ebit - interest
+        tax = np.maximum(0, pbt * c["tax_rate_pct"] / 100)  # each plant stays its own taxable entity
+        capital_employed = r["capital_employed"] - saving
+        equity = r["shareholders_equity"] - saving
+        return {"revenue": r["daily_total_revenue"] * r["annual_production_days"], "ebitda": r["annual_ebitda"],
+                "depreciation": r["annual_depreciation"], "ebit": ebit, "interest": interest, "pbt": pbt, "tax": tax, "pat": pbt - tax,
+                "net_wc_requirement": net_wc, "capital_employed": capital_employed, "shareholders_equity": equity,
+                "roce_ebit": _safe_div(ebit, capital_employed, capital_employed != 0) * 100,
+                "roce_pat": _safe_div(pbt - tax, capital_employed, capital_employed != 0) * 100,
+                "roe": _safe_div(pbt - tax, equity, equity > 0) * 100,
+                "safety_stock_saving": saving, "warehouse_interest_saving": warehouse_saving}
+
+    def consolidated(self):
+        lines = self.plant_lines()
+        total = {line: float(values.sum()) for line, values in lines.items() if line not in ("roce_ebit", "roce_pat", "roe")}
+        ce, equity = total["capital_employed"], total["shareholders_equity"]
+        return Consolidated(len(self), total["revenue"], total["ebitda"], total["depreciation"], total["ebit"], total["interest"],
+                            total["pbt"], total["tax"], total["pat"], total["net_wc_requirement"], ce, equity,
+                            total["ebit"] / ce * 100 if ce else 0.0, total["pat"] / ce * 100 if ce else 0.0,
+                            total["pat"] / equity * 100 if equity > 0 else 0.0, total["safety_stock_saving"], total["warehouse_interest_saving"])
+
+    def plant(self, plant):
+        """Drill-down: one plant's inputs, engine results and group-adjusted lines, read from the shared arrays."""
+        i = self._index(plant)
+        lines = self.plant_lines()
+        return {"name": self.names[i], "inputs": EngineInputs._make(float(self.inputs[name][i]) for name in INPUT_NAMES),
+                "metrics": {key: float(values[i]) for key, values in self.results.items()},
+                "lines": {line: float(values[i]) for line, values in lines.items()}}
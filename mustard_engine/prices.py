@@ -0,0 +1,226 @@
+"""Historical price store: daily seed, oil and MoC prices per market, as memory-mapped columns on disk.
+
+    store = PriceStore("data/prices")
+    store.ingest_csv("mandi_prices.csv")               # columns: date, market, seed, oil, moc (any subset of the last three)
+    history = store.series("Jaipur", "2020-01-01", "2024-12-31")
+    calculate_metrics_batch(history.as_inputs(EngineInputs()))   # one scenario per trading day
+
+Layout: `root/manifest.json` names the markets; each market has a directory holding one raw little-endian file
+per column (`date.i4` as days since 1970-01-01, `seed.f8`, `oil.f8`, `moc.f8`), sorted by date. Files are opened
+with `np.memmap`, so opening a 10-year, multi-market history reads no data up front and a date-range query is a
+binary search plus a zero-copy slice. Ingest is append-only: rows later than a market's last date are appended
+to its files in place; only a market that receives back-dated or corrected rows is rewritten (merged, newest
+price winning) and atomically swapped in.
+"""
+import json
+import os
+import threading
+from collections import namedtuple
+
+import numpy as np
+
+from .inputs import EngineInputs
+
+COMMODITIES = {"seed": "seed_purchase_price", "oil": "oil_blend_sell_price", "moc": "moc_sell_price"}
+_DTYPES = {"date": np.dtype("<i4"), **{name: np.dtype("<f8") for name in COMMODITIES}}
+_FILES = {"date": "date.i4", **{name: f"{name}.f8" for name in COMMODITIES}}
+DEFAULT_ROOT = os.environ.get("MUSTARD_PRICE_STORE", os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "prices"))
+_MANIFEST = "manifest.json"
+_VERSION = 1
+
+
+class PriceSeries(namedtuple("PriceSeries", "market dates prices")):
+    """`dates`: datetime64[D] array; `prices`: {commodity: float array, NaN where the market did not quote}."""
+    __slots__ = ()
+
+    def as_inputs(self, base=None, fill="ffill"):
+        """Engine input columns, one scenario per date: each commodity's series replaces its sidebar price.
+
+        Gaps are forward-filled (`fill="ffill"`) or left to the `base` scenario's value (`fill=None`); dates before
+        a commodity's first quote always take the base value. Feed the result to `calculate_metrics_batch`.
+        """
+        p = EngineInputs() if base is None else base if isinstance(base, EngineInputs) else EngineInputs.from_mapping(base)
+        columns = p.as_dict()
+        for commodity, values in self.prices.items():
+            if fill == "ffill" and len(values):
+                seen = np.where(np.isnan(values), 0, np.arange(len(values)))
+                values = values[np.maximum.accumulate(seen)]
+            columns[COMMODITIES[commodity]] = np.where(np.isnan(values), getattr(p, COMMODITIES[commodity]), values)
+        return columns
+
+
+def _day(value):
+    return np.datetime64(value, "D").astype(np.int64) if value is not None else None
+
+
+def _one_row_per_date(rows):
+    """Collapses date-sorted columns to the last row of each date; a price that row leaves blank (NaN) is taken from
+    the latest earlier row on that date that has one."""
+    days = rows["date"]
+    first = np.append(True, days[1:] != days[:-1])
+    last = np.append(first[1:], True)
+    position = np.arange(len(days))
+    out = {"date": days[last]}
+    for commodity in COMMODITIES:
+        values = rows[commodity]
+        source = np.maximum.accumulate(np.where(first | ~np.isnan(values), position, 0))  # never reaches back past a date's first row
+        out[commodity] = values[source[last]]
+    return out
+
+
+class PriceStore:
+    """A directory of per-market memory-mapped price columns; safe to query from many threads.
+
+    Writes are serialized within the process; run one ingesting process at a time per directory.
+    """
+
+    def __init__(self, root):
+        self.root = os.fspath(root)
+        self._lock = threading.Lock()
+        self._maps = {}  # (market dir, column) -> ((inode, size), memmap)
+        self._manifest, self._manifest_mtime = self._read_manifest(), self._mtime()
+
+    # --- Manifest ---
+    def _read_manifest(self):
+        try:
+            with open(os.path.join(self.root, _MANIFEST), encoding="utf-8") as f: manifest = json.load(f)
+        except FileNotFoundError: return {"version": _VERSION, "markets": {}}
+        if manifest.get("version") != _VERSION: raise ValueError(f"{self.root} is a version {manifest.get('version')} price store; expected {_VERSION}")
+        return manifest
+
+    def _mtime(self):
+        try: return os.stat(os.path.join(self.root, _MANIFEST)).st_mtime_ns
+        except FileNotFoundError: return None
+
+    def _refresh(self):
+        """Picks up markets another process (or store instance) has added since the manifest was read."""
+        mtime = self._mtime()
+        if mtime != self._manifest_mtime: self._manifest, self._manifest_mtime = self._read_manifest(), mtime
+
+    def _write_manifest(self):
+        path = os.path.join(self.root, _MANIFEST)
+        with open(path + ".tmp", "w", encoding="utf-8") as f: json.dump(self._manifest, f, indent=1, sort_keys=True)
+        os.replace(path + ".tmp", path)
+        self._manifest_mtime = self._mtime()
+
+    def markets(self):
+        self._refresh()
+        return sorted(self._manifest["markets"])
+
+    # --- Reading ---
+    def _column(self, market, column):
+        directory = self._manifest["markets"][market]
+        path = os.path.join(self.root, directory, _FILES[column])
+        stat = os.stat(path)
+        version = (stat.st_ino, stat.st_size)  # an append grows the file; a merge (here or in another store) replaces it
+        with self._lock:
+            cached = self._maps.get((directory, column))
+            if cached is not None and cached[0] == version: return cached[1]
+            mapped = np.memmap(path, dtype=_DTYPES[column], mode="r") if stat.st_size else np.empty(0, _DTYPES[column])
+            self._maps[(directory, column)] = (version, mapped)
+            return mapped
+
+    def date_range(self, market):
+        """(first, last) date held for `market`, as datetime64[D]."""
+        days = self._column(market, "date")
+        if not len(days): return None
+        return days[0].astype("datetime64[D]"), days[-1].astype("datetime64[D]")
+
+    def series(self, market, start=None, end=None, commodities=tuple(COMMODITIES)):
+        """Prices for `market` on [start, end] (inclusive; None leaves that side open). Arrays are read-only views."""
+        if market not in self._manifest["markets"]: self._refresh()
+        if market not in self._manifest["markets"]: raise KeyError(f"no prices for market {market!r}; have {self.markets()}")
+        unknown = set(commodities).difference(COMMODITIES)
+        if unknown: raise ValueError(f"unknown commodities {sorted(unknown)}; have {tuple(COMMODITIES)}")
+        days = self._column(market, "date")
+        lo = 0 if start is None else int(np.searchsorted(days, _day(start), side="left"))
+        hi = len(days) if end is None else int(np.searchsorted(days, _day(end), side="right"))
+        return PriceSeries(market, days[lo:hi].astype("datetime64[D]"), {c: self._column(market, c)[lo:hi] for c in commodities})
+
+    # --- Writing ---
+    def ingest_csv(self, path, date_column="date", market_column="market", columns=None):
+        """Reads a CSV of daily prices and appends it (see `ingest`). `columns` maps CSV headers to commodity
+        names when they differ, e.g. {"seed_rs_mt": "seed"}. Returns {market: rows ingested}."""
+        import pandas as pd
+
+        frame = pd.read_csv(path).rename(columns=columns or {})
+        if date_column not in frame or market_column not in frame: raise ValueError(f"{path}: need {date_column!r} and {market_column!r} columns")
+        dates = pd.to_datetime(frame[date_column]).to_numpy().astype("datetime64[D]")
+        prices = {c: pd.to_numeric(frame[c], errors="coerce").to_numpy(np.float64) for c in COMMODITIES if c in frame}
+        return self.ingest(dates, frame[market_column].astype(str).to_numpy(), prices)
+
+    def ingest(self, dates, markets, prices):
+        """Adds rows (`dates`, `markets`, {commodity: values}); commodities left out are stored as NaN.
+
+        A market's rows that all fall after its last stored date are appended in place; otherwise that market is
+        merged and rewritten: on a date already stored these rows' prices win, and prices they leave blank keep the stored values.
+        A date repeated within `dates` follows the same rule, in row order.
+        """
+        days = np.asarray(dates, dtype="datetime64[D]").astype(np.int64)
+        markets = np.asarray(markets)
+        unknown = set(prices).difference(COMMODITIES)
+        if unknown: raise ValueError(f"unknown commodities {sorted(unknown)}; have {tuple(COMMODITIES)}")
+        values = {c: np.asarray(prices[c], dtype=np.float64) if c in prices else np.full(len(days), np.nan) for c in COMMODITIES}
+        counts = {}
+        os.makedirs(self.root, exist_ok=True)
+        with self._lock:
+            self._refresh()
+            for market in np.unique(markets).tolist():
+                rows = np.flatnonzero(markets == market)
+                order = rows[np.argsort(days[rows], kind="stable")]
+                new = {"date": days[order], **{c: v[order] for c, v in values.items()}}
+                new = _one_row_per_date(new)  # a date repeated within the batch merges as it would across batches
+                self._store_market(market, new)
+                counts[market] = len(new["date"])
+            self._write_manifest()
+        return counts
+
+    def _store_market(self, market, new):
+        """Appends (or merges) one market's sorted rows; caller holds the lock."""
+        registry = self._manifest["markets"]
+        if market not in registry: registry[market] = f"m{len(registry):04d}"
+        directory = os.path.join(self.root, registry[market])
+        os.makedirs(directory, exist_ok=True)
+        path = lambda column: os.path.join(directory, _FILES[column])
+        last = np.memmap(path("date"), dtype=_DTYPES["date"], mode="r")[-1:] if os.path.exists(path("date")) and os.path.getsize(path("date")) else ()
+        if not len(last) or new["date"][0] > last[0]:
+            for column, values in new.items():  # fast path: strictly later rows, appended in place
+                with open(path(column), "ab") as f: f.write(values.astype(_DTYPES[column]).tobytes())
+            return
+        merged = {column: np.concatenate([np.fromfile(path(column), dtype=_DTYPES[column]), new[column].astype(_DTYPES[column])]) for column in _DTYPES}
+        order = np.argsort(merged["date"], kind="stable")  # stable: on a repeated date the new row sorts last
+        merged = {column: values[order] for column, values in merged.items()}
+        merged = _one_row_per_date(merged)  # a new row's missing prices keep the stored ones
+        for column, values in merged.items(): values.astype(_DTYPES[column]).tofile(path(column) + ".tmp")
+        for column in _DTYPES:
+            os.replace(path(column) + ".tmp", path(column))
+            self._maps.pop((registry[market], column), None)
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def shared_price_store():
+    """The one `PriceStore` (at `DEFAULT_ROOT`, or $MUSTARD_PRICE_STORE) every session in this process uses."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None: _shared = PriceStore(DEFAULT_ROOT)
+    return _shared
+
+
+def write_synthetic_history(path, markets=("Jaipur", "Alwar", "Bharatpur", "Kota", "Sri Ganganagar", "Hapur", "Agra", "Morena"),
+                            start="2015-01-01", end="2024-12-31", seed=0):
+    """Writes a CSV of plausible daily prices (random walks with seasonality) for demos and benchmarks."""
+    import pandas as pd
+
+    rng = np.random.default_rng(seed)
+    dates = np.arange(np.datetime64(start, "D"), np.datetime64(end, "D") + 1)
+    season = np.sin(2 * np.pi * (dates.astype(np.int64) % 365) / 365)
+    frames = []
+    for i, market in enumerate(markets):
+        walk = np.exp(np.cumsum(rng.normal(0, 0.004, (len(dates), 3)), axis=0))
+        seed_price = 50000 * walk[:, 0] * (1 + 0.06 * season) * (1 + 0.02 * i / len(markets))
+        frames.append(pd.DataFrame({"date": dates, "market": market, "seed": seed_price.round(),
+                                    "oil": (seed_price * 2.6 * walk[:, 1] / walk[:, 0] ** 0.5).round(), "moc": (22000 * walk[:, 2]).round()}))
+    pd.concat(frames).to_csv(path, index=False)
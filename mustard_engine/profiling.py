@@ -0,0 +1,152 @@
+"""Per-rerun timing spans for the dashboard, written to a rotating JSONL trace.
+
+    trace = Trace("run", session="a1b2")
+    with trace.span("engine"): metrics = cache.get(inputs, trace=trace)   # the cache adds "input_hash" and a hit/miss note
+    trace.lap("panels")                                                     # time since the previous lap (or the start)
+    trace.note(elements=212)
+    shared_tracer().record(trace)                                            # one JSON line; kept for `summary()` too
+
+A record holds the wall time of each named span in ms (a span entered twice adds up), the rerun's total, and any
+notes. Spans nest freely: a phase's time includes the spans inside it. `lap(name)` times a straight run of script
+lines without indenting them: the phase covers the time since the previous lap or the trace's start. Records go to
+`path` through a `RotatingFileHandler` (`max_bytes` per file, `backups` old files kept), and the last `window`
+records stay in memory so `summary()` can report p50/p95 per phase without reading the file.
+
+Tracing is off unless a caller builds a `Trace`: code paths take `NULL_TRACE` by default, whose `span` hands back one
+shared no-op context and whose `note` does nothing, so an untraced rerun pays a call per span. $MUSTARD_TRACE names
+the trace file and turns tracing on for every session.
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from contextlib import nullcontext
+from logging.handlers import RotatingFileHandler
+
+DEFAULT_PATH = os.environ.get("MUSTARD_TRACE") or os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "trace.jsonl")
+DEFAULT_MAX_BYTES = 10 * 1024 * 1024
+DEFAULT_WINDOW = 500
+
+# summary() over recent records: per phase ("total" is the whole rerun) and cache/element figures (None if never noted).
+PhaseStats = namedtuple("PhaseStats", "count p50_ms p95_ms")
+TraceSummary = namedtuple("TraceSummary", "reruns phases cache_hit_rate elements")
+
+
+class _Span:
+    __slots__ = ("trace", "name", "t0")
+
+    def __init__(self, trace, name):
+        self.trace, self.name = trace, name
+
+    def __enter__(self):
+        self.t0 = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        phases = self.trace.phases
+        phases[self.name] = phases.get(self.name, 0.0) + (time.perf_counter() - self.t0) * 1000
+
+
+class Trace:
+    """Spans and notes for one rerun (or one fragment rerun, `kind="fragment"`)."""
+
+    enabled = True
+
+    def __init__(self, kind="run", name="app", session=None):
+        self.kind, self.name, self.session = kind, name, session
+        self.phases, self.notes = {}, {}
+        self.started, self._t0 = time.time(), time.perf_counter()
+        self._lap = self._t0
+
+    def span(self, name):
+        return _Span(self, name)
+
+    def lap(self, name):
+        now = time.perf_counter()
+        self.phases[name] = self.phases.get(name, 0.0) + (now - self._lap) * 1000
+        self._lap = now
+
+    def note(self, **fields):
+        self.notes.update(fields)
+
+    def as_record(self):
+        return {"ts": self.started, "session": self.session, "kind": self.kind, "name": self.name,
+                "total_ms": (time.perf_counter() - self._t0) * 1000, "phases": self.phases, **self.notes}
+
+
+class _NullTrace:
+    """Stands in for a `Trace` when tracing is off; every method is a no-op."""
+
+    enabled = False
+    _span = nullcontext()
+
+    def span(self, name):
+        return self._span
+
+    def lap(self, name):
+        pass
+
+    def note(self, **fields):
+        pass
+
+
+NULL_TRACE = _NullTrace()
+
+
+class Tracer:
+    """Appends trace records to a rotating JSONL file and keeps the recent ones for `summary()`; thread-safe."""
+
+    def __init__(self, path=DEFAULT_PATH, max_bytes=DEFAULT_MAX_BYTES, backups=3, window=DEFAULT_WINDOW):
+        self.path = os.fspath(path)
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._handler = RotatingFileHandler(self.path, maxBytes=max_bytes, backupCount=backups, encoding="utf-8", delay=True)
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self.recent = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, trace):
+        """Finishes `trace` and writes it as one line; returns the record (None for `NULL_TRACE`)."""
+        if not trace.enabled: return None
+        record = trace.as_record()
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock: self.recent.append(record)
+        # handle(), not emit(): it takes the handler's lock, so concurrent sessions never interleave lines or rollovers
+        self._handler.handle(logging.makeLogRecord({"msg": line, "levelno": logging.INFO, "levelname": "INFO"}))
+        return record
+
+    def summary(self, kind=None, session=None):
+        """`TraceSummary` of the recent records, optionally of one kind ("run" or "fragment") or one session only."""
+        import numpy as np
+
+        with self._lock: records = [r for r in self.recent if (kind is None or r["kind"] == kind) and (session is None or r["session"] == session)]
+        samples = {"total": [r["total_ms"] for r in records]}
+        for r in records:
+            for phase, ms in r["phases"].items(): samples.setdefault(phase, []).append(ms)
+        phases = {phase: PhaseStats(len(values), *np.percentile(values, [50, 95]).tolist()) for phase, values in samples.items() if values}
+        lookups = [r["cache"] for r in records if "cache" in r]
+        elements = [r["elements"] for r in records if r.get("elements") is not None]
+        return TraceSummary(len(records), phases, sum(c != "miss" for c in lookups) / len(lookups) if lookups else None,
+                            sum(elements) / len(elements) if elements else None)
+
+    def close(self):
+        self._handler.close()
+
+
+_shared = None
+_shared_lock = threading.Lock()
+
+
+def tracing_everywhere():
+    """True when $MUSTARD_TRACE turns tracing on for every session."""
+    return bool(os.environ.get("MUSTARD_TRACE"))
+
+
+def shared_tracer():
+    """The one `Tracer` (at $MUSTARD_TRACE, else `data/trace.jsonl`) every session in this process writes to."""
+    global _shared
+    if _shared is None:
+        with _shared_lock:
+            if _shared is None: _shared = Tracer()
+    return _shared
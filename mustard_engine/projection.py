@@ -0,0 +1,202 @@
+"""Multi-year projection: the steady-state day rolled forward over 5-20 years with curves, debt and tax.
+
+The single-day engine annualizes one steady-state day with flat interest and depreciation. `project` instead
+lays every scenario out over monthly or daily periods (a 30/360 calendar), applying:
+
+- curves: per-period (or per-year) multipliers on the sidebar's prices, seed volume and fixed expenses;
+- a linear ramp-up of volume from `ramp_up_start_pct` to 100% over `ramp_up_months`;
+- capex debt (the non-equity share of capex) amortized over `debt_tenor_years`, straight-line or as an annuity;
+- working capital rebuilt each period from that period's volume and prices, financed as in the engine (net WC
+  by the main facility, the financed hoard by the warehouse loan) and released at the end of the horizon;
+- straight-line depreciation over `depreciation_years`, and tax with unlimited loss carry-forward.
+
+Every step is an array operation over (scenario x period); the only loop is over chunks of scenarios, which
+bounds memory. Daily volumes, prices and WC are linear in each other once the pungency branch is fixed (it
+depends only on yields and pungencies), so one `calculate_metrics_batch` call per chunk gives the per-MT mass
+flows and the periods are built from those.
+
+    proj = project(EngineInputs(), years=15, curves={"seed_purchase_price": 1.04 ** np.arange(15)})
+    proj.project_irr[0], proj.annual["dscr"][0]
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import _columns, _safe_div, calculate_metrics_batch
+from .inputs import EngineInputs
+
+RESOLUTIONS = {"monthly": 12, "daily": 360}
+CURVE_INPUTS = ("seed_input_mt", "seed_purchase_price", "oil_blend_sell_price", "expeller_oil_sell_price",
+                "market_bought_oil_price", "moc_sell_price", "hoarded_rm_rate", "other_expenses_daily")
+AMORTIZATIONS = ("straight", "annuity")
+ANNUAL_LINES = ("revenue", "ebitda", "depreciation", "interest", "pbt", "tax", "pat", "working_capital", "debt_balance",
+                "cfads", "debt_service", "dscr", "project_cash_flow", "equity_cash_flow")
+DEFAULT_PERIODS_PER_CHUNK = 2_000_000  # scenario x period cells held at once (~16 MB per line)
+
+# annual: {line: (n, years + 1) array}; column 0 is the investment date (capex), columns 1.. are operating years.
+Projection = namedtuple("Projection", "years periods_per_year annual project_irr equity_irr project_npv equity_npv min_dscr")
+
+
+def _curve(curves, name, n, periods, periods_per_year):
+    """(n or 1, periods) multipliers for `name`: per-period curves as given, per-year curves stepped."""
+    curve = np.asarray(curves.get(name, 1.0), dtype=np.float64)
+    if curve.ndim == 0: return np.full((1, periods), float(curve))
+    curve = curve.reshape(-1, curve.shape[-1])
+    if curve.shape[-1] * periods_per_year == periods: curve = np.repeat(curve, periods_per_year, axis=1)
+    if curve.shape[-1] != periods: raise ValueError(f"curve for {name!r} needs one value per year or per period, got {curve.shape[-1]}")
+    if curve.shape[0] not in (1, n): raise ValueError(f"curve for {name!r} has {curve.shape[0]} rows for {n} scenarios")
+    return curve
+
+
+def _carry_forward_tax(income, rate):
+    """Tax per period with losses carried forward indefinitely: cumulative taxable income is the running maximum
+    of cumulative income (floored at 0), so each period pays tax on how far that maximum rises."""
+    taxable = np.maximum.accumulate(np.maximum(np.cumsum(income, axis=1), 0), axis=1)
+    return np.diff(taxable, axis=1, prepend=0) * rate
+
+
+def irr(cash_flows, periods_per_year=1, max_iter=60, tol=1e-10):
+    """Annual IRR of each row of `cash_flows` (one column per period, the first at time 0); NaN where NPV never
+    changes sign between -99% and +10,000% a year.
+
+    Solved for x = log(1 + IRR) with a bracketed Newton step (bisection whenever Newton leaves the bracket).
+    """
+    cf = np.atleast_2d(np.asarray(cash_flows, dtype=np.float64))
+    tau = np.arange(cf.shape[1]) / periods_per_year
+
+    def value(rows, x):
+        discounted = cf[rows] * np.exp(-x[:, None] * tau)
+        return discounted.sum(axis=1), -(discounted * tau).sum(axis=1)
+
+    rows = np.arange(len(cf))
+    lo, hi = np.full(len(cf), np.log(0.01)), np.full(len(cf), np.log(101.0))
+    f_lo, f_hi = value(rows, lo)[0], value(rows, hi)[0]
+    found = np.sign(f_lo) * np.sign(f_hi) <= 0
+    lo, hi = np.where(f_hi > f_lo, lo, hi), np.where(f_hi > f_lo, hi, lo)  # oriented so that npv(lo) < 0 < npv(hi)
+    # Start from the IRR of the two-flow equivalent: all outflows and all inflows at their value-weighted times.
+    inflow, outflow = np.maximum(cf, 0), np.maximum(-cf, 0)
+    into, out = inflow.sum(axis=1), outflow.sum(axis=1)
+    gap = (inflow @ tau) / np.where(into > 0, into, 1.0) - (outflow @ tau) / np.where(out > 0, out, 1.0)
+    with np.errstate(divide="ignore", invalid="ignore"): x = np.log(into / out) / gap
+    x = np.where(np.isfinite(x) & ((x - lo) * (x - hi) < 0), x, (lo + hi) / 2)
+    scale = np.abs(cf).sum(axis=1)
+    active = rows[found]
+    for _ in range(max_iter):  # converged lanes drop out, so late iterations only touch the stragglers
+        if not active.size: break
+        xa = x[active]
+        f, df = value(active, xa)
+        lo[active], hi[active] = np.where(f < 0, xa, lo[active]), np.where(f >= 0, xa, hi[active])
+        newton = xa - f / np.where(df != 0, df, np.nan)
+        inside = (newton - lo[active]) * (newton - hi[active]) <= 0
+        x[active] = np.where(np.abs(f) <= tol * scale[active], xa, np.where(inside, newton, (lo[active] + hi[active]) / 2))
+        active = active[np.abs(x[active] - xa) > tol * np.maximum(1.0, np.abs(xa))]
+    return np.where(found, np.expm1(x), np.nan)
+
+
+def npv(cash_flows, rate_pct, periods_per_year=1):
+    """Present value at an annual `rate_pct` (a scalar, or one rate per row) of each row of `cash_flows`."""
+    cf = np.atleast_2d(np.asarray(cash_flows, dtype=np.float64))
+    rate = np.asarray(rate_pct, dtype=np.float64)[..., None] / 100
+    return (cf * (1 + rate) ** (-np.arange(cf.shape[1]) / periods_per_year)).sum(axis=1)
+
+
+def _project_chunk(c, years, ppy, curves, ramp_up_months, ramp_up_start_pct, debt_tenor_years, amortization, discount_rate_pct):
+    n, periods = len(c["capex"]), years * ppy
+    col = lambda name: c[name][:, None]
+    flows = calculate_metrics_batch(c)
+    seed = flows["seed_input_mt"]
+    per_mt = lambda key: _safe_div(flows[key], seed, seed != 0)[:, None]  # mass flows per MT of seed
+    blend, exp_sep, moc, market = per_mt("final_oil_blend_mt"), per_mt("exp_oil_sold_separately_mt"), per_mt("enhanced_moc_mt"), per_mt("market_oil_to_add_mt")
+    unit_costs = (flows["cost_moc_enhancement"] + flows["daily_processing_cost"] + flows["daily_variable_cost"])[:, None] / np.where(seed != 0, seed, 1.0)[:, None]
+
+    # --- Per-period drivers: curve multipliers, ramp-up, production days ---
+    t = np.arange(periods)
+    price = {name: col(name) * _curve(curves, name, n, periods, ppy) for name in CURVE_INPUTS}
+    month = t * 12 // ppy
+    ramp = 1.0 if ramp_up_months <= 0 else ramp_up_start_pct / 100 + (1 - ramp_up_start_pct / 100) * np.minimum(month / ramp_up_months, 1.0)
+    volume = price.pop("seed_input_mt") * ramp
+    ppd = col("production_days_per_month")
+    days = ppd if ppy == 12 else np.clip(ppd - t % 30, 0, 1)  # daily: the first `ppd` days of each 30-day month run
+
+    # --- Operations (the engine's daily P&L at each period's volume and prices) ---
+    oil_revenue = volume * (blend * price["oil_blend_sell_price"] + exp_sep * price["expeller_oil_sell_price"])
+    moc_revenue = volume * moc * price["moc_sell_price"]
+    daily_costs = volume * (price["seed_purchase_price"] + market * price["market_bought_oil_price"] + unit_costs) + price["other_expenses_daily"]
+    revenue = days * (oil_revenue + moc_revenue)
+    ebitda = revenue - days * daily_costs
+
+    # --- Working capital levels ---
+    hoard = volume * ppd * col("rm_hoard_months") * price["hoarded_rm_rate"]
+    inventory = hoard + volume * col("rm_safety_stock_days") * price["seed_purchase_price"] + oil_revenue * col("fg_oil_safety_days") + moc_revenue * col("fg_moc_safety_days")
+    gross_wc = inventory + oil_revenue * col("oil_debtor_days") + moc_revenue * col("moc_debtor_days") - volume * price["seed_purchase_price"] * col("creditor_days")
+    financed_hoard = hoard * col("rm_hoard_financed_pct") / 100
+    net_wc = gross_wc - financed_hoard
+    delta_wc = np.diff(gross_wc, axis=1, prepend=0)
+    delta_wc[:, -1] -= gross_wc[:, -1]  # released at the end of the horizon
+
+    # --- Capex debt ---
+    capex, rate = col("capex"), col("main_financing_rate_pa") / 100 / ppy
+    debt = capex * (1 - col("equity_in_capex_pct") / 100)
+    tenor = max(int(round(debt_tenor_years * ppy)), 1)
+    paid = np.minimum(t + 1, tenor)
+    if amortization == "straight": closing = debt * (1 - paid / tenor)
+    else:
+        growth = np.where(rate > 0, (1 + rate) ** tenor, 1.0)
+        closing = np.where(rate > 0, debt * (growth - (1 + rate) ** paid) / np.where(rate > 0, growth - 1, 1.0), debt * (1 - paid / tenor))
+    opening = np.concatenate([np.broadcast_to(debt, (n, 1)), closing[:, :-1]], axis=1)
+    principal, term_interest = opening - closing, opening * rate
+    wc_interest = np.maximum(net_wc, 0) * rate + financed_hoard * col("warehouse_finance_rate_pa") / 100 / ppy
+
+    # --- Depreciation and tax ---
+    dep_years = col("depreciation_years")
+    depreciation = np.where((dep_years > 0) & (t < np.round(dep_years * ppy)), _safe_div(capex, dep_years * ppy, dep_years > 0), 0.0)
+    tax_rate = col("tax_rate_pct") / 100
+    interest = term_interest + wc_interest
+    pbt = ebitda - depreciation - interest
+    tax = _carry_forward_tax(pbt, tax_rate)
+    unlevered_tax = _carry_forward_tax(ebitda - depreciation, tax_rate)
+
+    # --- Cash flows: column 0 is the investment date, period t lands in column t + 1 ---
+    project_cf = np.concatenate([-capex, ebitda - unlevered_tax - delta_wc], axis=1)
+    equity_cf = np.concatenate([-(capex - debt), ebitda - interest - principal - tax], axis=1)
+    cfads, debt_service = ebitda - tax - wc_interest, term_interest + principal
+
+    yearly = lambda x: np.concatenate([np.zeros((n, 1)), x.reshape(n, years, ppy).sum(axis=2)], axis=1)
+    year_end = lambda opening, closing: np.concatenate([opening, closing[:, ppy - 1::ppy]], axis=1)
+    annual = {"revenue": yearly(revenue), "ebitda": yearly(ebitda), "depreciation": yearly(depreciation), "interest": yearly(interest),
+              "pbt": yearly(pbt), "tax": yearly(tax), "pat": yearly(pbt - tax), "cfads": yearly(cfads), "debt_service": yearly(debt_service),
+              "working_capital": year_end(np.zeros((n, 1)), net_wc), "debt_balance": year_end(np.broadcast_to(debt, (n, 1)), closing),
+              "project_cash_flow": np.concatenate([project_cf[:, :1], yearly(project_cf[:, 1:])[:, 1:]], axis=1),
+              "equity_cash_flow": np.concatenate([equity_cf[:, :1], yearly(equity_cf[:, 1:])[:, 1:]], axis=1)}
+    annual["dscr"] = np.where(annual["debt_service"] > 0, annual["cfads"] / np.where(annual["debt_service"] > 0, annual["debt_service"], 1.0), np.nan)
+    has_debt = (annual["debt_service"] > 0).any(axis=1)
+    min_dscr = np.where(has_debt, np.nanmin(np.where(annual["debt_service"] > 0, annual["dscr"], np.inf), axis=1), np.nan)
+    return (annual, irr(project_cf, ppy), irr(equity_cf, ppy), npv(project_cf, discount_rate_pct, ppy),
+            npv(equity_cf, discount_rate_pct, ppy), min_dscr)
+
+
+def project(scenarios, years=10, resolution="monthly", curves=None, ramp_up_months=0, ramp_up_start_pct=50.0,
+            debt_tenor_years=7, amortization="straight", discount_rate_pct=12.0, chunk_cells=DEFAULT_PERIODS_PER_CHUNK):
+    """Projects every scenario over `years` at `resolution` ("monthly" or "daily").
+
+    `scenarios` is anything `calculate_metrics_batch` accepts; results have one row per scenario (a single
+    scenario gives one row). `curves` maps names in `CURVE_INPUTS` to multipliers of the scenario's value,
+    one per year or per period (shape (years,), (periods,) or (n_scenarios, ...)). IRRs are annual; NPVs are
+    at `discount_rate_pct` a year, to the investment date.
+    """
+    if resolution not in RESOLUTIONS: raise ValueError(f"resolution must be one of {tuple(RESOLUTIONS)}, got {resolution!r}")
+    if amortization not in AMORTIZATIONS: raise ValueError(f"amortization must be one of {AMORTIZATIONS}, got {amortization!r}")
+    curves = dict(curves or {})
+    unknown = set(curves).difference(CURVE_INPUTS)
+    if unknown: raise ValueError(f"no curves for {sorted(unknown)}; curves apply to {CURVE_INPUTS}")
+    cols = {k: v.ravel() for k, v in _columns(scenarios.as_dict() if isinstance(scenarios, EngineInputs) else scenarios).items()}
+    n, ppy = len(cols["capex"]), RESOLUTIONS[resolution]
+    step = max(1, chunk_cells // (years * ppy))
+    parts = []
+    for start in range(0, n, step):
+        chunk = {k: v[start:start + step] for k, v in cols.items()}
+        chunk_curves = {k: c[start:start + step] if c.ndim > 1 and c.shape[0] == n > 1 else c
+                        for k, c in ((k, np.asarray(v, dtype=np.float64)) for k, v in curves.items())}
+        parts.append(_project_chunk(chunk, years, ppy, chunk_curves, ramp_up_months, ramp_up_start_pct, debt_tenor_years, amortization, discount_rate_pct))
+    annual = {line: np.concatenate([part[0][line] for part in parts]) for line in ANNUAL_LINES}
+    return Projection(years, ppy, annual, *(np.concatenate([part[i] for part in parts]) for i in range(1, 6)))
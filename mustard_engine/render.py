@@ -0,0 +1,123 @@
+"""Render model for the P&L view: every period's figures and display strings, built once per metrics result.
+
+`pnl_views(metrics)` returns the Daily, Monthly and Annual views as self-contained HTML, so the dashboard can
+emit a whole view as one element instead of ~40 separate markdown/metric deltas. Results are cached on the
+metrics values, so switching views (or rerunning with unchanged inputs) costs a dict lookup.
+"""
+from functools import lru_cache
+from html import escape
+
+from .formatting import format_indian
+
+PERIODS = ("Daily", "Monthly", "Annual")
+
+_STYLE = """<style>
+.pnl h5 {margin: 0.5rem 0 0.75rem 0;}
+.pnl .grid {display: grid; gap: 1rem; margin-bottom: 0.5rem;}
+.pnl .g2 {grid-template-columns: repeat(2, 1fr);} .pnl .g3 {grid-template-columns: repeat(3, 1fr);} .pnl .g4 {grid-template-columns: repeat(4, 1fr);}
+.pnl .big {font-size: 20px; margin: 0.25rem 0 0 0;}
+.pnl .cell {margin-bottom: 0.75rem;}
+.pnl ul {margin: 0.25rem 0 0 0; padding-left: 1.2rem;}
+.pnl .metric-label {font-size: 14px; margin-top: 0.75rem;} .pnl .metric-value {font-size: 2.25rem; line-height: 1.2;}
+.pnl hr {margin: 1rem 0;}
+.pnl [title] {cursor: help;}
+</style>"""
+
+
+def period_multiplier(metrics, period):
+    return {"Daily": 1, "Monthly": metrics["production_days_per_month"], "Annual": metrics["annual_production_days"]}[period]
+
+
+def pnl_figures(metrics, multiplier):
+    """The period-scaled P&L numbers `display_pnl` used to recompute on every call."""
+    m = metrics
+    days = m["annual_production_days"]
+    revenue = m["daily_total_revenue"] * multiplier
+    gm, cm, ebitda = m["daily_gm"] * multiplier, m["daily_cm"] * multiplier, m["daily_ebitda"] * multiplier
+    depreciation = (m["annual_depreciation"] / days if days > 0 else 0) * multiplier
+    interest = (m["annual_interest"] / days if days > 0 else 0) * multiplier
+    ebit = ebitda - depreciation
+    pbt = ebit - interest
+    tax = max(0, pbt * (m["tax_rate_pct"]/100))
+    return {
+        "revenue": revenue, "gm": gm, "cm": cm, "ebitda": ebitda, "depreciation": depreciation, "interest": interest,
+        "ebit": ebit, "pbt": pbt, "tax": tax, "pat": pbt - tax,
+        "interest_on_main_capital": m["interest_on_main_capital"] / days * multiplier if days > 0 else 0,
+        "interest_on_hoard": m["interest_on_hoard"] / days * multiplier if days > 0 else 0,
+    }
+
+
+def _pct(part, revenue):
+    return f"<code>({(part/revenue*100 if revenue > 0 else 0):.1f}%)</code>"
+
+
+def _metric(label, value):
+    return f"<div class='metric-label'>{label}</div><div class='metric-value'>{value}</div>"
+
+
+def render_pnl(metrics, period):
+    """One period's full P&L view as a single HTML string."""
+    m, k = metrics, period_multiplier(metrics, period)
+    f = pnl_figures(metrics, k)
+    fi = format_indian
+    cm_help = escape(f"CM = GM - Processing Cost (₹ {fi(m['daily_processing_cost']*k)})", quote=True)
+    ebitda_help = escape(f"EBITDA = CM - Other Var. Costs (₹ {fi(m['daily_variable_cost']*k)}) - Other Fixed Exp. (₹ {fi(m['daily_other_expenses']*k)})", quote=True)
+    return f"""{_STYLE}<div class='pnl'>
+<h5>Production &amp; Revenue ({period})</h5>
+<div class='grid g4'>
+<div><b>Total Seed Input:</b><p class='big'>{fi(m['seed_input_mt'] * k)} MT</p></div>
+<div><b>Oil Blend:</b><p class='big'>{fi(m['final_oil_blend_mt'] * k)} MT</p></div>
+<div><b>Enhanced MoC:</b><p class='big'>{fi(m['enhanced_moc_mt'] * k)} MT</p></div>
+<div><b>Total Revenue:</b><p class='big'>₹ {fi(f['revenue'])}</p></div>
+</div><hr>
+<h5>Cost of Goods Sold (COGS) Breakdown ({period})</h5>
+<div class='grid g2'>
+<div><b>Component Quantities</b><ul>
+<li>Seed Consumed: {fi(m['seed_input_mt'] * k)} MT</li>
+<li>Market Oil Added: {fi(m['market_oil_to_add_mt'] * k)} MT</li>
+<li>Water Added: {fi(m['water_added_mt'] * k)} MT</li>
+<li>Salt Added: {fi(m['salt_added_mt'] * k)} MT</li></ul></div>
+<div><b>Component Values</b><ul>
+<li>Seed Cost: ₹ {fi(m['cost_seed'] * k)}</li>
+<li>Market Oil Cost: ₹ {fi(m['cost_market_oil'] * k)}</li>
+<li>MoC Enhancement Cost: ₹ {fi(m['cost_moc_enhancement'] * k)}</li></ul>
+<b>Total COGS: ₹ {fi(m['daily_cogs'] * k)}</b></div>
+</div><hr>
+<h5>Full Margin Analysis ({period})</h5>
+<div class='grid g2'>
+<div>
+<div class='cell'><b>Gross Margin (GM):</b><br>₹ {fi(f['gm'])} {_pct(f['gm'], f['revenue'])}</div>
+<div class='cell' title="{cm_help}"><b>Contribution Margin (CM):</b> ❓<br>₹ {fi(f['cm'])} {_pct(f['cm'], f['revenue'])}</div>
+<div class='cell' title="{ebitda_help}"><b>EBITDA:</b> ❓<br>₹ {fi(f['ebitda'])} {_pct(f['ebitda'], f['revenue'])}</div>
+</div>
+<div>
+<div class='cell'><b>Depreciation:</b><br>₹ {fi(f['depreciation'])}</div>
+<div class='cell'><b>EBIT (Earnings Before Interest &amp; Tax):</b><br>₹ {fi(f['ebit'])}</div>
+<div class='cell'><b>Interest:</b><br>₹ {fi(f['interest'])}</div>
+<div class='cell'><b>Profit Before Tax (PBT):</b><br>₹ {fi(f['pbt'])}</div>
+<div class='cell'><b>Profit After Tax (PAT):</b><br>₹ {fi(f['pat'])}</div>
+</div>
+</div><hr>
+<h5>Interest Calculation Breakdown ({period})</h5>
+<ul>
+<li><b>Main Capital Financed (Debt Funded Capex + Net WC):</b> ₹ {fi(m['main_capital_to_finance'])} -&gt; <b>Interest:</b> ₹ {fi(f['interest_on_main_capital'])}</li>
+<li><b>Financed RM Hoard:</b> ₹ {fi(m['financed_rm_hoard_value'])} -&gt; <b>Interest:</b> ₹ {fi(f['interest_on_hoard'])}</li>
+</ul><hr>
+<h5>Key Financial Ratios (Annualized)</h5>
+<div class='grid g3'>
+<div><b>Return on Capital Employed (ROCE)</b>{_metric("ROCE (EBIT Basis)", f"{m['roce_ebit']:.2f}%")}{_metric("ROCE (PAT Basis)", f"{m['roce_pat']:.2f}%")}</div>
+<div><b>ROCE (with Synergy)</b>{_metric("ROCE (EBIT Basis)", f"{m['roce_ebit_with_synergy']:.2f}%")}{_metric("ROCE (PAT Basis)", f"{m['roce_pat_with_synergy']:.2f}%")}</div>
+<div><b>Return on Equity (ROE)</b>{_metric("Standard ROE", f"{m['roe']:.2f}%")}{_metric("ROE (with Synergy)", f"{m['roe_with_synergy']:.2f}%")}</div>
+</div>
+</div>"""
+
+
+@lru_cache(maxsize=256)
+def _cached_views(items):
+    metrics = dict(items)
+    return {period: render_pnl(metrics, period) for period in PERIODS}
+
+
+def pnl_views(metrics):
+    """{"Daily": html, "Monthly": html, "Annual": html}, built together and cached on the metrics values."""
+    return _cached_views(tuple(metrics.items()))
@@ -0,0 +1,63 @@
+"""Tornado sensitivity: flex every engine input down and up around a base scenario, ranked by impact.
+
+All 2 x 39 flexed scenarios plus the base run as one `calculate_metrics_batch` call (well under a millisecond),
+and results are memoized per (base scenario, flex) so redrawing the chart or switching metrics is a lookup.
+"""
+from collections import namedtuple
+from functools import lru_cache
+from types import MappingProxyType
+
+import numpy as np
+
+from .batch import calculate_metrics_batch
+from .inputs import INPUT_BOUNDS, INPUT_NAMES, EngineInputs
+
+TORNADO_METRICS = ("annual_pat", "roce_ebit", "roce_pat", "roe")
+MODES = ("pct", "range")
+
+Bar = namedtuple("Bar", "name low_input high_input low high swing")
+Tornado = namedtuple("Tornado", "base bars")  # base: {metric: value}; bars: {metric: (Bar, ...) largest swing first}
+
+
+def flex_bounds(base, pct=10.0, mode="pct"):
+    """(low, high) input arrays in `INPUT_NAMES` order.
+
+    mode "pct" flexes each input by ±`pct`% of its base value; mode "range" spans the sidebar slider's full
+    range, falling back to ±`pct`% for inputs without one. Either way values stay inside the sidebar's bounds.
+    """
+    if mode not in MODES: raise ValueError(f"mode must be one of {MODES}, got {mode!r}")
+    p = base if isinstance(base, EngineInputs) else EngineInputs.from_mapping(base)
+    values = np.asarray(p, dtype=np.float64)
+    low, high = values * (1 - pct / 100), values * (1 + pct / 100)
+    low, high = np.minimum(low, high), np.maximum(low, high)  # negative bases flip
+    for i, name in enumerate(INPUT_NAMES):
+        lo, hi = INPUT_BOUNDS.get(name, (None, None))
+        if mode == "range" and lo is not None and hi is not None: low[i], high[i] = lo, hi
+        if lo is not None: low[i], high[i] = max(low[i], lo), max(high[i], lo)
+        if hi is not None: low[i], high[i] = min(low[i], hi), min(high[i], hi)
+    return low, high
+
+
+def tornado(base, pct=10.0, mode="pct", metrics=TORNADO_METRICS):
+    """Ranks every input by how far flexing it moves each of `metrics`; cached per base scenario and flex."""
+    p = base if isinstance(base, EngineInputs) else EngineInputs.from_mapping(base)
+    return _tornado(p, float(pct), mode, tuple(metrics))
+
+
+@lru_cache(maxsize=128)
+def _tornado(p, pct, mode, metrics):
+    n = len(INPUT_NAMES)
+    low, high = flex_bounds(p, pct, mode)
+    grid = np.tile(np.asarray(p, dtype=np.float64), (2 * n + 1, 1))  # rows 2i / 2i+1 flex input i; last row is the base
+    idx = np.arange(n)
+    grid[2 * idx, idx], grid[2 * idx + 1, idx] = low, high
+    out = calculate_metrics_batch(dict(zip(INPUT_NAMES, grid.T)))
+    base_values, bars = {}, {}
+    for metric in metrics:
+        values = out[metric]
+        lows, highs, base_value = values[0:-1:2], values[1:-1:2], float(values[-1])
+        swing = np.abs(highs - lows)
+        bars[metric] = tuple(Bar(INPUT_NAMES[i], float(low[i]), float(high[i]), float(lows[i]), float(highs[i]), float(swing[i]))
+                             for i in np.argsort(-swing, kind="stable"))
+        base_values[metric] = base_value
+    return Tornado(MappingProxyType(base_values), MappingProxyType(bars))  # shared between sessions, so read-only
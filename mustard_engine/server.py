@@ -0,0 +1,291 @@
+"""Local HTTP/JSON scoring service for the engine, on asyncio with no web framework.
+
+    python -m mustard_engine.server --port 8765 --window-ms 2
+
+    POST /v1/metrics        {"seed_purchase_price": 52000}          -> {"annual_pat": ..., "roce_pat": ..., ...}
+    POST /v1/metrics/bulk   NDJSON, one scenario per line            -> NDJSON, streamed back chunk by chunk
+    POST /v1/export?format=parquet  {"base": {...}, "axes": {"seed_purchase_price": {"start": 48000, "stop": 62000, "num": 1000}}}
+                                                                     -> the grid's results as a file, streamed chunk by chunk
+    GET  /v1/health                                                  -> {"status": "ok", "batches": ..., ...}
+
+Request bodies hold any subset of the engine's input names; the rest take the dashboard defaults. Results carry
+the batch engine's keys (`pungency_status` in place of the recommendation text); `?columns=annual_pat,roce_pat`
+trims them. Single-scenario requests are micro-batched: the first one to arrive opens a window of `window_ms`, and
+every request that arrives before it closes (or until `max_batch` are waiting) is scored in one
+`calculate_metrics_batch` call. The bulk endpoint follows the CLI (`cli.evaluate_chunk`): fields that are not
+inputs, such as an id, are echoed back. Input values must be numbers, and a field that is a near-miss of an input's
+name (`oil_blend_sell_prce`) is taken as a typo, not echoed. A line that fails those checks or does not parse, or a
+body that ends short of its Content-Length, ends the stream with an `{"error": ...}` line.
+The export endpoint writes every input and metric of a grid sweep (`export.grid_chunks`; an axis is a list of values
+or a linspace) as CSV, Parquet or XLSX. The file is sent with chunked encoding as each chunk is evaluated, so neither
+side holds the whole file.
+"""
+import argparse
+import asyncio
+import difflib
+import json
+import time
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+
+from .batch import calculate_metrics_batch
+from .cli import evaluate_chunk
+from .core import ENGINE_VERSION
+from .export import FORMATS, grid_chunks, iter_export
+from .inputs import DEFAULT_INPUTS, INPUT_NAMES
+
+DEFAULT_WINDOW_MS = 2.0
+DEFAULT_MAX_BATCH = 1024
+BULK_CHUNK_SIZE = 5000
+EXPORT_CHUNK_SIZE = 50_000
+MAX_BODY_BYTES = 1 << 20  # single-scenario requests; bulk bodies are streamed, not held
+_REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed", 411: "Length Required", 413: "Payload Too Large"}
+
+
+def _connection(keep_alive):
+    return f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n"
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def scenario_row(payload):
+    """Validated {input name: float} from one request body; unknown names and non-numbers are a 400."""
+    if not isinstance(payload, dict): raise HTTPError(400, "expected a JSON object of engine inputs")
+    unknown = set(payload).difference(DEFAULT_INPUTS)
+    if unknown: raise HTTPError(400, f"not engine inputs: {sorted(unknown)}")
+    try: return {name: float(value) for name, value in payload.items()}
+    except (TypeError, ValueError): raise HTTPError(400, "engine inputs must be numbers") from None
+
+
+class MicroBatcher:
+    """Collects scenarios submitted within `window` seconds of each other and scores them in one engine call."""
+
+    def __init__(self, window=DEFAULT_WINDOW_MS / 1000, max_batch=DEFAULT_MAX_BATCH):
+        self.window, self.max_batch = window, max_batch
+        self._rows, self._futures, self._timer = [], [], None
+        self.batches = self.scenarios = 0
+
+    def submit(self, row):
+        """Future of the metrics {name: value} for one validated scenario row."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._rows.append(row)
+        self._futures.append(future)
+        if len(self._rows) >= self.max_batch: self.flush()
+        elif self._timer is None: self._timer = loop.call_later(self.window, self.flush)
+        return future
+
+    def flush(self):
+        if self._timer is not None: self._timer.cancel()
+        rows, futures, self._rows, self._futures, self._timer = self._rows, self._futures, [], [], None
+        if not rows: return
+        self.batches, self.scenarios = self.batches + 1, self.scenarios + len(rows)
+        try: results = score_rows(rows)
+        except Exception as exc:
+            for future in futures:
+                if not future.done(): future.set_exception(exc)
+            return
+        for future, result in zip(futures, results):
+            if not future.done(): future.set_result(result)  # a client that hung up leaves a cancelled future
+
+
+def bulk_row(payload):
+    """Validated bulk row: input values are numbers, and other fields (echoed back) must not be misspelt inputs."""
+    if not isinstance(payload, dict): raise ValueError("expected a JSON object")
+    for name, value in payload.items():
+        if name in DEFAULT_INPUTS:
+            if isinstance(value, bool) or not isinstance(value, (int, float)): raise ValueError(f"{name} must be a number")
+            continue
+        typo = difflib.get_close_matches(name, INPUT_NAMES, n=1, cutoff=0.85)
+        if typo: raise ValueError(f"not an engine input: {name!r} (did you mean {typo[0]!r}?)")
+    return payload
+
+
+def score_rows(rows):
+    """One batch engine call for a list of scenario rows; returns one {metric: value} dict per row."""
+    given = set().union(*rows)
+    columns = {name: np.array([row.get(name, DEFAULT_INPUTS[name]) for row in rows], dtype=np.float64) for name in INPUT_NAMES if name in given}
+    columns.setdefault("seed_input_mt", np.full(len(rows), float(DEFAULT_INPUTS["seed_input_mt"])))  # fixes the batch length
+    metrics = calculate_metrics_batch(columns)
+    names = list(metrics)
+    values = [np.broadcast_to(metrics[name], len(rows)).tolist() for name in names]
+    return [dict(zip(names, row)) for row in zip(*values)]
+
+
+def content_length(headers):
+    """The request's Content-Length (0 when absent); anything but a non-negative integer is a 400."""
+    value = headers.get("content-length", "0")
+    if not (value.isascii() and value.isdigit()): raise HTTPError(400, f"bad Content-Length: {value!r}")
+    return int(value)
+
+
+def _columns(url):
+    return [c for value in parse_qs(url.query).get("columns", []) for c in value.split(",") if c]
+
+
+def sweep_axes(axes):
+    """Validated {input name: values} for an export grid; each axis is a list of numbers or {"start", "stop", "num"}."""
+    if not isinstance(axes, dict): raise HTTPError(400, "axes must be a JSON object of engine inputs")
+    unknown = set(axes).difference(DEFAULT_INPUTS)
+    if unknown: raise HTTPError(400, f"not engine inputs: {sorted(unknown)}")
+    try:
+        return {name: np.linspace(float(a["start"]), float(a["stop"]), int(a["num"])) if isinstance(a, dict) else np.asarray(a, dtype=np.float64).ravel()
+                for name, a in axes.items()}
+    except (KeyError, TypeError, ValueError): raise HTTPError(400, "an axis is a list of numbers or {\"start\", \"stop\", \"num\"}") from None
+
+
+class ScoringServer:
+    """The HTTP front end: one `MicroBatcher` shared by every connection."""
+
+    def __init__(self, window=DEFAULT_WINDOW_MS / 1000, max_batch=DEFAULT_MAX_BATCH, bulk_chunk_size=BULK_CHUNK_SIZE):
+        self.batcher, self.bulk_chunk_size = MicroBatcher(window, max_batch), bulk_chunk_size
+        self.requests, self.started = 0, time.time()
+
+    async def handle(self, reader, writer):
+        """Serves one keep-alive connection."""
+        try:
+            while True:
+                try: head = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError): return
+                lines = head.decode("latin-1").split("\r\n")
+                try: method, target, version = lines[0].split(" ", 2)
+                except ValueError: return
+                headers = dict(line.split(":", 1) for line in lines[1:] if ":" in line)
+                headers = {k.strip().lower(): v.strip() for k, v in headers.items()}
+                keep_alive = headers.get("connection", "").lower() != "close" and version == "HTTP/1.1"
+                url, self.requests = urlsplit(target), self.requests + 1
+                unread = True  # a request that fails before its body is consumed closes the connection: the next one can't be found
+                try:
+                    length = content_length(headers)
+                    unread = length > 0
+                    if url.path == "/v1/metrics/bulk": keep_alive = await self.bulk(method, url, headers, length, reader, writer, keep_alive) and keep_alive
+                    else:
+                        body = await self.read_body(length, reader)
+                        unread = False
+                        await self.route(method, url, body, writer, keep_alive)
+                except HTTPError as exc:
+                    keep_alive = keep_alive and not unread
+                    self.respond(writer, exc.status, {"error": str(exc)}, keep_alive)
+                await writer.drain()
+                if not keep_alive: return
+        except ConnectionError: return
+        finally: writer.close()
+
+    @staticmethod
+    async def read_body(length, reader):
+        if length > MAX_BODY_BYTES: raise HTTPError(413, f"single-scenario bodies are limited to {MAX_BODY_BYTES:,} bytes; use /v1/metrics/bulk")
+        return await reader.readexactly(length)
+
+    async def route(self, method, url, body, writer, keep_alive=True):
+        """Answers a health or single-scenario request (whose body has been read); `keep_alive` is what the response's
+        Connection header says."""
+        if url.path == "/v1/health":
+            if method != "GET": raise HTTPError(405, "use GET")
+            b = self.batcher
+            self.respond(writer, 200, {"status": "ok", "engine_version": ENGINE_VERSION, "uptime_s": time.time() - self.started, "requests": self.requests,
+                                       "batches": b.batches, "scenarios": b.scenarios, "mean_batch": b.scenarios / b.batches if b.batches else 0.0}, keep_alive)
+            return
+        if url.path == "/v1/export": return await self.export(method, url, body, writer, keep_alive)
+        if url.path != "/v1/metrics": raise HTTPError(404, f"no endpoint {url.path}")
+        if method != "POST": raise HTTPError(405, "use POST")
+        try: payload = json.loads(body or b"{}")
+        except ValueError: raise HTTPError(400, "body is not valid JSON") from None
+        result = await self.batcher.submit(scenario_row(payload))
+        columns = _columns(url)
+        if columns:
+            unknown = set(columns).difference(result)
+            if unknown: raise HTTPError(400, f"unknown metrics: {sorted(unknown)}")
+            result = {name: result[name] for name in columns}
+        self.respond(writer, 200, result, keep_alive)
+
+    async def bulk(self, method, url, headers, length, reader, writer, keep_alive=True):
+        """Reads NDJSON scenarios as they arrive and streams results back, one engine call per chunk; returns False
+        if the connection must close afterwards."""
+        if method != "POST": raise HTTPError(405, "use POST")
+        if "content-length" not in headers: raise HTTPError(411, "send a Content-Length")
+        remaining, columns = length, _columns(url)
+        unknown = set(columns).difference(calculate_metrics_batch({}))
+        if unknown: raise HTTPError(400, f"unknown metrics: {sorted(unknown)}")
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: application/x-ndjson\r\nTransfer-Encoding: chunked\r\n{_connection(keep_alive)}\r\n".encode())
+        loop, chunk, line_no = asyncio.get_running_loop(), [], 0
+        try:
+            while remaining > 0 or chunk:
+                line = await reader.readline() if remaining > 0 else b""
+                if remaining > 0 and not line: raise ValueError(f"the body ended {remaining:,} bytes short of its Content-Length")
+                remaining -= len(line)
+                if line.strip():
+                    line_no += 1
+                    chunk.append(bulk_row(json.loads(line)))
+                if chunk and (len(chunk) >= self.bulk_chunk_size or remaining <= 0):
+                    passthrough, inputs, metrics = await loop.run_in_executor(None, evaluate_chunk, chunk, columns or None)
+                    fields = {**passthrough, **inputs, **metrics}
+                    names, dumps = list(fields), json.dumps
+                    self.write_chunk(writer, "".join(dumps(dict(zip(names, row))) + "\n" for row in zip(*fields.values())).encode())
+                    await writer.drain()
+                    chunk = []
+        except (ValueError, TypeError, KeyError) as exc:
+            self.write_chunk(writer, (json.dumps({"error": str(exc), "line": line_no}) + "\n").encode())
+            writer.write(b"0\r\n\r\n")
+            return False  # the rest of the body is unread
+        writer.write(b"0\r\n\r\n")
+        return True
+
+    async def export(self, method, url, body, writer, keep_alive=True):
+        """Streams a grid sweep's results as a file download, one engine call and one HTTP chunk per grid chunk."""
+        if method != "POST": raise HTTPError(405, "use POST")
+        fmt, columns = parse_qs(url.query).get("format", ["csv"])[0], _columns(url) or None
+        if fmt not in FORMATS: raise HTTPError(400, f"format must be one of {sorted(FORMATS)}")
+        try: spec = json.loads(body or b"{}")
+        except ValueError: raise HTTPError(400, "body is not valid JSON") from None
+        if not isinstance(spec, dict): raise HTTPError(400, 'expected {"base": {...}, "axes": {...}}')
+        base, axes = scenario_row(spec.get("base", {})), sweep_axes(spec.get("axes", {}))
+        unknown = set(columns or ()).difference(calculate_metrics_batch({}))
+        if unknown: raise HTTPError(400, f"unknown metrics: {sorted(unknown)}")
+        pieces = iter_export(grid_chunks(axes, base, EXPORT_CHUNK_SIZE), fmt, columns=columns)
+        writer.write(f"HTTP/1.1 200 OK\r\nContent-Type: {FORMATS[fmt]}\r\nContent-Disposition: attachment; filename=\"results.{fmt}\"\r\n"
+                     f"Transfer-Encoding: chunked\r\n{_connection(keep_alive)}\r\n".encode())
+        loop = asyncio.get_running_loop()
+        while (data := await loop.run_in_executor(None, next, pieces, None)) is not None:
+            self.write_chunk(writer, data)
+            await writer.drain()
+        writer.write(b"0\r\n\r\n")
+
+    @staticmethod
+    def write_chunk(writer, data):
+        if data: writer.write(b"%x\r\n%s\r\n" % (len(data), data))
+
+    @staticmethod
+    def respond(writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode()
+        writer.write(f"HTTP/1.1 {status} {_REASONS[status]}\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n"
+                     f"{_connection(keep_alive)}\r\n".encode() + body)
+
+
+async def serve(host="127.0.0.1", port=8765, window_ms=DEFAULT_WINDOW_MS, max_batch=DEFAULT_MAX_BATCH, ready=None):
+    """Runs the service until cancelled; `ready(port)` is called once it is listening (port 0 picks a free one)."""
+    app = ScoringServer(window_ms / 1000, max_batch)
+    server = await asyncio.start_server(app.handle, host, port, limit=MAX_BODY_BYTES)
+    if ready is not None: ready(server.sockets[0].getsockname()[1])
+    async with server: await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m mustard_engine.server", description="Serve the mustard oil engine over HTTP/JSON.")
+    parser.add_argument("--host", default="127.0.0.1", help="interface to bind (default: 127.0.0.1, this machine only)")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--window-ms", type=float, default=DEFAULT_WINDOW_MS, help=f"micro-batching window (default: {DEFAULT_WINDOW_MS:g} ms; 0 batches only what is already queued)")
+    parser.add_argument("--max-batch", type=int, default=DEFAULT_MAX_BATCH, help=f"scenarios per engine call (default: {DEFAULT_MAX_BATCH:,}; 1 disables batching)")
+    args = parser.parse_args(argv)
+    ready = lambda port: print(f"serving on http://{args.host}:{port} (window {args.window_ms:g} ms, max batch {args.max_batch:,})", flush=True)
+    try: asyncio.run(serve(args.host, args.port, args.window_ms, args.max_batch, ready))
+    except KeyboardInterrupt: pass
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,93 @@
+"""Goal seek: the input value at which an engine output hits a target, for many scenarios/targets at once.
+
+Every lane (one scenario + target) is solved in lockstep through `calculate_metrics_batch`: a coarse grid scan
+over the search range brackets the first crossing, then a safeguarded regula falsi (Illinois variant, with a
+bisection step every fourth iteration so the bracket always shrinks) narrows it. Bracketing only needs the
+output to change sign, so the kinks from the pungency branches and the tax clamp cannot derail it the way a
+pure Newton step could.
+
+    goal_seek(EngineInputs(), "seed_purchase_price", "annual_pat", 0.0).value     # break-even seed price
+    goal_seek_batch({"capex": capexes}, "oil_blend_sell_price", "roce_pat", 20.0)  # one answer per capex
+"""
+from collections import namedtuple
+
+import numpy as np
+
+from .batch import _columns, calculate_metrics_batch
+from .inputs import INPUT_BOUNDS, INPUT_NAMES, EngineInputs
+
+DEFAULT_GRID = 64
+DEFAULT_XTOL = 1e-9   # relative to the bracket's magnitude
+DEFAULT_MAX_ITER = 60
+
+Solution = namedtuple("Solution", "value achieved converged iterations")  # arrays (or scalars from `goal_seek`)
+
+
+def search_range(name, base_value):
+    """Default (low, high) to search for `name`: the sidebar's bounds where it has them, else 0 .. 10x the base."""
+    lo, hi = INPUT_BOUNDS.get(name, (None, None))
+    if lo is None: lo = min(0.0, float(base_value))
+    if hi is None: hi = max(10 * abs(float(base_value)), lo + 1.0)
+    return float(lo), float(hi)
+
+
+def _evaluate(columns, name, x, output, target):
+    columns[name] = x
+    return calculate_metrics_batch(columns)[output] - target
+
+
+def goal_seek_batch(scenarios, name, output, targets, low=None, high=None, grid=DEFAULT_GRID, xtol=DEFAULT_XTOL, max_iter=DEFAULT_MAX_ITER):
+    """Solves `output(name=x) == target` for every lane; scenarios and targets broadcast against each other.
+
+    `scenarios` is anything `calculate_metrics_batch` accepts (a dict of arrays, a DataFrame, or one scenario).
+    The search covers [`low`, `high`] (default: `search_range`); the crossing closest to `low` is returned.
+    Lanes with no crossing in range come back as NaN with `converged` False.
+    """
+    if name not in INPUT_NAMES: raise ValueError(f"{name!r} is not an engine input")
+    base = _columns(scenarios if not isinstance(scenarios, EngineInputs) else scenarios.as_dict())
+    targets = np.asarray(targets, dtype=np.float64)
+    shape = np.broadcast_shapes(base[name].shape, targets.shape)
+    cols = {k: np.broadcast_to(v, shape).ravel() for k, v in base.items()}
+    target = np.broadcast_to(targets, shape).ravel()
+    n = target.size
+    if low is None or high is None:
+        default_lo, default_hi = search_range(name, np.median(cols[name]) if n else 0.0)
+        low, high = default_lo if low is None else low, default_hi if high is None else high
+
+    # --- Bracket: scan a grid (all lanes x all grid points in one engine call), keep the first sign change ---
+    xs = np.linspace(low, high, grid)
+    scan = {k: np.repeat(v, grid) for k, v in cols.items()}
+    fs = _evaluate(scan, name, np.tile(xs, n), output, np.repeat(target, grid)).reshape(n, grid)
+    crossing = (np.sign(fs[:, :-1]) * np.sign(fs[:, 1:])) <= 0
+    found = crossing.any(axis=1)
+    first = np.argmax(crossing, axis=1)
+    rows = np.arange(n)
+    a, b = xs[first], xs[first + 1]
+    fa, fb = fs[rows, first], fs[rows, first + 1]
+
+    # --- Refine: Illinois regula falsi (b is the newest point), with a bisection step every 4th iteration ---
+    ftol = 1e-12 * np.maximum(1.0, np.abs(fs).max(axis=1))  # "hit" relative to how far the output ranges over the scan
+    x = np.where(fa == 0, a, b)
+    done = ~found | (fa == 0) | (fb == 0)
+    iterations = 0
+    for iterations in range(1, max_iter + 1):
+        if done.all(): break
+        bisect = iterations % 4 == 0
+        denom = np.where(fb != fa, fb - fa, 1.0)
+        step = (a + b) / 2 if bisect else np.where(fb != fa, b - fb * (b - a) / denom, (a + b) / 2)
+        x = np.where(done, x, step)
+        fx = _evaluate(dict(cols), name, x, output, target)
+        cross = np.sign(fx) != np.sign(fb)
+        live = ~done
+        a, fa = np.where(live & cross, b, a), np.where(live & cross, fb, np.where(live & ~bisect, fa / 2, fa))
+        b, fb = np.where(live, x, b), np.where(live, fx, fb)
+        done |= (np.abs(fx) <= ftol) | (np.abs(b - a) <= xtol * np.maximum(1.0, np.abs(x)))
+    value = np.where(found, x, np.nan)
+    achieved = _evaluate(dict(cols), name, np.where(found, value, cols[name]), output, 0.0)
+    return Solution(value.reshape(shape), np.where(found, achieved, np.nan).reshape(shape), (found & done).reshape(shape), iterations)
+
+
+def goal_seek(base, name, output, target, low=None, high=None, **options):
+    """Single-scenario convenience wrapper; returns a `Solution` of plain floats."""
+    sol = goal_seek_batch(base, name, output, target, low, high, **options)
+    return Solution(float(sol.value), float(sol.achieved), bool(sol.converged), sol.iterations)
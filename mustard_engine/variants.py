@@ -0,0 +1,78 @@
+"""Formula variants of the engine: the dashboard's rules (`app.py`) and the original plant model's (`mustard.py`).
+
+Both run through the one batch kernel: `calculate_metrics_batch(inputs, variant=LEGACY)`. A variant is a named
+set of rule choices, not a copy of the formulas, so the models differ exactly where their rules do:
+
+- `market_oil`: "optimize" adds the market oil that brings a high-pungency blend down to the requirement (and
+  diverts expeller oil from a low one); "fixed" blends `market_oil_mt` a day whatever the pungency, counts it in
+  the blend's pungency, and only diverts expeller oil (at most all of it; none when both oils are equally pungent).
+- `financing`: "split" charges `main_financing_rate_pa` on debt-funded capex plus net WC and
+  `warehouse_finance_rate_pa` on the financed hoard; "flat" charges `flat_interest_rate_pa` on all of capex plus
+  gross WC (the financed hoard included).
+- `depreciation_months`: None depreciates over `depreciation_years`; a number writes capex off over that many months.
+- `moc_additive_kg_per_mt`: kg per MT of water and salt added, against their ₹/kg costs. `mustard.py` multiplies
+  the MT quantities by ₹/kg directly, which is a factor of 1 here.
+- `oil_wc_basis`: FG oil stock and oil debtors on "all" oil sold, or on the "blend" only.
+- `capital_basis`: capital employed on "net" WC (financed hoard excluded) or "gross" WC.
+
+`mustard.py` has no tax, ROE or solvex synergy. `LEGACY` applies the dashboard's rules for those, so every
+metric exists under both variants.
+
+    diff = compare_variants({"seed_purchase_price": np.linspace(40000, 65000, 500)})
+    diff.delta["annual_pbt"]               # LEGACY minus DASHBOARD, per scenario
+"""
+from collections import namedtuple
+
+_CHOICES = {"market_oil": ("optimize", "fixed"), "financing": ("split", "flat"), "oil_wc_basis": ("all", "blend"), "capital_basis": ("net", "gross")}
+
+
+class ModelVariant(namedtuple("ModelVariant", "name market_oil market_oil_mt financing flat_interest_rate_pa depreciation_months "
+                                              "moc_additive_kg_per_mt oil_wc_basis capital_basis",
+                              defaults=("optimize", 0.0, "split", 12.0, None, 1000.0, "all", "net"))):
+    """Rule choices for one model (see the module docstring); numeric fields may be arrays that broadcast over scenarios."""
+    __slots__ = ()
+
+    def __new__(cls, *args, **kwargs):
+        self = super().__new__(cls, *args, **kwargs)
+        for field, choices in _CHOICES.items():
+            if getattr(self, field) not in choices: raise ValueError(f"{field} must be one of {choices}, not {getattr(self, field)!r}")
+        return self
+
+    def replace(self, **changes):
+        return self._replace(**changes)
+
+
+DASHBOARD = ModelVariant("dashboard")
+LEGACY = ModelVariant("legacy", market_oil="fixed", financing="flat", depreciation_months=96, moc_additive_kg_per_mt=1.0,
+                      oil_wc_basis="blend", capital_basis="gross")
+VARIANTS = {v.name: v for v in (DASHBOARD, LEGACY)}
+
+# `mustard.py`'s widget defaults, as engine inputs (its inputs that have no engine counterpart are variant fields).
+LEGACY_INPUTS = {
+    "seed_input_mt": 200.0, "kachi_ghani_yield_pct": 18.0, "expeller_yield_pct": 15.0, "seed_purchase_price": 57000.0,
+    "hoarded_rm_rate": 57000.0, "oil_blend_sell_price": 138000.0, "expeller_oil_sell_price": 135500.0, "market_bought_oil_price": 133000.0,
+    "moc_sell_price": 22500.0, "kachi_ghani_pungency": 0.4, "expeller_oil_pungency": 0.12, "water_added_pct": 2.0, "water_cost_per_kg": 1.0,
+    "salt_added_pct": 3.0, "salt_cost_per_kg": 5.0, "processing_cost_per_mt": 1300.0, "other_variable_costs_per_mt": 2300.0,
+    "other_expenses_daily": 0.0, "production_days_per_month": 24, "capex": 170000000.0, "tax_rate_pct": 25.0, "other_assets": 0.0,
+    "rm_hoard_months": 6.0, "rm_hoard_financed_pct": 80.0, "warehouse_finance_rate_pa": 12.0, "rm_safety_stock_days": 24,
+    "creditor_days": 15, "fg_oil_safety_days": 15, "fg_moc_safety_days": 5, "oil_debtor_days": 5, "moc_debtor_days": 5,
+}
+
+# base / other: {metric: array} per variant, over the same scenarios; delta: other minus base.
+VariantDiff = namedtuple("VariantDiff", "base other delta")
+
+
+def get_variant(name_or_variant):
+    if isinstance(name_or_variant, ModelVariant): return name_or_variant
+    try: return VARIANTS[name_or_variant]
+    except KeyError: raise ValueError(f"unknown model variant {name_or_variant!r}; have {sorted(VARIANTS)}") from None
+
+
+def compare_variants(inputs, base=DASHBOARD, other=LEGACY, outputs=None):
+    """Runs one scenario grid through two variants of the batch kernel and diffs every (or each named) metric."""
+    from .batch import calculate_metrics_batch
+
+    a, b = calculate_metrics_batch(inputs, base), calculate_metrics_batch(inputs, other)
+    names = list(outputs) if outputs is not None else list(a)
+    a, b = {k: a[k] for k in names}, {k: b[k] for k in names}
+    return VariantDiff(a, b, {k: b[k] - a[k] for k in names})